@@ -2,7 +2,8 @@
 # 05/14/2024
 # Program Description: To provide a blueprint for a ball to move around a screen
 
-import pygame, math, sys, random
+# pygame is only imported by the methods that draw or need the display, so the physics can run without it
+import random
 from drawable import Drawable
 
 class Ball(Drawable):
@@ -20,22 +21,28 @@ class Ball(Drawable):
         
     Methods:
         __init__: Instantiates the ball object
+        reset: Sets the ball up again as if it were newly built
         draw: Displays the ball object on the surface object if the Drawable object's
         isVisible attribute value is True
         get_rect: Instantiates a pygame.Rect object that covers the ball's area
         getColor: Returns the color attribute
         getRadius: Returns the radius attribute
+        getSprite: Returns the ball's pre-rendered sprite from a SpriteCache
+        makeBounds: Works out the edges of the ball's rectangle without building a Rect
         isTouchingBall:
         getXSpeed: Returns the xSpeed attribute
         getYSpeed: Returns the ySpeed attribute
+        getState: Returns the ball's position, radius, color and speeds in one tuple
         move: Changes the ball object's position on the surface
         setColor: Changes the ball's color
         setRadius: Changes the radius attribute
         setXSpeed: Changes the xSpeed attribute
         setYSpeed: Changes the ySpeed attribute
+        setState: Puts the ball back into a state returned by getState
     '''
+    __slots__ = ("__radius", "__color", "__xSpeed", "__ySpeed", "__sprite", "__spriteCache")
     # Constructor
-    def __init__(self, x=0, y=0, radius=10, color=(0,0,0)):
+    def __init__(self, x=0, y=0, radius=10, color=(0,0,0), rng=None):
         '''
         Instantiates the base class Drawable based on given arguments as well as the Ball object itself
         
@@ -44,19 +51,47 @@ class Ball(Drawable):
             y (int): Vertical position of the ball relative to center
             radius (int or float): The radius of the ball, measured from the center position
             color (integer tuple): RGB value (tuple of three integers) to represent the color of the ball
+            rng (object): A random.Random object used to pick the starting direction. If no argument is
+            passed, the random module's shared generator is used.
                 
         Return value: None
         
         Sample call: ball1 = Ball(1,9,5,(255,0,0))
         '''
         super().__init__(x, y)
+        self.reset(x, y, radius, color, rng)
+    def reset(self, x=0, y=0, radius=10, color=(0,0,0), rng=None):
+        '''
+        Puts the ball back into the state the constructor leaves it in, so a ball that left play can be
+        reused for a new one. The direction is drawn from rng exactly as the constructor draws it.
+        
+        Parameters:
+            x (int): Horizontal position of the ball relative to center
+            y (int): Vertical position of the ball relative to center
+            radius (int or float): The radius of the ball, measured from the center position
+            color (integer tuple): RGB value (tuple of three integers) to represent the color of the ball
+            rng (object): A random.Random object used to pick the starting direction. If no argument is
+            passed, the random module's shared generator is used.
+                
+        Return value: None
+        
+        Sample call: ball1.reset(400, 300, 18, (0,0,0))
+        '''
+        self.setLoc(x, y)
+        self.setVisible(True)
         self.__radius = radius
         self.__color = color
         # Randomizes the initial x-direction of the ball
-        self.__xSpeed = random.randint(-1, 1) * 2
+        if rng is None:
+            rng = random
+        self.__xSpeed = rng.randint(-1, 1) * 2
         if self.__xSpeed == 0:
             self.__xSpeed += 1
         self.__ySpeed = 2
+        # Cached sprite for drawing with sprites.drawBalls, looked up again after the color or radius changes
+        # or when it is asked for from a different cache than the one it came from
+        self.__sprite = None
+        self.__spriteCache = None
     def draw(self, surface):
         '''
         Draws ball instances on a provided surface
@@ -71,9 +106,10 @@ class Ball(Drawable):
         '''
         # Only draws the Ball object to the surface if visibility is true
         if self.isVisible():
+            import pygame
             loc = self.getLoc()
-            pygame.draw.circle(surface, self.__color, \
-                               (loc[0], loc[1]), self.__radius)
+            pygame.draw.circle(surface, self.getColor(), \
+                               (loc[0], loc[1]), self.getRadius())
     # Getters
     def get_rect(self):
         '''
@@ -86,10 +122,29 @@ class Ball(Drawable):
         
         Sample call: ball1.get_rect()
         '''
+        import pygame
         loc = self.getLoc()
-        radius = self.__radius
+        radius = self.getRadius()
         return pygame.Rect(loc[0] - radius, loc[1] - radius, \
                            2 * radius, 2 * radius)
+    def makeBounds(self):
+        '''
+        Works out the edges of the rectangle get_rect would build, using the same rounding
+        toward zero that pygame.Rect applies to its arguments
+        
+        Parameters:
+            self (object): The Ball object itself
+            
+        Return value: A tuple of four integers (left, top, right, bottom)
+        
+        Sample call: bounds = ball1.makeBounds()
+        '''
+        x, y = self.getLoc()
+        radius = self.__radius
+        left = int(x - radius)
+        top = int(y - radius)
+        size = int(2 * radius)
+        return (left, top, left + size, top + size)
     def getColor(self):
         '''
         Return the instance's color attribute
@@ -114,6 +169,23 @@ class Ball(Drawable):
         Sample call: radius = ball1.getRadius()
         '''
         return self.__radius
+    def getSprite(self, cache):
+        '''
+        Return the ball's pre-rendered sprite, looking it up in the cache only when the ball has no
+        sprite yet, its color or radius changed since the last lookup or the sprite came from another cache
+        
+        Parameters:
+            self (object): The Ball object itself
+            cache (object): The SpriteCache to look the sprite up in
+            
+        Return value: A tuple of (surface, offset) from SpriteCache.get
+        
+        Sample call: sprite, offset = ball1.getSprite(cache)
+        '''
+        if self.__sprite is None or self.__spriteCache is not cache:
+            self.__sprite = cache.get(self.__radius, self.__color)
+            self.__spriteCache = cache
+        return self.__sprite
     def isTouchingBall(self, other):
         '''
         Checks if a ball collided with another ball.
@@ -153,8 +225,21 @@ class Ball(Drawable):
         Sample call: ySpeed = ball1.getYSpeed()
         '''
         return self.__ySpeed
+    def getState(self):
+        '''
+        Return everything that makes up the ball's state in one flat tuple, for World snapshots
+        
+        Parameters:
+            self (object): The Ball object itself
+            
+        Return value: A tuple of (x, y, radius, color, xSpeed, ySpeed)
+        
+        Sample call: state = ball1.getState()
+        '''
+        x, y = self.getLoc()
+        return (x, y, self.__radius, self.__color, self.__xSpeed, self.__ySpeed)
     # Setters
-    def move(self):
+    def move(self, width=None, dt=1):
         '''
         Increases the Ball object's horizontal and vertical positions by based on attributes
         xSpeed and ySpeed. This method also handles instances where the ball's position intersects
@@ -162,20 +247,25 @@ class Ball(Drawable):
         
         Parameters:
             self (object): The Ball object itself
+            width (int): The width of the area the ball bounces around in. If no argument is passed,
+            the width of the display surface is used.
+            dt (float): How many frames of motion to apply. The speeds are per frame, so 1 moves the
+            ball by its whole speed and 0.5 by half of it.
             
         Return value: None
         
         Sample call: ball1.move()
         '''
         currentX, currentY = self.getLoc()
-        newX = currentX + self.__xSpeed
-        newY = currentY + self.__ySpeed
-        self.setX(newX)
-        self.setY(newY)
+        newX = currentX + self.__xSpeed * dt
+        newY = currentY + self.__ySpeed * dt
+        self.setLoc(newX, newY)
         
-        # Stores the width and height pixel values of the surface
-        surface = pygame.display.get_surface()
-        width, height = surface.get_size()
+        # Stores the width pixel value of the surface if the caller did not provide one
+        if width is None:
+            import pygame
+            surface = pygame.display.get_surface()
+            width = surface.get_size()[0]
         
         # Checks to see if the ball's edges hit any of the display surface's edges
         # If so, the ball's movement goes in the opposite direction
@@ -197,6 +287,7 @@ class Ball(Drawable):
         Sample call: ball1.setColor((255,54,205))
         '''
         self.__color = color
+        self.__sprite = None
     def setRadius(self, radius):
         '''
         Allow the user to change the ball object's radius and thus its size
@@ -210,6 +301,8 @@ class Ball(Drawable):
         Sample call: ball1.setRadius(5.5)
         '''
         self.__radius = radius
+        self.__sprite = None
+        self.clearBounds()
     def setXSpeed(self, speed):
         '''
         Allow the user to change the speed at which the ball moves horizontally
@@ -235,4 +328,20 @@ class Ball(Drawable):
         
         Sample call: ball1.setYSpeed(6)
         '''
-        self.__ySpeed = speed
\ No newline at end of file
+        self.__ySpeed = speed
+    def setState(self, state):
+        '''
+        Puts the ball back into a state returned by getState
+        
+        Parameters:
+            self (object): The Ball object itself
+            state (tuple): A tuple of (x, y, radius, color, xSpeed, ySpeed)
+            
+        Return value: None
+        
+        Sample call: ball1.setState(state)
+        '''
+        x, y, self.__radius, self.__color, self.__xSpeed, self.__ySpeed = state
+        self.setLoc(x, y)
+        self.setVisible(True)
+        self.__sprite = None
\ No newline at end of file
@@ -0,0 +1,692 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Stores many balls as NumPy arrays so that moving them, bouncing them off the walls
+# and finding which ones overlap can be done for all of them at once
+
+import random
+import numpy as np
+from ball import Ball
+
+def gridPairs(left, top, right, bottom, cellSize):
+    '''
+    Finds every pair of rectangles that intersect, using the same test as Drawable.intersects. Each
+    rectangle goes into the grid cell holding its top left corner, and since no rectangle is wider or
+    taller than a cell, it is only compared with the rectangles in its own cell and the cells next to it.
+    Unlike sorting along one axis, this keeps the number of comparisons per ball the same however tall
+    the field is.
+
+    Parameters:
+        left (array): The left edge of each rectangle
+        top (array): The top edge of each rectangle
+        right (array): The right edge of each rectangle
+        bottom (array): The bottom edge of each rectangle
+        cellSize (float): The size of a grid cell, at least the size of the largest rectangle
+
+    Return value: Two arrays (a, b) of positions in the edge arrays, one entry for each intersecting pair
+
+    Sample call: a, b = gridPairs(left, top, right, bottom, 36.0)
+    '''
+    column = np.floor((left - left.min()) / cellSize).astype(np.int64) + 1
+    row = np.floor((top - top.min()) / cellSize).astype(np.int64)
+    # A spare column on each side keeps neighboring cells from wrapping onto the next row
+    columns = int(column.max()) + 2
+    key = row * columns + column
+    order = np.argsort(key, kind="stable")
+    sortedKey = key[order]
+    position = np.arange(len(order))
+    firsts = []
+    seconds = []
+    # Half of the neighboring cells, so each pair of cells is only looked at once
+    for offset in (0, 1, columns - 1, columns, columns + 1):
+        start = np.searchsorted(sortedKey, sortedKey + offset, side="left")
+        end = np.searchsorted(sortedKey, sortedKey + offset, side="right")
+        if offset == 0:
+            # Within a cell, each ball is only paired with the balls sorted after it
+            start = np.maximum(start, position + 1)
+        counts = np.maximum(end - start, 0)
+        total = int(counts.sum())
+        a = np.repeat(position, counts)
+        b = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        firsts.append(order[a])
+        seconds.append(order[b])
+    a = np.concatenate(firsts)
+    b = np.concatenate(seconds)
+    touching = (left[a] < right[b]) & (right[a] > left[b]) & \
+               (top[a] < bottom[b]) & (bottom[a] > top[b])
+    return a[touching], b[touching]
+
+class BallSystem:
+    '''
+    Keeps every ball's state in contiguous NumPy arrays (a structure of arrays) instead of one
+    object per ball. Slots of removed balls stay in the arrays with their alive flag cleared and
+    are reused by later spawns.
+
+    The arrays are public attributes rather than private ones behind getters. They are the system's
+    whole interface for batch work: BallView reads and writes single slots of them, ParallelField copies
+    them in and out, and callers run NumPy operations over them in place. A getter per array would only
+    hand back the same object. They may be replaced by bigger arrays when spawn grows the system, so
+    they should be looked up again after a spawn instead of being kept.
+
+    Attributes:
+        x (array): Horizontal position of each ball's center
+        y (array): Vertical position of each ball's center
+        vx (array): Horizontal speed of each ball
+        vy (array): Vertical speed of each ball
+        radius (array): Radius of each ball
+        colorIndex (array): Index into the palette for each ball's color
+        alive (array): Whether each slot currently holds a ball
+        palette (list): The RGB tuples that colorIndex refers to
+
+    Methods:
+        __init__: Instantiates the BallSystem object
+        spawn: Adds a ball and returns a Ball-compatible view of it
+        kill: Removes a ball from the system
+        view: Returns a Ball-compatible view of one slot
+        views: Returns views of every living ball
+        colorToIndex: Returns the palette index of a color, adding it if needed
+        getCount: Returns the number of slots in use (alive or not)
+        getAliveIndices: Returns the slot numbers of every living ball
+        getState: Copies the arrays so the system can be put back later
+        setState: Puts the system back into a copied state
+        step: Moves every living ball and bounces it off the display edges
+        overlappingPairs: Finds every pair of living balls whose rectangles intersect
+        resolveCollisions: Applies the ball-vs-ball collision rules to a set of pairs
+    '''
+    # Constructor
+    def __init__(self, capacity=16):
+        '''
+        Instantiates the BallSystem object with room for a number of balls
+
+        Parameters:
+            self (object): The BallSystem object itself
+            capacity (int): How many balls the arrays can hold before they have to grow
+
+        Return value: None
+
+        Sample call: system = BallSystem(10000)
+        '''
+        capacity = max(1, capacity)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.colorIndex = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.palette = []
+        self.__count = 0
+        self.__free = []
+    def __grow(self):
+        '''
+        Doubles the size of every array, keeping the existing values
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: None
+        '''
+        extra = len(self.x)
+        self.x = np.concatenate((self.x, np.zeros(extra)))
+        self.y = np.concatenate((self.y, np.zeros(extra)))
+        self.vx = np.concatenate((self.vx, np.zeros(extra)))
+        self.vy = np.concatenate((self.vy, np.zeros(extra)))
+        self.radius = np.concatenate((self.radius, np.zeros(extra)))
+        self.colorIndex = np.concatenate((self.colorIndex, np.zeros(extra, dtype=np.int32)))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, dtype=bool)))
+    def spawn(self, x=0, y=0, radius=10, color=(0,0,0), rng=None):
+        '''
+        Adds a ball to the system. Like the Ball constructor, the ball starts moving down with a
+        random horizontal direction.
+
+        Parameters:
+            self (object): The BallSystem object itself
+            x (int/float): Horizontal position of the ball's center
+            y (int/float): Vertical position of the ball's center
+            radius (int/float): The radius of the ball
+            color (tuple): RGB tuple for the ball's color
+            rng (object): A random.Random object used to pick the starting direction, or None to use
+            the random module's shared generator
+
+        Return value: A BallView for the new ball
+
+        Sample call: ball = system.spawn(400, 300, 18, BLACK)
+        '''
+        if self.__free:
+            index = self.__free.pop()
+        else:
+            if self.__count == len(self.x):
+                self.__grow()
+            index = self.__count
+            self.__count += 1
+        if rng is None:
+            rng = random
+        xSpeed = rng.randint(-1, 1) * 2
+        if xSpeed == 0:
+            xSpeed += 1
+        self.x[index] = x
+        self.y[index] = y
+        self.vx[index] = xSpeed
+        self.vy[index] = 2
+        self.radius[index] = radius
+        self.colorIndex[index] = self.colorToIndex(color)
+        self.alive[index] = True
+        return BallView(self, index)
+    def kill(self, index):
+        '''
+        Removes a ball from the system so its slot can be reused
+
+        Parameters:
+            self (object): The BallSystem object itself
+            index (int): The slot of the ball to remove
+
+        Return value: None
+
+        Sample call: system.kill(3)
+        '''
+        if self.alive[index]:
+            self.alive[index] = False
+            self.__free.append(index)
+    # Getters
+    def view(self, index):
+        '''
+        Returns a Ball-compatible view of one slot
+
+        Parameters:
+            self (object): The BallSystem object itself
+            index (int): The slot to view
+
+        Return value: A BallView object
+
+        Sample call: ball = system.view(0)
+        '''
+        return BallView(self, index)
+    def views(self):
+        '''
+        Returns Ball-compatible views of every living ball, in slot order
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: A list of BallView objects
+
+        Sample call: for ball in system.views(): ball.draw(surface)
+        '''
+        return [BallView(self, int(index)) for index in self.getAliveIndices()]
+    def colorToIndex(self, color):
+        '''
+        Returns the palette index of a color, adding the color to the palette if it is new
+
+        Parameters:
+            self (object): The BallSystem object itself
+            color (tuple): An RGB tuple
+
+        Return value: The color's index in the palette
+
+        Sample call: green = system.colorToIndex(GREEN)
+        '''
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+    def getCount(self):
+        '''
+        Returns the number of slots in use, including slots of removed balls
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: An integer slot count
+
+        Sample call: count = system.getCount()
+        '''
+        return self.__count
+    def getAliveIndices(self):
+        '''
+        Returns the slot numbers of every living ball
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: An array of slot numbers in increasing order
+
+        Sample call: indices = system.getAliveIndices()
+        '''
+        return np.flatnonzero(self.alive[:self.__count])
+    def getState(self):
+        '''
+        Copies every array along with the slot bookkeeping, so the system can later be put back
+        exactly as it is now. Each array is copied in one block, so this stays fast for many balls.
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: A tuple that can be passed to setState
+
+        Sample call: state = system.getState()
+        '''
+        n = self.__count
+        return (self.x[:n].copy(), self.y[:n].copy(), self.vx[:n].copy(), self.vy[:n].copy(), \
+                self.radius[:n].copy(), self.colorIndex[:n].copy(), self.alive[:n].copy(), \
+                list(self.palette), n, list(self.__free))
+    # Setters
+    def setState(self, state):
+        '''
+        Puts the system back into a state returned by getState. The state is copied, so it can be
+        restored again later.
+
+        Parameters:
+            self (object): The BallSystem object itself
+            state (tuple): A tuple returned by getState
+
+        Return value: None
+
+        Sample call: system.setState(state)
+        '''
+        x, y, vx, vy, radius, colorIndex, alive, palette, count, free = state
+        while len(self.x) < count:
+            self.__grow()
+        self.x[:count] = x
+        self.y[:count] = y
+        self.vx[:count] = vx
+        self.vy[:count] = vy
+        self.radius[:count] = radius
+        self.colorIndex[:count] = colorIndex
+        self.alive[:count] = alive
+        # Slots past the saved count are unused again
+        self.alive[count:] = False
+        self.palette = list(palette)
+        self.__count = count
+        self.__free = list(free)
+    def step(self, width, height, dt=1):
+        '''
+        Moves every living ball by its speed and bounces it off the left, right and top edges,
+        following the same rules as Ball.move
+
+        Parameters:
+            self (object): The BallSystem object itself
+            width (int): The width of the display
+            height (int): The height of the display (balls leave through the bottom)
+            dt (float): How many frames of motion to apply
+
+        Return value: None
+
+        Sample call: system.step(800, 600)
+        '''
+        n = self.__count
+        alive = self.alive[:n]
+        x = self.x[:n]
+        y = self.y[:n]
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        radius = self.radius[:n]
+        # Removed balls get a zero step so the arrays can be updated without gathering
+        scale = alive if dt == 1 else alive * dt
+        x += vx * scale
+        y += vy * scale
+        hitSide = alive & ((x <= radius) | (x + radius >= width))
+        hitTop = alive & (y <= radius)
+        vx[hitSide] *= -1
+        vy[hitTop] *= -1
+    def overlappingPairs(self):
+        '''
+        Finds every pair of living balls whose rectangles intersect, using the same rectangles
+        and test as Drawable.intersects. The balls are put into a grid with cells as big as the
+        largest ball, so each ball is only compared with the balls in its own and neighboring cells.
+
+        Parameters:
+            self (object): The BallSystem object itself
+
+        Return value: Two arrays (first, second) of slot numbers with first < second, sorted by first
+        and then by second
+
+        Sample call: first, second = system.overlappingPairs()
+        '''
+        indices = self.getAliveIndices()
+        if len(indices) < 2:
+            return indices[:0], indices[:0]
+        radius = self.radius[indices]
+        # pygame.Rect truncates its arguments, so the same is done here
+        left = np.trunc(self.x[indices] - radius)
+        top = np.trunc(self.y[indices] - radius)
+        size = np.trunc(2 * radius)
+        right = left + size
+        bottom = top + size
+
+        a, b = gridPairs(left, top, right, bottom, max(float(size.max()), 1.0))
+        a = indices[a]
+        b = indices[b]
+        first = np.minimum(a, b)
+        second = np.maximum(a, b)
+        order = np.lexsort((second, first))
+        return first[order], second[order]
+    def resolveCollisions(self, first, second, greenIndex):
+        '''
+        Applies the ball-vs-ball rules from the game to a set of touching pairs: both balls flip
+        their horizontal direction and turn green. A ball in several pairs flips once per pair.
+
+        Parameters:
+            self (object): The BallSystem object itself
+            first (array): Slot numbers of the first ball in each pair
+            second (array): Slot numbers of the second ball in each pair
+            greenIndex (int): The palette index of the green color
+
+        Return value: The number of balls that were not green before, which is how much the score rises
+
+        Sample call: numGreen += system.resolveCollisions(first, second, green)
+        '''
+        flips = np.bincount(np.concatenate((first, second)), minlength=self.__count)
+        self.vx[:self.__count][flips % 2 == 1] *= -1
+        touched = flips > 0
+        newlyGreen = int(np.count_nonzero(touched & (self.colorIndex[:self.__count] != greenIndex)))
+        self.colorIndex[:self.__count][touched] = greenIndex
+        return newlyGreen
+
+class BallView(Ball):
+    '''
+    A Ball whose state lives in a BallSystem's arrays. It can be used anywhere a Ball is expected,
+    including Ball.draw and the collision methods of Drawable.
+
+    Parameters:
+        Ball (base class): Provides draw, get_rect and isTouchingBall
+
+    Attributes:
+        system (object): The BallSystem holding the ball's state
+        index (int): The ball's slot in the system
+
+    Methods:
+        __init__: Instantiates the BallView object
+        getIndex: Returns the slot the view refers to
+        getBounds: Works out the edges of the ball's rectangle from the system's arrays
+        kill: Removes the ball from its system
+        The remaining getters and setters match Ball and read or write the system's arrays
+    '''
+    __slots__ = ("__system", "__index")
+    # Constructor
+    def __init__(self, system, index):
+        '''
+        Instantiates a view of one slot of a BallSystem. The Ball constructor is skipped since the
+        ball's state already lives in the system.
+
+        Parameters:
+            self (object): The BallView object itself
+            system (object): The BallSystem that owns the ball
+            index (int): The ball's slot in the system
+
+        Return value: None
+
+        Sample call: ball = BallView(system, 0)
+        '''
+        # Ball.__init__ would store a position, radius, color and speeds of its own, and spawn draws
+        # the starting direction itself, so only what Drawable needs is set up here
+        self.__system = system
+        self.__index = index
+        self.setVisible(True)
+    # Getters
+    def getIndex(self):
+        '''
+        Returns the slot in the system that the view refers to
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: An integer slot number
+
+        Sample call: index = ball.getIndex()
+        '''
+        return self.__index
+    def getLoc(self):
+        '''
+        Returns the ball's center from the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A tuple of two floats (x, y)
+
+        Sample call: x, y = ball.getLoc()
+        '''
+        return (float(self.__system.x[self.__index]), float(self.__system.y[self.__index]))
+    def getBounds(self):
+        '''
+        Works out the edges of the ball's rectangle from the system's arrays, rounded toward zero as
+        pygame.Rect does
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A tuple of four integers (left, top, right, bottom)
+
+        Sample call: left, top, right, bottom = ball.getBounds()
+        '''
+        # Nothing is cached, since BallSystem.step moves the balls without going through the view
+        system = self.__system
+        index = self.__index
+        radius = float(system.radius[index])
+        left = int(float(system.x[index]) - radius)
+        top = int(float(system.y[index]) - radius)
+        size = int(2 * radius)
+        return (left, top, left + size, top + size)
+    def getColor(self):
+        '''
+        Returns the ball's color, looked up in the system's palette
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A three-integer RGB tuple
+
+        Sample call: color = ball.getColor()
+        '''
+        return self.__system.palette[self.__system.colorIndex[self.__index]]
+    def getRadius(self):
+        '''
+        Returns the ball's radius from the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A float radius
+
+        Sample call: radius = ball.getRadius()
+        '''
+        return float(self.__system.radius[self.__index])
+    def getSprite(self, cache):
+        '''
+        Returns the ball's pre-rendered sprite. The lookup is made every time, since the system's arrays
+        can change the ball's color or radius without going through the view.
+
+        Parameters:
+            self (object): The BallView object itself
+            cache (object): The SpriteCache to look the sprite up in
+
+        Return value: A tuple of (surface, offset) from SpriteCache.get
+
+        Sample call: sprite, offset = ball.getSprite(cache)
+        '''
+        return cache.get(self.getRadius(), self.getColor())
+    def getXSpeed(self):
+        '''
+        Returns the ball's horizontal speed from the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A float speed
+
+        Sample call: xSpeed = ball.getXSpeed()
+        '''
+        return float(self.__system.vx[self.__index])
+    def getYSpeed(self):
+        '''
+        Returns the ball's vertical speed from the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A float speed
+
+        Sample call: ySpeed = ball.getYSpeed()
+        '''
+        return float(self.__system.vy[self.__index])
+    def getState(self):
+        '''
+        Returns everything that makes up the ball's state in one flat tuple, the same as Ball.getState
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: A tuple of (x, y, radius, color, xSpeed, ySpeed)
+
+        Sample call: state = ball.getState()
+        '''
+        x, y = self.getLoc()
+        return (x, y, self.getRadius(), self.getColor(), self.getXSpeed(), self.getYSpeed())
+    # Setters
+    def kill(self):
+        '''
+        Removes the ball from its system so the slot can be reused
+
+        Parameters:
+            self (object): The BallView object itself
+
+        Return value: None
+
+        Sample call: ball.kill()
+        '''
+        self.__system.kill(self.__index)
+    def move(self, width=None, dt=1):
+        '''
+        Moves this ball alone, following the same rules as Ball.move
+
+        Parameters:
+            self (object): The BallView object itself
+            width (int): The width of the area the ball bounces around in, or None to use the display's
+            dt (float): How many frames of motion to apply
+
+        Return value: None
+
+        Sample call: ball.move(800)
+        '''
+        system = self.__system
+        index = self.__index
+        system.x[index] += system.vx[index] * dt
+        system.y[index] += system.vy[index] * dt
+        if width is None:
+            import pygame
+            width = pygame.display.get_surface().get_size()[0]
+        radius = system.radius[index]
+        if system.x[index] <= radius or system.x[index] + radius >= width:
+            system.vx[index] *= -1
+        if system.y[index] <= radius:
+            system.vy[index] *= -1
+    def setLoc(self, x, y):
+        '''
+        Moves the ball's center in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            x (int/float): The new horizontal position
+            y (int/float): The new vertical position
+
+        Return value: None
+
+        Sample call: ball.setLoc(400, 300)
+        '''
+        self.__system.x[self.__index] = x
+        self.__system.y[self.__index] = y
+    def setX(self, x):
+        '''
+        Sets the horizontal position of the ball's center in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            x (int/float): The new horizontal position
+
+        Return value: None
+
+        Sample call: ball.setX(400)
+        '''
+        self.__system.x[self.__index] = x
+    def setY(self, y):
+        '''
+        Sets the vertical position of the ball's center in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            y (int/float): The new vertical position
+
+        Return value: None
+
+        Sample call: ball.setY(300)
+        '''
+        self.__system.y[self.__index] = y
+    def setColor(self, color=(0,0,0)):
+        '''
+        Changes the ball's color, adding it to the system's palette if it is new
+
+        Parameters:
+            self (object): The BallView object itself
+            color (tuple): The new RGB color. If no argument is passed, the ball turns black.
+
+        Return value: None
+
+        Sample call: ball.setColor(GREEN)
+        '''
+        self.__system.colorIndex[self.__index] = self.__system.colorToIndex(color)
+    def setRadius(self, radius):
+        '''
+        Changes the ball's radius in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            radius (int/float): The new radius
+
+        Return value: None
+
+        Sample call: ball.setRadius(18)
+        '''
+        self.__system.radius[self.__index] = radius
+    def setXSpeed(self, speed):
+        '''
+        Changes the ball's horizontal speed in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            speed (int/float): The new horizontal speed
+
+        Return value: None
+
+        Sample call: ball.setXSpeed(5)
+        '''
+        self.__system.vx[self.__index] = speed
+    def setYSpeed(self, speed):
+        '''
+        Changes the ball's vertical speed in the system's arrays
+
+        Parameters:
+            self (object): The BallView object itself
+            speed (int/float): The new vertical speed
+
+        Return value: None
+
+        Sample call: ball.setYSpeed(6)
+        '''
+        self.__system.vy[self.__index] = speed
+    def setState(self, state):
+        '''
+        Puts the ball back into a state returned by getState
+
+        Parameters:
+            self (object): The BallView object itself
+            state (tuple): A tuple of (x, y, radius, color, xSpeed, ySpeed)
+
+        Return value: None
+
+        Sample call: ball.setState(state)
+        '''
+        x, y, radius, color, xSpeed, ySpeed = state
+        self.setLoc(x, y)
+        self.setRadius(radius)
+        self.setColor(color)
+        self.setXSpeed(xSpeed)
+        self.setYSpeed(ySpeed)
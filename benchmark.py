@@ -0,0 +1,296 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Times the game's physics, collision checks, whole World steps (one ball at a time and
+# batched in a BallSystem) and drawing (with pygame.draw.circle and with cached sprites) on generated scenes
+# of 10 to 100,000 balls, writes the results as JSON and compares them against a saved baseline
+
+import os
+# Lets the benchmark draw to offscreen surfaces without opening a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# Keeps pygame's import banner out of the JSON results printed to the screen
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse, json, math, platform, random, sys, time, tracemalloc
+import pygame
+from ball import Ball
+from broadphase import SpatialHash
+from paddle import Paddle
+from sprites import SpriteCache, drawBalls
+from text import CounterText, Text
+from world import BLACK, DREXEL_BLUE, DREXEL_GOLD, GREEN, World
+
+# Screen area given to each ball, which keeps the crowding the same at every ball count
+AREA_PER_BALL = 4800
+# The largest offscreen surface drawn to, so huge scenes do not need gigabytes of pixels
+MAX_SURFACE_SIZE = 2048
+# The physics phases, whose total time per step gives the steps per second
+PHYSICS_PHASES = ("move", "broad", "narrow", "paddle")
+
+def makeScenario(count, seed):
+    '''
+    Builds a reproducible scene with a gold ball and count - 1 black or green balls spread over
+    a square play area that grows with the ball count
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The seed for the positions, sizes and directions
+
+    Return value: A tuple of (balls, paddle, width, height)
+
+    Sample call: balls, paddle, width, height = makeScenario(1000, 1)
+    '''
+    rng = random.Random(seed)
+    side = max(800, int(math.sqrt(count * AREA_PER_BALL)))
+    balls = [Ball(side/2, side/2, 30, DREXEL_GOLD, rng)]
+    for _ in range(count - 1):
+        color = GREEN if rng.random() < 0.5 else BLACK
+        ball = Ball(rng.uniform(18, side - 18), rng.uniform(18, side - 18), 18, color, rng)
+        ball.setYSpeed(rng.choice((-3, -2, 2, 3)))
+        balls.append(ball)
+    paddle = Paddle(200, 20, DREXEL_BLUE, side, side, followMouse=False)
+    return balls, paddle, side, side
+
+def makeWorld(count, seed, useBallSystem):
+    '''
+    Builds a World holding the same scene as makeScenario, so whole game steps can be timed
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The seed for the positions, sizes and directions
+        useBallSystem (boolean): Whether the World keeps its balls in a BallSystem and steps them with NumPy
+
+    Return value: A World object
+
+    Sample call: world = makeWorld(10000, 1, True)
+    '''
+    balls, paddle, width, height = makeScenario(count, seed)
+    world = World(width, height, useBallSystem=useBallSystem, seed=seed, maxBalls=count)
+    # The World places its own gold ball in the middle, where the scene's gold ball is
+    gold = world.getBalls()[0]
+    gold.setXSpeed(balls[0].getXSpeed())
+    gold.setYSpeed(balls[0].getYSpeed())
+    for ball in balls[1:]:
+        x, y = ball.getLoc()
+        added = world.addBall(x, y, ball.getRadius(), ball.getColor())
+        added.setXSpeed(ball.getXSpeed())
+        added.setYSpeed(ball.getYSpeed())
+    return world
+
+def percentile(values, share):
+    '''
+    Returns the nearest-rank percentile of a list of numbers
+
+    Parameters:
+        values (list): The numbers, in any order
+        share (float): The percentile as a fraction, such as 0.99
+
+    Return value: The value at that percentile
+
+    Sample call: p99 = percentile(times, 0.99)
+    '''
+    ordered = sorted(values)
+    index = max(0, math.ceil(share * len(ordered)) - 1)
+    return ordered[index]
+
+def summarize(times):
+    '''
+    Turns a list of phase times in nanoseconds into millisecond statistics
+
+    Parameters:
+        times (list): Nanosecond timings, one per step
+
+    Return value: A dictionary with the mean, p50, p90 and p99 in milliseconds
+
+    Sample call: stats = summarize(moveTimes)
+    '''
+    return {"mean": sum(times) / len(times) / 1e6, "p50": percentile(times, 0.5) / 1e6, \
+            "p90": percentile(times, 0.9) / 1e6, "p99": percentile(times, 0.99) / 1e6}
+
+def runScenario(count, seed, steps):
+    '''
+    Times every phase of the game on one generated scene
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The scene's seed
+        steps (int): How many steps to time
+
+    Return value: A dictionary of results for the scene
+
+    Sample call: result = runScenario(1000, 1, 30)
+    '''
+    balls, paddle, width, height = makeScenario(count, seed)
+    grid = SpatialHash()
+    surface = pygame.Surface((min(width, MAX_SURFACE_SIZE), min(height, MAX_SURFACE_SIZE)))
+    message = Text("Steps: 0", 10, 10)
+    counter = CounterText("Number of green balls: ", 0, 10, 40)
+    sprites = SpriteCache()
+    alphaSprites = SpriteCache(perPixelAlpha=True)
+    # The per-pixel alpha frame is drawn from its own copy of the scene, so each ball keeps the sprite
+    # from one cache instead of swapping between the two caches on every frame
+    alphaBalls = makeScenario(count, seed)[0]
+    # Whole game steps, with Ball objects handled one at a time and with a BallSystem handled by NumPy
+    worlds = {"worldStep": makeWorld(count, seed, False), "worldStepBatched": makeWorld(count, seed, True)}
+    timings = {name: [] for name in PHYSICS_PHASES + ("text", "draw", "drawSprites", "drawAlphaSprites") + \
+               tuple(worlds)}
+    clock = time.perf_counter_ns
+
+    for step in range(steps):
+        paddle.setX(balls[0].getLoc()[0])
+
+        start = clock()
+        for ball in balls:
+            ball.move(width)
+        timings["move"].append(clock() - start)
+
+        start = clock()
+        pairs = grid.candidatePairs(balls)
+        timings["broad"].append(clock() - start)
+
+        start = clock()
+        touching = 0
+        for i, j in pairs:
+            if balls[i].intersects(balls[j]):
+                touching += 1
+        timings["narrow"].append(clock() - start)
+
+        start = clock()
+        for ball in balls:
+            ball.intersectSide(paddle)
+            ball.intersects(paddle)
+        timings["paddle"].append(clock() - start)
+
+        start = clock()
+        message.setMessage("Steps: " + str(step))
+        message.draw(surface)
+        counter.setValue(touching)
+        counter.draw(surface)
+        timings["text"].append(clock() - start)
+
+        start = clock()
+        surface.fill((255, 255, 255))
+        paddle.draw(surface)
+        for ball in balls:
+            ball.draw(surface)
+        timings["draw"].append(clock() - start)
+
+        # The same frame drawn from cached sprites with one batched blit
+        start = clock()
+        surface.fill((255, 255, 255))
+        paddle.draw(surface)
+        drawBalls(surface, balls, sprites)
+        timings["drawSprites"].append(clock() - start)
+
+        for alphaBall, ball in zip(alphaBalls, balls):
+            x, y = ball.getLoc()
+            alphaBall.setLoc(x, y)
+        start = clock()
+        surface.fill((255, 255, 255))
+        paddle.draw(surface)
+        drawBalls(surface, alphaBalls, alphaSprites)
+        timings["drawAlphaSprites"].append(clock() - start)
+
+        for name, world in worlds.items():
+            paddleX = world.getBalls()[0].getLoc()[0] if world.getBalls() else width / 2
+            start = clock()
+            world.step(paddleX)
+            timings[name].append(clock() - start)
+
+    physics = [sum(timings[name][step] for name in PHYSICS_PHASES) for step in range(steps)]
+    return {"balls": count, "seed": seed, "steps": steps, \
+            "stepsPerSecond": 1e9 / (sum(physics) / steps), \
+            "phases": {name: summarize(values) for name, values in timings.items()}, \
+            "peakMemoryBytes": measurePeakMemory(count, seed)}
+
+def measurePeakMemory(count, seed):
+    '''
+    Measures the most memory Python allocated while building a scene and running one physics step.
+    This is done separately from the timed steps since tracing allocations slows everything down.
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The scene's seed
+
+    Return value: The peak number of bytes allocated
+
+    Sample call: peak = measurePeakMemory(1000, 1)
+    '''
+    tracemalloc.start()
+    balls, paddle, width, height = makeScenario(count, seed)
+    for ball in balls:
+        ball.move(width)
+    pairs = SpatialHash().candidatePairs(balls)
+    for i, j in pairs:
+        balls[i].intersects(balls[j])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def compareToBaseline(results, baseline, tolerance):
+    '''
+    Compares each phase's median time against a baseline run
+
+    Parameters:
+        results (dictionary): The current benchmark results
+        baseline (dictionary): Results loaded from an earlier run
+        tolerance (float): How much slower a phase may get, as a fraction, before it is flagged
+
+    Return value: A list of regression descriptions (empty if nothing got slower)
+
+    Sample call: regressions = compareToBaseline(results, baseline, 0.1)
+    '''
+    regressions = []
+    previous = {scenario["balls"]: scenario for scenario in baseline["scenarios"]}
+    for scenario in results["scenarios"]:
+        old = previous.get(scenario["balls"])
+        if old is None:
+            continue
+        for name, stats in scenario["phases"].items():
+            if name not in old["phases"]:
+                continue
+            before = old["phases"][name]["p50"]
+            after = stats["p50"]
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append({"balls": scenario["balls"], "phase": name, \
+                                    "baselineP50": before, "currentP50": after, \
+                                    "change": after / before - 1})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game's physics, collisions and drawing.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000], \
+                        help="ball counts to run")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the generated scenes")
+    parser.add_argument("--steps", type=int, default=30, \
+                        help="steps timed per scene (scenes of 10,000 or more balls use a fifth of this)")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to FILE instead of the screen")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.10, \
+                        help="slowdown (as a fraction) allowed before a phase counts as a regression")
+    args = parser.parse_args()
+
+    pygame.init()
+    results = {"python": platform.python_version(), "pygame": pygame.version.ver, \
+               "machine": platform.machine(), "scenarios": []}
+    for count in args.counts:
+        steps = args.steps if count < 10000 else max(1, args.steps // 5)
+        results["scenarios"].append(runScenario(count, args.seed, steps))
+
+    exitCode = 0
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        results["regressions"] = compareToBaseline(results, baseline, args.tolerance)
+        for regression in results["regressions"]:
+            print("Regression: %d balls, %s p50 %.3f ms -> %.3f ms (%+.0f%%)" % \
+                  (regression["balls"], regression["phase"], regression["baselineP50"], \
+                   regression["currentP50"], regression["change"] * 100), file=sys.stderr)
+        if results["regressions"]:
+            exitCode = 1
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    sys.exit(exitCode)
@@ -0,0 +1,120 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Provides broad-phase collision helpers that narrow down which pairs of balls
+# need to be checked against each other before the exact (narrow-phase) intersection test is run
+
+def bruteForcePairs(balls):
+    '''
+    Lists every pair of balls exactly once, without any spatial filtering. This is the original
+    O(n^2) approach and is kept so it can be compared against the spatial hash.
+
+    Parameters:
+        balls (list): The Ball objects currently in play
+
+    Return value: A list of (i, j) index tuples with i < j
+
+    Sample call: pairs = bruteForcePairs(balls)
+    '''
+    pairs = []
+    for i in range(len(balls)):
+        for j in range(i + 1, len(balls)):
+            pairs.append((i, j))
+    return pairs
+
+class SpatialHash:
+    '''
+    A uniform grid that buckets balls by the cell their center falls in. Since a cell is at least as
+    wide as the largest ball, two balls can only touch if their cells are neighbors, so only those
+    buckets need to be compared.
+
+    Attributes:
+        cellSize (int/float): The width and height of one grid cell. If None, it is picked each frame
+        from the largest ball radius.
+
+    Methods:
+        __init__: Instantiates the SpatialHash object
+        candidatePairs: Returns each pair of balls that might be touching exactly once
+        getCellSize: Returns the cell size used for the given balls
+    '''
+    # Cells that are compared against a given cell. Only half of the 3x3 neighborhood is used so
+    # that each pair of neighboring cells is visited once.
+    __NEIGHBORS = ((1, -1), (1, 0), (1, 1), (0, 1))
+    # Constructor
+    def __init__(self, cellSize=None):
+        '''
+        Instantiates the SpatialHash object
+
+        Parameters:
+            self (object): The SpatialHash object itself
+            cellSize (int/float): A fixed cell size, or None to size the cells from the balls' radii
+
+        Return value: None
+
+        Sample call: grid = SpatialHash()
+        '''
+        self.__cellSize = cellSize
+    # Getters
+    def getCellSize(self, balls):
+        '''
+        Returns the cell size that is used to bucket the given balls
+
+        Parameters:
+            self (object): The SpatialHash object itself
+            balls (list): The Ball objects currently in play
+
+        Return value: The width and height of a grid cell
+
+        Sample call: size = grid.getCellSize(balls)
+        '''
+        if self.__cellSize is not None:
+            return self.__cellSize
+        largest = 1
+        for ball in balls:
+            if ball.getRadius() > largest:
+                largest = ball.getRadius()
+        # Two extra pixels cover the rounding done when the balls' rectangles are built
+        return 2 * largest + 2
+    def candidatePairs(self, balls, margin=0):
+        '''
+        Buckets every ball into the grid and returns the pairs of balls whose cells are the same
+        or next to each other. The exact intersection test still has to be run on each pair.
+
+        Parameters:
+            self (object): The SpatialHash object itself
+            balls (list): The Ball objects currently in play
+            margin (int/float): Extra width added to each cell, for example the distance two balls
+            can close in on each other during a frame when checking swept motion
+
+        Return value: A sorted list of (i, j) index tuples with i < j, each pair appearing once
+
+        Sample call: pairs = grid.candidatePairs(balls)
+        '''
+        cellSize = self.getCellSize(balls) + margin
+        cells = {}
+        for i in range(len(balls)):
+            x, y = balls[i].getLoc()
+            key = (int(x // cellSize), int(y // cellSize))
+            if key in cells:
+                cells[key].append(i)
+            else:
+                cells[key] = [i]
+
+        pairs = []
+        for (cellX, cellY), members in cells.items():
+            # Pairs of balls inside the same cell
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pairs.append((members[a], members[b]))
+            # Pairs made with balls from the neighboring cells
+            for offsetX, offsetY in self.__NEIGHBORS:
+                others = cells.get((cellX + offsetX, cellY + offsetY))
+                if others is None:
+                    continue
+                for i in members:
+                    for j in others:
+                        if i < j:
+                            pairs.append((i, j))
+                        else:
+                            pairs.append((j, i))
+        pairs.sort()
+        return pairs
@@ -0,0 +1,136 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Continuous collision detection helpers that find the moment during a frame at which
+# a moving box first touches a wall or another box, so fast balls cannot pass through things between frames
+
+import math
+
+def ballBox(ball):
+    '''
+    Returns the box covering a ball as (left, top, right, bottom), without the rounding that
+    pygame.Rect does
+
+    Parameters:
+        ball (object): A Ball object
+
+    Return value: A tuple of four floats
+
+    Sample call: box = ballBox(ball)
+    '''
+    x, y = ball.getLoc()
+    radius = ball.getRadius()
+    return (x - radius, y - radius, x + radius, y + radius)
+
+def rectBox(rect):
+    '''
+    Returns a pygame.Rect as a (left, top, right, bottom) tuple
+
+    Parameters:
+        rect (object): A pygame.Rect object
+
+    Return value: A tuple of four numbers
+
+    Sample call: box = rectBox(paddle.get_rect())
+    '''
+    return (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+
+def sweptBoxHit(moving, dx, dy, target):
+    '''
+    Finds when a box moving in a straight line first overlaps a box that is standing still. Boxes
+    that only share an edge do not count as overlapping, which matches Drawable.intersects.
+
+    Parameters:
+        moving (tuple): The moving box as (left, top, right, bottom) at the start of the motion
+        dx (float): How far the moving box travels horizontally
+        dy (float): How far the moving box travels vertically
+        target (tuple): The still box as (left, top, right, bottom)
+
+    Return value: None if the boxes do not start overlapping during the motion (including when they
+    already overlap at the start). Otherwise a tuple (t, normalX, normalY), where t is the share of the
+    motion (0 to 1) completed at first contact and the normal points out of the face of the target
+    that was hit.
+
+    Sample call: hit = sweptBoxHit(ballBox(ball), vx, vy, rectBox(paddle.get_rect()))
+    '''
+    left, top, right, bottom = moving
+    targetLeft, targetTop, targetRight, targetBottom = target
+    if dx > 0:
+        enterX = (targetLeft - right) / dx
+        exitX = (targetRight - left) / dx
+    elif dx < 0:
+        enterX = (targetRight - left) / dx
+        exitX = (targetLeft - right) / dx
+    elif right > targetLeft and left < targetRight:
+        enterX = -math.inf
+        exitX = math.inf
+    else:
+        return None
+    if dy > 0:
+        enterY = (targetTop - bottom) / dy
+        exitY = (targetBottom - top) / dy
+    elif dy < 0:
+        enterY = (targetBottom - top) / dy
+        exitY = (targetTop - bottom) / dy
+    elif bottom > targetTop and top < targetBottom:
+        enterY = -math.inf
+        exitY = math.inf
+    else:
+        return None
+
+    enter = max(enterX, enterY)
+    leave = min(exitX, exitY)
+    if enter >= leave or enter < 0 or enter > 1:
+        return None
+    if enterX > enterY:
+        return (enter, -1 if dx > 0 else 1, 0)
+    return (enter, 0, -1 if dy > 0 else 1)
+
+def sweptBallHit(first, second, duration):
+    '''
+    Finds when two moving balls first overlap, by moving the first ball relative to the second
+
+    Parameters:
+        first (object): A Ball object
+        second (object): Another Ball object
+        duration (float): How many frames of motion to check
+
+    Return value: The time (in frames, from 0 to duration) of first contact, or None if they do not
+    start touching in that time
+
+    Sample call: t = sweptBallHit(balls[0], balls[1], 1)
+    '''
+    dx = (first.getXSpeed() - second.getXSpeed()) * duration
+    dy = (first.getYSpeed() - second.getYSpeed()) * duration
+    hit = sweptBoxHit(ballBox(first), dx, dy, ballBox(second))
+    if hit is None:
+        return None
+    return hit[0] * duration
+
+def wallHitTime(position, speed, radius, low, high, duration):
+    '''
+    Finds when a ball moving along one axis reaches either end of the play area
+
+    Parameters:
+        position (float): The ball's center along the axis
+        speed (float): The ball's speed along the axis
+        radius (float): The ball's radius
+        low (float): The low edge of the play area along the axis, or None if it is open
+        high (float): The high edge of the play area along the axis, or None if it is open
+        duration (float): How many frames of motion to check
+
+    Return value: The time (in frames, from 0 to duration) the ball's edge reaches a wall it is moving
+    towards, or None if it does not reach one in that time
+
+    Sample call: t = wallHitTime(x, vx, radius, 0, width, 1)
+    '''
+    if speed < 0 and low is not None:
+        t = (low + radius - position) / speed
+    elif speed > 0 and high is not None:
+        t = (high - radius - position) / speed
+    else:
+        return None
+    # A ball that is already past the wall bounces straight away
+    t = max(t, 0)
+    if t > duration:
+        return None
+    return t
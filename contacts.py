@@ -0,0 +1,169 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Remembers which pairs of balls are touching from one tick to the next, so a collision
+# is handled once when two balls first touch instead of again on every tick they stay overlapped
+
+def pairKey(firstId, secondId):
+    '''
+    Returns the key for a pair of balls, which is the same whichever ball is named first
+
+    Parameters:
+        firstId (int): One ball's entity ID
+        secondId (int): The other ball's entity ID
+
+    Return value: A tuple of the two IDs, lowest first
+
+    Sample call: key = pairKey(ids[i], ids[j])
+    '''
+    return (firstId, secondId) if firstId < secondId else (secondId, firstId)
+
+class ContactCache:
+    '''
+    Keeps the pairs of balls that were touching at the end of the last tick, keyed by their entity
+    IDs, which stay the same while balls move around in the EntityStore and are never reused for a
+    different ball. Each pair found touching during a tick is passed to touch, which says whether the
+    contact has just begun or was already there. endTick then ends every contact that was not touched.
+
+    Attributes:
+        contacts (dictionary): The tick each current contact began, keyed by pair
+        touched (set): The pairs touched so far this tick
+        begun (int): Contacts begun so far
+        persisted (int): Ticks on which a contact carried on from the tick before
+        ended (int): Contacts ended so far
+
+    Methods:
+        __init__: Instantiates the ContactCache object
+        touch: Records that a pair is touching and returns whether the contact just began
+        endTick: Ends the contacts that were not touched this tick
+        isTouching: Returns whether a pair was touching at the end of the last tick
+        getContacts: Returns the contacts attribute
+        getCounts: Returns the begun, persisted and ended totals
+        getState: Copies the contacts and totals
+        setState: Puts back contacts and totals copied by getState
+    '''
+    __slots__ = ("__contacts", "__touched", "__begun", "__persisted", "__ended")
+    # Constructor
+    def __init__(self):
+        '''
+        Instantiates the ContactCache object with no contacts
+
+        Parameters:
+            self (object): The ContactCache object itself
+
+        Return value: None
+
+        Sample call: cache = ContactCache()
+        '''
+        self.__contacts = {}
+        self.__touched = set()
+        self.__begun = 0
+        self.__persisted = 0
+        self.__ended = 0
+    def touch(self, key, tick):
+        '''
+        Records that a pair of balls is touching during this tick
+
+        Parameters:
+            self (object): The ContactCache object itself
+            key (tuple): The pair's key from pairKey
+            tick (int): The current tick
+
+        Return value: True if the contact began this tick, False if it carries on from an earlier one
+        or was already touched this tick
+
+        Sample call: if cache.touch(pairKey(idA, idB), tick): collide(a, b)
+        '''
+        if key in self.__touched:
+            return False
+        self.__touched.add(key)
+        if key in self.__contacts:
+            self.__persisted += 1
+            return False
+        self.__contacts[key] = tick
+        self.__begun += 1
+        return True
+    def endTick(self):
+        '''
+        Ends every contact that was not touched during the tick, including those of balls that left play
+
+        Parameters:
+            self (object): The ContactCache object itself
+
+        Return value: A list of the keys of the contacts that ended
+
+        Sample call: ended = cache.endTick()
+        '''
+        touched = self.__touched
+        ended = [key for key in self.__contacts if key not in touched]
+        for key in ended:
+            del self.__contacts[key]
+        self.__ended += len(ended)
+        self.__touched = set()
+        return ended
+    # Getters
+    def isTouching(self, key):
+        '''
+        Returns whether a pair was touching at the end of the last tick
+
+        Parameters:
+            self (object): The ContactCache object itself
+            key (tuple): The pair's key from pairKey
+
+        Return value: A boolean
+
+        Sample call: if cache.isTouching(key): resolved.add(pair)
+        '''
+        return key in self.__contacts
+    def getContacts(self):
+        '''
+        Returns the current contacts
+
+        Parameters:
+            self (object): The ContactCache object itself
+
+        Return value: A dictionary of the tick each contact began, keyed by pair. It is the cache's
+        own dictionary, so it should not be changed.
+
+        Sample call: for (idA, idB), since in cache.getContacts().items(): print(idA, idB, since)
+        '''
+        return self.__contacts
+    def getCounts(self):
+        '''
+        Returns how many contacts have begun and ended, and how many ticks contacts persisted for
+
+        Parameters:
+            self (object): The ContactCache object itself
+
+        Return value: A tuple of (begun, persisted, ended)
+
+        Sample call: begun, persisted, ended = cache.getCounts()
+        '''
+        return (self.__begun, self.__persisted, self.__ended)
+    def getState(self):
+        '''
+        Copies the contacts and totals, for a World snapshot
+
+        Parameters:
+            self (object): The ContactCache object itself
+
+        Return value: A tuple of (contacts, begun, persisted, ended)
+
+        Sample call: state = cache.getState()
+        '''
+        return (tuple(self.__contacts.items()), self.__begun, self.__persisted, self.__ended)
+    # Setter
+    def setState(self, state):
+        '''
+        Puts back the contacts and totals copied by getState
+
+        Parameters:
+            self (object): The ContactCache object itself
+            state (tuple): A tuple returned by getState
+
+        Return value: None
+
+        Sample call: cache.setState(state)
+        '''
+        contacts, self.__begun, self.__persisted, self.__ended = state
+        self.__contacts = dict(contacts)
+        self.__touched = set()
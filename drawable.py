@@ -3,7 +3,6 @@
 # Program Description: To create a class that provides a template for drawing objects to
 # a pygame surface
 
-import pygame
 from abc import ABC, abstractmethod
 
 class Drawable(ABC):
@@ -18,6 +17,8 @@ class Drawable(ABC):
         x (int): The horizontal position at which the drawn object is to be displayed at
         y (int): The vertical postion at which the drawn object is to be displayed at
         visible (boolean): Whether the object to be drawn should be visible on the surface or not
+        bounds (tuple): The cached (left, top, right, bottom) edges of the object's rectangle, or None
+        when they have to be worked out again
         
     Methods:
         __init__: Instantiates the Drawable class
@@ -28,6 +29,8 @@ class Drawable(ABC):
         intersectSide: Checks if one object has collided with the left or right side of another object
         get_rect: An abstract method that requires the derived class to define how a rectangle can be
         formed to cover the area of the derived class's object
+        getBounds: Returns the edges of the object's rectangle as plain integers, without building a Rect
+        makeBounds: Works out the edges of the object's rectangle when the cached ones are out of date
         getLoc: A getter that returns the x and y attributes of Drawable
         isVisible: A getter that returns a boolean value that conveys whether the visibility of the object
         is on or off
@@ -35,7 +38,10 @@ class Drawable(ABC):
         setX: Allows the user to change the x coordinate of the object
         setY: Allows the user to change the y coordinate of the object
         setVisible: Allows the user to change the visibility of the object
+        clearBounds: Marks the cached bounds as out of date
     '''
+    # Fixed attribute slots instead of a per-object __dict__, since a game can hold many Drawables
+    __slots__ = ("__x", "__y", "__visible", "__bounds")
     # Constructor
     def __init__(self, x=0, y=0):
         '''
@@ -52,6 +58,7 @@ class Drawable(ABC):
         self.__x = x
         self.__y = y
         self.__visible = True
+        self.__bounds = None
     @abstractmethod
     def draw(self, surface):
         '''
@@ -80,12 +87,13 @@ class Drawable(ABC):
         
         Sample call: rect1.intersects(rect2)
         '''
-        rect1 = self.get_rect()
-        rect2 = other.get_rect()
-        if (rect1.x < rect2.x + rect2.width) and \
-           (rect1.x + rect1.width > rect2.x) and \
-           (rect1.y < rect2.y + rect2.height) and \
-           (rect1.height + rect1.y > rect2.y):
+        # Compares the cached edges instead of building two Rects on every call
+        left1, top1, right1, bottom1 = self.getBounds()
+        left2, top2, right2, bottom2 = other.getBounds()
+        if (left1 < right2) and \
+           (right1 > left2) and \
+           (top1 < bottom2) and \
+           (bottom1 > top2):
             return True
         return False
     def intersectSide(self, other):
@@ -100,11 +108,10 @@ class Drawable(ABC):
         
         Sample call: ball.intersectSide(paddle)
         '''
-        surface = pygame.display.get_surface()
-        rect1 = self.get_rect()
-        rect2 = other.get_rect()
-        if ((rect1.x + rect1.width == rect2.x) or (rect1.x == rect2.x + rect2.width)) and \
-           ((rect1.y + rect1.height >= rect2.y)):
+        left1, top1, right1, bottom1 = self.getBounds()
+        left2, top2, right2, bottom2 = other.getBounds()
+        if ((right1 == left2) or (left1 == right2)) and \
+           ((bottom1 >= top2)):
             return True
         return False
     # Getters
@@ -121,6 +128,37 @@ class Drawable(ABC):
         Sample call: N/A (abstract method)
         '''
         pass
+    def getBounds(self):
+        '''
+        Returns the left, top, right and bottom edges of the object's rectangle, the same numbers
+        get_rect would give. They are kept until the object moves or changes size.
+        
+        Parameters:
+            self (object): The instance of Drawable itself
+            
+        Return value: A tuple of four integers (left, top, right, bottom)
+        
+        Sample call: left, top, right, bottom = ball1.getBounds()
+        '''
+        bounds = self.__bounds
+        if bounds is None:
+            bounds = self.makeBounds()
+            self.__bounds = bounds
+        return bounds
+    def makeBounds(self):
+        '''
+        Works out the edges of the object's rectangle from get_rect. Derived classes can override
+        this to work them out without building a Rect.
+        
+        Parameters:
+            self (object): The instance of Drawable itself
+            
+        Return value: A tuple of four integers (left, top, right, bottom)
+        
+        Sample call: bounds = drawable1.makeBounds()
+        '''
+        rect = self.get_rect()
+        return (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
     def getLoc(self):
         '''
         Returns horizontal and vertical positions of an object
@@ -161,6 +199,7 @@ class Drawable(ABC):
         '''
         self.__x = x
         self.__y = y
+        self.__bounds = None
     def setX(self, x):
         '''
         Change the horizontal position of the object
@@ -174,6 +213,7 @@ class Drawable(ABC):
         Sample call: ball1.setX(2)
         '''
         self.__x = x
+        self.__bounds = None
     def setY(self, y):
         '''
         Change the vertical position of the object
@@ -187,6 +227,7 @@ class Drawable(ABC):
         Sample call: ball1.setY(2)
         '''
         self.__y = y
+        self.__bounds = None
     def setVisible(self, visible):
         '''
         Change the visibility of the object
@@ -202,4 +243,17 @@ class Drawable(ABC):
         if visible == True:
             self.__visible = True
         else:
-            self.__visible = False
\ No newline at end of file
+            self.__visible = False
+    def clearBounds(self):
+        '''
+        Marks the cached bounds as out of date, for when something other than the position changes
+        the size of the object's rectangle
+        
+        Parameters:
+            self (object): The object itself
+            
+        Return value: None
+        
+        Sample call: text1.clearBounds()
+        '''
+        self.__bounds = None
\ No newline at end of file
@@ -0,0 +1,375 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Keeps the balls in play in a store where each one has an ID that stays valid until it
+# is removed, removals are put off until the end of the tick and cost O(1), and removed balls are reused
+
+from ball import Ball
+
+# The low bits of an entity ID pick its slot and the high bits count how many times that slot was reused
+INDEX_BITS = 20
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+class EntityStore:
+    '''
+    Holds entities in a packed list that can be looped over directly, and hands out an ID for each.
+    An ID stops being valid once its entity is removed, even if the entity's slot is later given
+    to a new one, since each slot's generation is counted. Removals requested during a tick are
+    applied by flush, which moves the last entity into the removed one's place.
+
+    Attributes:
+        entities (list): The live entities, packed together. The first entity added stays first
+        until it is removed.
+        ids (list): The ID of each entity in entities
+        positions (list): For each slot, the entity's position in entities, or -1 if the slot is free
+        generations (list): For each slot, how many times it has been freed
+        freeSlots (list): Slots that can be handed out again
+        pending (list): IDs waiting to be removed at the next flush
+        release (function): Called with each entity that flush removes, or None
+
+    Methods:
+        __init__: Instantiates the EntityStore object
+        add: Adds an entity and returns its ID
+        remove: Marks an entity to be removed at the next flush
+        flush: Removes every marked entity
+        get: Returns the entity with an ID, if it is still alive
+        getPosition: Returns where an entity is in the packed list
+        isAlive: Returns whether an ID still refers to an entity
+        getEntities: Returns the packed list of entities
+        getIds: Returns the IDs in the same order as getEntities
+        getState: Copies the IDs and slot bookkeeping
+        setState: Puts the IDs and slot bookkeeping back
+    '''
+    # Constructor
+    def __init__(self, release=None):
+        '''
+        Instantiates the EntityStore object
+
+        Parameters:
+            self (object): The EntityStore object itself
+            release (function): Called with each entity that flush removes, for example to hand it
+            back to a pool, or None
+
+        Return value: None
+
+        Sample call: store = EntityStore(pool.release)
+        '''
+        self.__entities = []
+        self.__ids = []
+        self.__positions = []
+        self.__generations = []
+        self.__freeSlots = []
+        self.__pending = []
+        self.__release = release
+    def __len__(self):
+        '''
+        Returns the number of live entities, counting those marked to be removed
+
+        Parameters:
+            self (object): The EntityStore object itself
+
+        Return value: An integer count
+
+        Sample call: count = len(store)
+        '''
+        return len(self.__entities)
+    def add(self, entity):
+        '''
+        Adds an entity to the end of the packed list
+
+        Parameters:
+            self (object): The EntityStore object itself
+            entity (object): The entity to add
+
+        Return value: The entity's ID
+
+        Sample call: goldId = store.add(ball)
+        '''
+        if self.__freeSlots:
+            slot = self.__freeSlots.pop()
+        else:
+            slot = len(self.__positions)
+            self.__positions.append(-1)
+            self.__generations.append(0)
+        entityId = (self.__generations[slot] << INDEX_BITS) | slot
+        self.__positions[slot] = len(self.__entities)
+        self.__entities.append(entity)
+        self.__ids.append(entityId)
+        return entityId
+    def remove(self, entityId):
+        '''
+        Marks an entity to be removed at the next flush. Until then it stays in the packed list, so
+        positions in the list do not shift while the tick is looping over it.
+
+        Parameters:
+            self (object): The EntityStore object itself
+            entityId (int): The entity's ID
+
+        Return value: None
+
+        Sample call: store.remove(ids[i])
+        '''
+        if self.isAlive(entityId):
+            self.__pending.append(entityId)
+    def flush(self):
+        '''
+        Removes every entity marked since the last flush. Each one is replaced by the last entity in
+        the packed list, so a removal costs the same however many entities there are.
+
+        Parameters:
+            self (object): The EntityStore object itself
+
+        Return value: The number of entities removed
+
+        Sample call: store.flush()
+        '''
+        removed = 0
+        entities = self.__entities
+        ids = self.__ids
+        positions = self.__positions
+        for entityId in self.__pending:
+            # An entity marked twice is only removed once
+            if not self.isAlive(entityId):
+                continue
+            slot = entityId & INDEX_MASK
+            position = positions[slot]
+            entity = entities[position]
+            lastPosition = len(entities) - 1
+            if position != lastPosition:
+                entities[position] = entities[lastPosition]
+                ids[position] = ids[lastPosition]
+                positions[ids[position] & INDEX_MASK] = position
+            entities.pop()
+            ids.pop()
+            positions[slot] = -1
+            self.__generations[slot] += 1
+            self.__freeSlots.append(slot)
+            removed += 1
+            if self.__release is not None:
+                self.__release(entity)
+        self.__pending.clear()
+        return removed
+    # Getters
+    def get(self, entityId):
+        '''
+        Returns the entity an ID refers to
+
+        Parameters:
+            self (object): The EntityStore object itself
+            entityId (int): The entity's ID
+
+        Return value: The entity, or None if it has been removed
+
+        Sample call: gold = store.get(goldId)
+        '''
+        if not self.isAlive(entityId):
+            return None
+        return self.__entities[self.__positions[entityId & INDEX_MASK]]
+    def getPosition(self, entityId):
+        '''
+        Returns where an entity is in the packed list
+
+        Parameters:
+            self (object): The EntityStore object itself
+            entityId (int): The entity's ID
+
+        Return value: The entity's index in getEntities, or -1 if it has been removed
+
+        Sample call: ids.sort(key=store.getPosition)
+        '''
+        if not self.isAlive(entityId):
+            return -1
+        return self.__positions[entityId & INDEX_MASK]
+    def isAlive(self, entityId):
+        '''
+        Returns whether an ID still refers to an entity in the store
+
+        Parameters:
+            self (object): The EntityStore object itself
+            entityId (int): The ID to check
+
+        Return value: Boolean of whether the entity has not been removed yet
+
+        Sample call: if store.isAlive(goldId): ...
+        '''
+        slot = entityId & INDEX_MASK
+        return slot < len(self.__positions) and self.__positions[slot] != -1 and \
+               self.__generations[slot] == entityId >> INDEX_BITS
+    def getEntities(self):
+        '''
+        Returns the packed list of live entities. It is the store's own list, so it should not be
+        changed by the caller.
+
+        Parameters:
+            self (object): The EntityStore object itself
+
+        Return value: A list of entities
+
+        Sample call: for ball in store.getEntities(): ball.draw(surface)
+        '''
+        return self.__entities
+    def getIds(self):
+        '''
+        Returns the IDs of the live entities, in the same order as getEntities. It is the store's
+        own list, so it should not be changed by the caller.
+
+        Parameters:
+            self (object): The EntityStore object itself
+
+        Return value: A list of integer IDs
+
+        Sample call: ids = store.getIds()
+        '''
+        return self.__ids
+    def getState(self):
+        '''
+        Copies the store's bookkeeping: the IDs, the slot positions and generations, the free slots
+        and any removals waiting for a flush. The entities themselves are not copied, since what
+        their state holds is up to them.
+
+        Parameters:
+            self (object): The EntityStore object itself
+
+        Return value: A tuple that can be passed to setState along with the entities
+
+        Sample call: state = store.getState()
+        '''
+        return (tuple(self.__ids), tuple(self.__positions), tuple(self.__generations), \
+                tuple(self.__freeSlots), tuple(self.__pending))
+    # Setters
+    def setState(self, state, entities):
+        '''
+        Puts the store's bookkeeping back to a state returned by getState. Every ID that was alive
+        then is alive again and refers to the entity at the same position in entities.
+
+        Parameters:
+            self (object): The EntityStore object itself
+            state (tuple): A tuple returned by getState
+            entities (list): The entities to hold, in the order getEntities returned them when the
+            state was taken
+
+        Return value: None
+
+        Sample call: store.setState(state, balls)
+        '''
+        ids, positions, generations, freeSlots, pending = state
+        if len(entities) != len(ids):
+            raise ValueError("the store held %d entities, not %d" % (len(ids), len(entities)))
+        self.__entities = list(entities)
+        self.__ids = list(ids)
+        self.__positions = list(positions)
+        self.__generations = list(generations)
+        self.__freeSlots = list(freeSlots)
+        self.__pending = list(pending)
+
+class BallPool:
+    '''
+    Keeps balls that left play so they can be reset and handed out again instead of building a new
+    Ball every time one is spawned
+
+    Attributes:
+        free (list): Balls waiting to be reused
+        created (int): The number of Ball objects the pool has built
+
+    Methods:
+        __init__: Instantiates the BallPool object
+        acquire: Returns a ball set up with the given values
+        release: Takes back a ball that left play
+        reuse: Returns a ball put back into a saved state
+        getFreeCount: Returns the number of balls waiting to be reused
+        getCreated: Returns the created attribute
+    '''
+    # Constructor
+    def __init__(self):
+        '''
+        Instantiates an empty BallPool object
+
+        Parameters:
+            self (object): The BallPool object itself
+
+        Return value: None
+
+        Sample call: pool = BallPool()
+        '''
+        self.__free = []
+        self.__created = 0
+    def acquire(self, x, y, radius, color, rng=None):
+        '''
+        Returns a ball set up exactly as Ball(x, y, radius, color, rng) would be, reusing a released
+        ball when there is one
+
+        Parameters:
+            self (object): The BallPool object itself
+            x (int/float): Horizontal position of the ball's center
+            y (int/float): Vertical position of the ball's center
+            radius (int/float): The ball's radius
+            color (tuple): RGB tuple for the ball's color
+            rng (object): The random.Random object the ball's direction is drawn from
+
+        Return value: A Ball object
+
+        Sample call: ball = pool.acquire(400, 300, 18, BLACK, rng)
+        '''
+        if self.__free:
+            ball = self.__free.pop()
+            ball.reset(x, y, radius, color, rng)
+            return ball
+        self.__created += 1
+        return Ball(x, y, radius, color, rng)
+    def release(self, ball):
+        '''
+        Takes back a ball that left play so a later acquire can reuse it
+
+        Parameters:
+            self (object): The BallPool object itself
+            ball (object): The Ball that is no longer in play
+
+        Return value: None
+
+        Sample call: pool.release(ball)
+        '''
+        self.__free.append(ball)
+    def reuse(self, state):
+        '''
+        Returns a ball put into a state from Ball.getState, reusing a released ball when there is one.
+        Unlike acquire, nothing is drawn from a random number generator.
+
+        Parameters:
+            self (object): The BallPool object itself
+            state (tuple): A tuple returned by Ball.getState
+
+        Return value: A Ball object
+
+        Sample call: ball = pool.reuse(state)
+        '''
+        if self.__free:
+            ball = self.__free.pop()
+        else:
+            self.__created += 1
+            ball = Ball()
+        ball.setState(state)
+        return ball
+    # Getters
+    def getFreeCount(self):
+        '''
+        Returns the number of balls waiting to be reused
+
+        Parameters:
+            self (object): The BallPool object itself
+
+        Return value: An integer count
+
+        Sample call: spare = pool.getFreeCount()
+        '''
+        return len(self.__free)
+    def getCreated(self):
+        '''
+        Returns how many Ball objects the pool has built, as opposed to reused
+
+        Parameters:
+            self (object): The BallPool object itself
+
+        Return value: An integer count
+
+        Sample call: built = pool.getCreated()
+        '''
+        return self.__created
\ No newline at end of file
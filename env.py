@@ -0,0 +1,446 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Environments for training and testing automated paddle controllers, one that wraps a
+# single World and one that plays many games at once in NumPy arrays, resetting each game when it ends
+
+import random, time
+import numpy as np
+from world import World, GREEN
+
+# The values given for each ball slot in an observation: x, y, xSpeed, ySpeed, green, gold, in play
+BALL_FEATURES = 7
+
+class PaddleEnv:
+    '''
+    One game of the World behind a reset/step interface. An action is the paddle's horizontal
+    center for the next tick. The reward is the change in score, plus winReward on the tick the
+    game is won or loseReward on the tick it is lost, and the game is done once it is won or lost.
+
+    Observations are flat float32 arrays: the paddle's position over the width, then BALL_FEATURES
+    values for each of maxBalls ball slots in the World's ball order. Positions are divided by the
+    play area's size, and empty slots are all zeros.
+
+    Attributes:
+        width (int): The width of the play area
+        height (int): The height of the play area
+        collisionMode (string): The World's collision mode
+        winReward (float): Added to the reward on the tick the game is won
+        loseReward (float): Added to the reward on the tick the game is lost
+        world (object): The World being played
+        maxBalls (int): The number of ball slots in an observation
+
+    Methods:
+        __init__: Instantiates the PaddleEnv object
+        reset: Starts a new game and returns its first observation
+        step: Plays one tick and returns the observation, reward, done flag and info
+        observe: Returns the observation of the current game
+        getWorld: Returns the world attribute
+    '''
+    # Constructor
+    def __init__(self, width=800, height=600, collisionMode="discrete", winReward=10.0, loseReward=-10.0):
+        '''
+        Instantiates the PaddleEnv object. reset must be called before the first step.
+
+        Parameters:
+            self (object): The PaddleEnv object itself
+            width (int): The width of the play area
+            height (int): The height of the play area
+            collisionMode (string): The World's collision mode, "discrete" or "swept"
+            winReward (float): Added to the reward on the tick the game is won
+            loseReward (float): Added to the reward on the tick the game is lost
+
+        Return value: None
+
+        Sample call: env = PaddleEnv()
+        '''
+        self.__width = width
+        self.__height = height
+        self.__collisionMode = collisionMode
+        self.__winReward = winReward
+        self.__loseReward = loseReward
+        self.__world = None
+        self.__maxBalls = World(width, height).getRules()["maxBalls"]
+    def reset(self, seed=None):
+        '''
+        Starts a new game
+
+        Parameters:
+            self (object): The PaddleEnv object itself
+            seed (int): The World's seed, or None for a random game
+
+        Return value: The first observation, a float32 array
+
+        Sample call: observation = env.reset(1234)
+        '''
+        self.__world = World(self.__width, self.__height, seed=seed, collisionMode=self.__collisionMode)
+        return self.observe()
+    def step(self, action):
+        '''
+        Plays one tick with the paddle centered on the action
+
+        Parameters:
+            self (object): The PaddleEnv object itself
+            action (float): The paddle's horizontal center
+
+        Return value: A tuple of (observation, reward, done, info), where info holds the score and
+        whether the game was won or lost
+
+        Sample call: observation, reward, done, info = env.step(400)
+        '''
+        world = self.__world
+        score = world.getScore()
+        world.step(float(action))
+        reward = world.getScore() - score
+        if world.isWon():
+            reward += self.__winReward
+        if world.isLost():
+            reward += self.__loseReward
+        done = world.isWon() or world.isLost()
+        info = {"score": world.getScore(), "won": world.isWon(), "lost": world.isLost(), "ticks": world.getTick()}
+        return self.observe(), reward, done, info
+    def observe(self):
+        '''
+        Returns the observation of the current game
+
+        Parameters:
+            self (object): The PaddleEnv object itself
+
+        Return value: A float32 array of 1 + maxBalls * BALL_FEATURES values
+
+        Sample call: observation = env.observe()
+        '''
+        world = self.__world
+        observation = np.zeros(1 + self.__maxBalls * BALL_FEATURES, dtype=np.float32)
+        observation[0] = world.getPaddle().getLoc()[0] / self.__width
+        goldId = world.getGoldId()
+        for slot, (entityId, ball) in enumerate(zip(world.getBallIds(), world.getBalls())):
+            x, y = ball.getLoc()
+            start = 1 + slot * BALL_FEATURES
+            observation[start:start + BALL_FEATURES] = (x / self.__width, y / self.__height, ball.getXSpeed(), \
+                                                        ball.getYSpeed(), ball.getColor() == GREEN, \
+                                                        entityId == goldId, 1)
+        return observation
+    # Getter
+    def getWorld(self):
+        '''
+        Returns the World being played, for drawing it or looking at more than the observation shows
+
+        Parameters:
+            self (object): The PaddleEnv object itself
+
+        Return value: A World object
+
+        Sample call: env.getWorld().getPaddle().draw(surface)
+        '''
+        return self.__world
+
+class VecEnv:
+    '''
+    Plays count games at once. Every ball of every game lives in (count, maxBalls) NumPy arrays and
+    each tick applies the discrete rules of World.step to all games together, so the games stay in
+    lockstep. Only the rare events that need the World's random number generator or its ball order,
+    spawning a ball and removing balls that fell, are handled game by game.
+
+    The rules match World.step in discrete mode exactly: every contact check in a tick is made
+    before any ball moves, speed flips and paddle boosts commute, and the score change from a tick's
+    contacts is the number of balls they turn green, so the whole tick can be done at once. Games
+    reset themselves when they end: the k-th game started gets the seed seed + k, the same game a
+    PaddleEnv reset with that seed plays.
+
+    Attributes:
+        count (int): The number of games
+        width (int): The width of the play area
+        height (int): The height of the play area
+        rules (dictionary): The World's rule settings
+        winReward (float): Added to the reward on the tick a game is won
+        loseReward (float): Added to the reward on the tick a game is lost
+        x, y, xSpeed, ySpeed, radius (array): Float arrays of each ball's state, packed in the World's order
+        green, gold, alive (array): Boolean arrays of each ball's flags
+        balls (array): The number of balls in each game
+        paddleX (array): Where each game's paddle was last placed
+        score (array): Each game's score
+        ticks (array): The ticks each game has played
+        rngs (list): Each game's random.Random object
+        seed (int): The seed of the first game
+        started (int): The number of games started so far
+        episodes (int): The number of games finished so far
+
+    Methods:
+        __init__: Instantiates the VecEnv object
+        reset: Starts every game again and returns the observations
+        step: Plays one tick of every game
+        observe: Returns every game's observation
+        getEpisodeCount: Returns the episodes attribute
+    '''
+    # Constructor
+    def __init__(self, count, width=800, height=600, seed=0, winReward=10.0, loseReward=-10.0):
+        '''
+        Instantiates the VecEnv object with every game started
+
+        Parameters:
+            self (object): The VecEnv object itself
+            count (int): The number of games to play at once
+            width (int): The width of the play area
+            height (int): The height of the play area
+            seed (int): The seed of the first game. Later games count up from it.
+            winReward (float): Added to the reward on the tick a game is won
+            loseReward (float): Added to the reward on the tick a game is lost
+
+        Return value: None
+
+        Sample call: envs = VecEnv(1024, seed=0)
+        '''
+        self.__count = count
+        self.__width = width
+        self.__height = height
+        self.__rules = World(width, height).getRules()
+        self.__winReward = winReward
+        self.__loseReward = loseReward
+        shape = (count, self.__rules["maxBalls"])
+        self.__x = np.zeros(shape)
+        self.__y = np.zeros(shape)
+        self.__xSpeed = np.zeros(shape)
+        self.__ySpeed = np.zeros(shape)
+        self.__radius = np.zeros(shape)
+        self.__green = np.zeros(shape, dtype=bool)
+        self.__gold = np.zeros(shape, dtype=bool)
+        self.__alive = np.zeros(shape, dtype=bool)
+        self.__balls = np.zeros(count, dtype=np.int64)
+        self.__paddleX = np.zeros(count)
+        self.__score = np.zeros(count, dtype=np.int64)
+        self.__ticks = np.zeros(count, dtype=np.int64)
+        self.__rngs = [None] * count
+        self.__fields = (self.__x, self.__y, self.__xSpeed, self.__ySpeed, self.__radius, self.__green, \
+                         self.__gold, self.__alive)
+        # Only pairs with the lower slot first are tested, as the World does
+        self.__upper = np.triu(np.ones((shape[1], shape[1]), dtype=bool), 1)
+        self.__seed = seed
+        self.__started = 0
+        self.__episodes = 0
+        self.reset()
+    def reset(self):
+        '''
+        Starts every game again with the next seeds
+
+        Parameters:
+            self (object): The VecEnv object itself
+
+        Return value: The observations, a float32 array of shape (count, 1 + maxBalls * BALL_FEATURES)
+
+        Sample call: observations = envs.reset()
+        '''
+        for game in range(self.__count):
+            self.__startGame(game)
+        return self.observe()
+    def __startGame(self, game):
+        '''
+        Sets one game up the way the World constructor does: a gold ball in the middle, moving in a
+        direction drawn from a generator seeded with the game's seed
+
+        Parameters:
+            self (object): The VecEnv object itself
+            game (int): The game to start
+
+        Return value: None
+        '''
+        for field in self.__fields:
+            field[game] = 0
+        self.__rngs[game] = random.Random(self.__seed + self.__started)
+        self.__started += 1
+        self.__balls[game] = 0
+        self.__paddleX[game] = self.__width/2
+        self.__score[game] = 0
+        self.__ticks[game] = 0
+        self.__spawn(game, self.__rules["goldRadius"], True)
+    def __spawn(self, game, radius, gold):
+        '''
+        Adds a ball to the end of a game's balls in the middle of the play area, drawing its direction
+        from the game's generator exactly as Ball does
+
+        Parameters:
+            self (object): The VecEnv object itself
+            game (int): The game to add the ball to
+            radius (int/float): The ball's radius
+            gold (boolean): Whether it is the gold ball
+
+        Return value: None
+        '''
+        slot = self.__balls[game]
+        xSpeed = self.__rngs[game].randint(-1, 1) * 2
+        if xSpeed == 0:
+            xSpeed += 1
+        self.__x[game, slot] = self.__width/2
+        self.__y[game, slot] = self.__height/2
+        self.__xSpeed[game, slot] = xSpeed
+        self.__ySpeed[game, slot] = 2
+        self.__radius[game, slot] = radius
+        self.__green[game, slot] = False
+        self.__gold[game, slot] = gold
+        self.__alive[game, slot] = True
+        self.__balls[game] += 1
+    def step(self, actions):
+        '''
+        Plays one tick of every game. Games that end are started again straight away, so the
+        observation returned for them is the first one of their next game.
+
+        Parameters:
+            self (object): The VecEnv object itself
+            actions (array): The paddle's horizontal center for each game
+
+        Return value: A tuple of (observations, rewards, dones, info). rewards and dones are arrays with
+        one value per game, and info holds arrays of the score, won and lost flags and ticks each game
+        had at the end of this tick, before any reset.
+
+        Sample call: observations, rewards, dones, info = envs.step(np.full(1024, 400.0))
+        '''
+        rules = self.__rules
+        width = self.__width
+        height = self.__height
+        x, y, xSpeed, ySpeed, radius = self.__x, self.__y, self.__xSpeed, self.__ySpeed, self.__radius
+        green, gold, alive = self.__green, self.__gold, self.__alive
+        before = self.__score.copy()
+        actions = np.asarray(actions, dtype=np.float64)
+        self.__paddleX[:] = actions
+
+        # The paddle's rectangle, rounded toward zero as pygame.Rect does
+        paddleLeft = np.trunc(actions - 100)[:, None]
+        paddleTop = height - 40
+        paddleRight = paddleLeft + 200
+        paddleBottom = paddleTop + 20
+        left = np.trunc(x - radius)
+        top = np.trunc(y - radius)
+        size = np.trunc(2 * radius)
+        right = left + size
+        bottom = top + size
+
+        # Hitting the left or right side of the paddle loses the game
+        lost = np.any(alive & ((right == paddleLeft) | (left == paddleRight)) & (bottom >= paddleTop), axis=1)
+        hitPaddle = alive & (left < paddleRight) & (right > paddleLeft) & (top < paddleBottom) & (bottom > paddleTop)
+        slow = (ySpeed < rules["speedCap"]) & (ySpeed > -rules["speedCap"])
+        bounce = rules["bounceMultiplier"]
+        ySpeed[:] = np.where(hitPaddle, np.where(slow, ySpeed * -bounce, ySpeed * -1), ySpeed)
+        xSpeed[:] = np.where(hitPaddle & slow, xSpeed * bounce, xSpeed)
+        # Balls spawned this tick neither collide nor move until the next one
+        moving = alive.copy()
+        for game in np.flatnonzero(np.any(hitPaddle & gold, axis=1) & (self.__balls < rules["maxBalls"])):
+            self.__spawn(game, rules["smallRadius"], False)
+
+        # Every pair of balls whose rectangles overlap, with each ball checked before anything moves
+        touching = (left[:, :, None] < right[:, None, :]) & (right[:, :, None] > left[:, None, :]) & \
+                   (top[:, :, None] < bottom[:, None, :]) & (bottom[:, :, None] > top[:, None, :]) & \
+                   moving[:, :, None] & moving[:, None, :] & self.__upper
+        if touching.any():
+            contacts = touching.sum(axis=2) + touching.sum(axis=1)
+            xSpeed[contacts % 2 == 1] *= -1
+            touched = contacts > 0
+            self.__score += np.count_nonzero(touched & ~green, axis=1)
+            green |= touched
+
+        # Moves and bounces every ball off the sides and top, as Ball.move does
+        x += xSpeed * moving
+        y += ySpeed * moving
+        xSpeed[moving & ((x <= radius) | (x + radius >= width))] *= -1
+        ySpeed[moving & (y <= radius)] *= -1
+        dropped = moving & (y + radius >= height)
+        if dropped.any():
+            self.__score -= np.count_nonzero(dropped & green, axis=1)
+            lost |= np.any(dropped & gold, axis=1)
+            for game in np.flatnonzero(np.any(dropped, axis=1)):
+                self.__removeDropped(game, np.flatnonzero(dropped[game]))
+
+        score = self.__score
+        lost |= score <= -1
+        won = (score >= rules["winScore"]) & (score > -1)
+        self.__ticks += 1
+        rewards = (score - before) + self.__winReward * won + self.__loseReward * lost
+        dones = won | lost
+        info = {"score": score.copy(), "won": won, "lost": lost, "ticks": self.__ticks.copy()}
+        for game in np.flatnonzero(dones):
+            self.__episodes += 1
+            self.__startGame(game)
+        return self.observe(), rewards, dones, info
+    def __removeDropped(self, game, slots):
+        '''
+        Removes the balls that fell out of one game in the same order EntityStore.flush does, moving
+        the last ball into each removed ball's place, so the ball order keeps matching the World's
+
+        Parameters:
+            self (object): The VecEnv object itself
+            game (int): The game to remove balls from
+            slots (array): The slots of the balls that fell, in increasing order
+
+        Return value: None
+        '''
+        # Which of the tick's balls sits in each slot, as the slots shuffle
+        owners = list(range(self.__balls[game]))
+        for removed in slots:
+            position = owners.index(removed)
+            last = len(owners) - 1
+            for field in self.__fields:
+                field[game, position] = field[game, last]
+                field[game, last] = 0
+            owners[position] = owners[last]
+            owners.pop()
+        self.__balls[game] = len(owners)
+    def observe(self):
+        '''
+        Returns every game's observation, laid out as PaddleEnv.observe lays out one
+
+        Parameters:
+            self (object): The VecEnv object itself
+
+        Return value: A float32 array of shape (count, 1 + maxBalls * BALL_FEATURES)
+
+        Sample call: observations = envs.observe()
+        '''
+        alive = self.__alive
+        features = np.stack((self.__x / self.__width, self.__y / self.__height, self.__xSpeed, self.__ySpeed, \
+                             self.__green, self.__gold, alive), axis=2) * alive[:, :, None]
+        paddle = (self.__paddleX / self.__width)[:, None]
+        return np.concatenate((paddle, features.reshape(self.__count, -1)), axis=1).astype(np.float32)
+    # Getter
+    def getEpisodeCount(self):
+        '''
+        Returns the number of games that have ended so far
+
+        Parameters:
+            self (object): The VecEnv object itself
+
+        Return value: An integer count
+
+        Sample call: finished = envs.getEpisodeCount()
+        '''
+        return self.__episodes
+
+if __name__ == "__main__":
+    # Checks that the batched games match single Worlds tick for tick, then measures the step rate
+    checkGames = 8
+    envs = VecEnv(checkGames, seed=100)
+    singles = [PaddleEnv() for _ in range(checkGames)]
+    observations = [single.reset(100 + game) for game, single in enumerate(singles)]
+    started = checkGames
+    rng = np.random.default_rng(0)
+    mismatches = 0
+    for tick in range(20000):
+        # Keeps each paddle near its gold ball so the games last and spawn balls
+        batched = envs.observe()
+        actions = batched[:, 1] * 800 + rng.normal(0, 40, checkGames)
+        batched, rewards, dones, info = envs.step(actions)
+        for game, single in enumerate(singles):
+            observation, reward, done, singleInfo = single.step(actions[game])
+            if done:
+                observation = single.reset(100 + started)
+                started += 1
+            if reward != rewards[game] or done != dones[game] or not np.array_equal(observation, batched[game]):
+                mismatches += 1
+    print("Games finished:", envs.getEpisodeCount(), "Ticks with a mismatch:", mismatches)
+
+    for count in (1, 64, 1024, 8192):
+        envs = VecEnv(count)
+        actions = np.full(count, 400.0)
+        steps = max(200, 400000 // count)
+        start = time.perf_counter()
+        for _ in range(steps):
+            envs.step(actions)
+        elapsed = time.perf_counter() - start
+        print("Games:", count, "Environment steps per second:", round(count * steps / elapsed))
\ No newline at end of file
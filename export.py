@@ -0,0 +1,318 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Replays a recorded game without a window and exports every frame, drawing each one
+# straight into shared memory and letting a pool of processes write it out as a PNG or to a raw RGB stream
+
+import os
+# Draws to offscreen surfaces without opening a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse, multiprocessing, struct, time, zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import pygame
+from simulation import loadInputLog
+from sprites import SpriteCache, drawBalls
+from text import CounterText, Text
+from world import GREEN
+
+# The worker process's view of the shared frame slots, set up once by attachWorker
+_workerState = {}
+
+def writePng(path, pixels, width, height, level=1):
+    '''
+    Writes RGB pixels to a PNG file. Each row is fed to the compressor straight from the pixel
+    buffer, so the frame is never copied. The fast compression levels cost a little file size but
+    encode several times faster than pygame.image.save.
+
+    Parameters:
+        path (string): The file to write
+        pixels (object): A buffer of width * height * 3 bytes, row by row
+        width (int): The width of the image
+        height (int): The height of the image
+        level (int): The zlib compression level, from 0 (none) to 9 (smallest)
+
+    Return value: None
+
+    Sample call: writePng("frame.png", pixels, 800, 600)
+    '''
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    stride = width * 3
+    rows = memoryview(pixels).cast("B")
+    compressor = zlib.compressobj(level)
+    parts = []
+    for y in range(height):
+        # Each row starts with its filter type, and 0 means the row is stored unfiltered
+        parts.append(compressor.compress(b"\x00"))
+        parts.append(compressor.compress(rows[y * stride:(y + 1) * stride]))
+    parts.append(compressor.flush())
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", b"".join(parts)))
+        file.write(chunk(b"IEND", b""))
+
+def attachWorker(name, width, height, slotCount, path, raw, level=1):
+    '''
+    Runs once in each worker process: attaches to the shared frame slots and, for a raw stream,
+    opens the output file
+
+    Parameters:
+        name (string): The name of the shared memory block
+        width (int): The width of a frame
+        height (int): The height of a frame
+        slotCount (int): The number of frame slots in the block
+        path (string): The output directory for PNGs or the output file for a raw stream
+        raw (boolean): Whether frames go to a raw RGB stream instead of PNG files
+        level (int): The zlib compression level for PNG files
+
+    Return value: None
+
+    Sample call: ProcessPoolExecutor(initializer=attachWorker, initargs=(...))
+    '''
+    memory = shared_memory.SharedMemory(name=name)
+    frameSize = width * height * 3
+    _workerState["memory"] = memory
+    _workerState["slots"] = [memory.buf[slot * frameSize:(slot + 1) * frameSize] for slot in range(slotCount)]
+    _workerState["size"] = (width, height)
+    _workerState["path"] = path
+    _workerState["file"] = os.open(path, os.O_WRONLY) if raw else None
+    _workerState["level"] = level
+
+def encodeFrame(slot, frameNumber):
+    '''
+    Runs in a worker process: writes the frame held in a slot. A raw frame is written at its own
+    offset in the stream, so workers can finish in any order.
+
+    Parameters:
+        slot (int): The slot the frame was drawn into
+        frameNumber (int): The frame's position in the export
+
+    Return value: The slot, so the caller knows it can be drawn into again
+
+    Sample call: pool.submit(encodeFrame, 0, 120)
+    '''
+    pixels = _workerState["slots"][slot]
+    if _workerState["file"] is not None:
+        os.pwrite(_workerState["file"], pixels, frameNumber * len(pixels))
+    else:
+        width, height = _workerState["size"]
+        writePng(os.path.join(_workerState["path"], "frame_%06d.png" % frameNumber), pixels, width, height, \
+                 _workerState["level"])
+    return slot
+
+class FrameExporter:
+    '''
+    Hands out offscreen surfaces whose pixels live in shared memory, and has a process pool write
+    each finished frame out without copying it. There are a fixed number of slots, so when every
+    slot is waiting to be written the next frame waits for the oldest one, which keeps memory use
+    bounded however far the drawing gets ahead of the encoding.
+
+    Attributes:
+        width (int): The width of a frame
+        height (int): The height of a frame
+        memory (object): The SharedMemory block holding every slot's pixels
+        surfaces (list): One pygame Surface drawn straight into each slot
+        free (list): Slots that can be drawn into
+        pending (list): Futures for the frames still being written, oldest first
+        pool (object): The ProcessPoolExecutor writing the frames
+        frames (int): Frames handed to the pool so far
+        waitTime (float): Seconds spent waiting for a free slot
+
+    Methods:
+        __init__: Instantiates the FrameExporter object and starts the workers
+        acquire: Returns a free surface to draw the next frame on
+        submit: Hands the surface from acquire to the pool
+        close: Waits for every frame to be written and shuts down the workers
+        getFrameCount: Returns the frames attribute
+        getWaitTime: Returns the waitTime attribute
+    '''
+    # Constructor
+    def __init__(self, path, width, height, workers=None, slots=None, level=1):
+        '''
+        Instantiates the FrameExporter object, creating the shared slots and starting the workers
+
+        Parameters:
+            self (object): The FrameExporter object itself
+            path (string): A file ending in .rgb or .raw for a raw RGB stream, or else a directory for PNGs
+            width (int): The width of a frame
+            height (int): The height of a frame
+            workers (int): The number of worker processes, or None for one per CPU
+            slots (int): The number of frames that can be in flight at once, or None for twice the workers
+            level (int): The zlib compression level for PNG files
+
+        Return value: None
+
+        Sample call: exporter = FrameExporter("frames", 800, 600)
+        '''
+        workers = workers or os.cpu_count() or 1
+        slots = slots or 2 * workers
+        raw = os.path.splitext(path)[1].lower() in (".rgb", ".raw")
+        if raw:
+            open(path, "wb").close()
+        else:
+            os.makedirs(path, exist_ok=True)
+        self.__width = width
+        self.__height = height
+        frameSize = width * height * 3
+        self.__memory = shared_memory.SharedMemory(create=True, size=frameSize * slots)
+        self.__surfaces = [pygame.image.frombuffer(self.__memory.buf[slot * frameSize:(slot + 1) * frameSize], \
+                                                   (width, height), "RGB") for slot in range(slots)]
+        self.__free = list(range(slots))
+        self.__pending = []
+        self.__current = None
+        self.__frames = 0
+        self.__waitTime = 0.0
+        # Workers are started fresh instead of forked, so they do not inherit this process's SDL state
+        self.__pool = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"), attachWorker, \
+                                          (self.__memory.name, width, height, slots, path, raw, level))
+    def acquire(self):
+        '''
+        Returns a surface to draw the next frame on, waiting for the oldest frame in flight to be
+        written if every slot is taken
+
+        Parameters:
+            self (object): The FrameExporter object itself
+
+        Return value: A pygame Surface whose pixels are a shared slot
+
+        Sample call: surface = exporter.acquire()
+        '''
+        if not self.__free:
+            start = time.perf_counter()
+            future = self.__pending.pop(0)
+            self.__free.append(future.result())
+            self.__waitTime += time.perf_counter() - start
+        self.__current = self.__free.pop()
+        return self.__surfaces[self.__current]
+    def submit(self):
+        '''
+        Hands the frame drawn on the surface from acquire to the pool to be written
+
+        Parameters:
+            self (object): The FrameExporter object itself
+
+        Return value: None
+
+        Sample call: exporter.submit()
+        '''
+        self.__pending.append(self.__pool.submit(encodeFrame, self.__current, self.__frames))
+        self.__current = None
+        self.__frames += 1
+    def close(self):
+        '''
+        Waits for every frame to be written, stops the workers and frees the shared memory
+
+        Parameters:
+            self (object): The FrameExporter object itself
+
+        Return value: None
+
+        Sample call: exporter.close()
+        '''
+        for future in self.__pending:
+            future.result()
+        self.__pending = []
+        self.__pool.shutdown()
+        # The surfaces point into the shared block, so they have to go before it can be closed
+        self.__surfaces = []
+        self.__memory.close()
+        self.__memory.unlink()
+    # Getters
+    def getFrameCount(self):
+        '''
+        Returns the number of frames handed to the pool
+
+        Parameters:
+            self (object): The FrameExporter object itself
+
+        Return value: An integer count
+
+        Sample call: frames = exporter.getFrameCount()
+        '''
+        return self.__frames
+    def getWaitTime(self):
+        '''
+        Returns how long drawing has waited on the workers for a free slot
+
+        Parameters:
+            self (object): The FrameExporter object itself
+
+        Return value: A time in seconds
+
+        Sample call: stalled = exporter.getWaitTime()
+        '''
+        return self.__waitTime
+
+def drawFrame(surface, world, scoreBoard, spriteCache=None):
+    '''
+    Draws one frame of the game the way hw4.py does, using each object's own draw method
+
+    Parameters:
+        surface (object): The surface to draw on
+        world (object): The World to draw
+        scoreBoard (object): The CounterText showing the score
+        spriteCache (object): A SpriteCache to draw the balls from, or None to draw circles
+
+    Return value: None
+
+    Sample call: drawFrame(exporter.acquire(), world, scoreBoard)
+    '''
+    width, height = world.getSize()
+    WHITE = (255, 255, 255)
+    if world.isWon():
+        surface.fill(GREEN)
+        Text("YOU WON!!", (width/2)-50, (height/2), WHITE, 40).draw(surface)
+        return
+    if world.isLost():
+        PINK_UNICORN = (255, 192, 192)
+        surface.fill(PINK_UNICORN)
+        Text("You lost :(", (width/2)-50, (height/2)-50, WHITE, 40).draw(surface)
+        Text("Press 'q' to quit", (width/2)-50, (height/2), WHITE, 40).draw(surface)
+        return
+    surface.fill(WHITE)
+    world.getPaddle().draw(surface)
+    if world.getObstacles() is not None:
+        world.getObstacles().draw(surface)
+    if scoreBoard.getValue() != world.getScore():
+        scoreBoard.setValue(world.getScore())
+    scoreBoard.draw(surface)
+    if spriteCache is not None:
+        drawBalls(surface, world.getBalls(), spriteCache)
+    else:
+        for ball in world.getBalls():
+            ball.draw(surface)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export every frame of a recorded game without a window.")
+    parser.add_argument("log", help="a JSON input log saved with hw4.py --record")
+    parser.add_argument("output", help="a directory for PNG frames, or a .rgb/.raw file for a raw RGB stream")
+    parser.add_argument("--workers", type=int, help="encoding processes (default: one per CPU)")
+    parser.add_argument("--slots", type=int, help="frames that may wait to be encoded at once (default: 2 per worker)")
+    parser.add_argument("--level", type=int, default=1, help="PNG compression level from 0 to 9 (default: 1)")
+    parser.add_argument("--limit", type=int, help="only export the first LIMIT ticks")
+    parser.add_argument("--sprites", action="store_true", help="draw the balls from cached sprites")
+    args = parser.parse_args()
+
+    pygame.init()
+    log = loadInputLog(args.log)
+    world = log.makeWorld()
+    width, height = world.getSize()
+    inputs = list(zip(log.getInputs(), log.getTimeSteps()))
+    if args.limit:
+        inputs = inputs[:args.limit]
+    scoreBoard = CounterText("Number of green balls: ", 0, 10, 10)
+    spriteCache = SpriteCache() if args.sprites else None
+    exporter = FrameExporter(args.output, width, height, args.workers, args.slots, args.level)
+    start = time.perf_counter()
+    for paddleX, dt in inputs:
+        world.step(paddleX, dt)
+        drawFrame(exporter.acquire(), world, scoreBoard, spriteCache)
+        exporter.submit()
+    exporter.close()
+    elapsed = time.perf_counter() - start
+    print("Frames:", exporter.getFrameCount(), "Frames per second:", round(exporter.getFrameCount() / elapsed, 1), \
+          "Waiting on encoders:", str(round(100 * exporter.getWaitTime() / elapsed)) + "%")
+    pygame.quit()
\ No newline at end of file
@@ -0,0 +1,335 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Samples the player's input once per tick into a snapshot that cannot change, so the
+# paddle and every collision check in a tick see the same mouse position without asking the OS again
+
+import pygame
+
+class FrameInput:
+    '''
+    The input for one tick: where the mouse was and how big the screen was when the tick began.
+    A snapshot has no setters, so everything that reads it during the tick sees the same values.
+
+    Attributes:
+        tick (int): The tick the snapshot was taken for
+        mouseX (int/float): The mouse's horizontal position, which is where the paddle is centered
+        mouseY (int/float): The mouse's vertical position
+        screenWidth (int): The width of the screen
+        screenHeight (int): The height of the screen
+
+    Methods:
+        __init__: Instantiates the FrameInput object
+        getTick: Returns the tick attribute
+        getMouseX: Returns the mouseX attribute
+        getMouse: Returns the mouse's position
+        getScreenSize: Returns the screen's width and height
+    '''
+    __slots__ = ("__tick", "__mouseX", "__mouseY", "__screenWidth", "__screenHeight")
+    # Constructor
+    def __init__(self, tick, mouseX, mouseY, screenWidth, screenHeight):
+        '''
+        Instantiates the FrameInput object
+
+        Parameters:
+            self (object): The FrameInput object itself
+            tick (int): The tick the snapshot is for
+            mouseX (int/float): The mouse's horizontal position
+            mouseY (int/float): The mouse's vertical position
+            screenWidth (int): The width of the screen
+            screenHeight (int): The height of the screen
+
+        Return value: None
+
+        Sample call: frame = FrameInput(0, 400, 300, 800, 600)
+        '''
+        self.__tick = tick
+        self.__mouseX = mouseX
+        self.__mouseY = mouseY
+        self.__screenWidth = screenWidth
+        self.__screenHeight = screenHeight
+    # Getters
+    def getTick(self):
+        '''
+        Returns the tick the snapshot was taken for
+
+        Parameters:
+            self (object): The FrameInput object itself
+
+        Return value: An integer tick
+
+        Sample call: tick = frame.getTick()
+        '''
+        return self.__tick
+    def getMouseX(self):
+        '''
+        Returns the mouse's horizontal position, which is where the paddle is centered
+
+        Parameters:
+            self (object): The FrameInput object itself
+
+        Return value: The horizontal position
+
+        Sample call: paddleX = frame.getMouseX()
+        '''
+        return self.__mouseX
+    def getMouse(self):
+        '''
+        Returns the mouse's position
+
+        Parameters:
+            self (object): The FrameInput object itself
+
+        Return value: A tuple of (x, y)
+
+        Sample call: x, y = frame.getMouse()
+        '''
+        return (self.__mouseX, self.__mouseY)
+    def getScreenSize(self):
+        '''
+        Returns the size of the screen when the snapshot was taken
+
+        Parameters:
+            self (object): The FrameInput object itself
+
+        Return value: A tuple of (width, height)
+
+        Sample call: width, height = frame.getScreenSize()
+        '''
+        return (self.__screenWidth, self.__screenHeight)
+
+class PygameInput:
+    '''
+    Reads the real mouse, asking pygame for its position once per tick. The screen size is only read
+    again when pygame reports that the window was resized.
+
+    Attributes:
+        screenSize (tuple): The last known width and height of the display surface
+
+    Methods:
+        __init__: Instantiates the PygameInput object
+        sample: Returns the snapshot for a tick
+        resize: Records a new screen size
+    '''
+    # Constructor
+    def __init__(self):
+        '''
+        Instantiates the PygameInput object from the current display surface
+
+        Parameters:
+            self (object): The PygameInput object itself
+
+        Return value: None
+
+        Sample call: source = PygameInput()
+        '''
+        self.__screenSize = pygame.display.get_surface().get_size()
+    def sample(self, tick):
+        '''
+        Reads the mouse and returns the snapshot for a tick
+
+        Parameters:
+            self (object): The PygameInput object itself
+            tick (int): The tick the snapshot is for
+
+        Return value: A FrameInput object
+
+        Sample call: frame = source.sample(world.getTick())
+        '''
+        mouseX, mouseY = pygame.mouse.get_pos()
+        return FrameInput(tick, mouseX, mouseY, self.__screenSize[0], self.__screenSize[1])
+    # Setter
+    def resize(self, width, height):
+        '''
+        Records a new screen size, for example after a pygame.VIDEORESIZE event
+
+        Parameters:
+            self (object): The PygameInput object itself
+            width (int): The new width of the screen
+            height (int): The new height of the screen
+
+        Return value: None
+
+        Sample call: source.resize(event.w, event.h)
+        '''
+        self.__screenSize = (width, height)
+
+class SharedInput:
+    '''
+    Input that one thread writes and another samples, for when the game is stepped on a thread
+    other than the one that reads the mouse
+
+    Attributes:
+        mouse (tuple): The last mouse position written
+        screenWidth (int): The width of the screen that is reported
+        screenHeight (int): The height of the screen that is reported
+
+    Methods:
+        __init__: Instantiates the SharedInput object
+        sample: Returns the snapshot for a tick
+        update: Records the latest mouse position
+    '''
+    # Constructor
+    def __init__(self, screenWidth=800, screenHeight=600):
+        '''
+        Instantiates the SharedInput object with the mouse in the middle of the screen
+
+        Parameters:
+            self (object): The SharedInput object itself
+            screenWidth (int): The width of the screen that is reported
+            screenHeight (int): The height of the screen that is reported
+
+        Return value: None
+
+        Sample call: source = SharedInput(800, 600)
+        '''
+        self.__mouse = (screenWidth / 2, screenHeight / 2)
+        self.__screenWidth = screenWidth
+        self.__screenHeight = screenHeight
+    def sample(self, tick):
+        '''
+        Returns the snapshot for a tick, using the last mouse position written
+
+        Parameters:
+            self (object): The SharedInput object itself
+            tick (int): The tick the snapshot is for
+
+        Return value: A FrameInput object
+
+        Sample call: frame = source.sample(world.getTick())
+        '''
+        mouseX, mouseY = self.__mouse
+        return FrameInput(tick, mouseX, mouseY, self.__screenWidth, self.__screenHeight)
+    # Setter
+    def update(self, mouseX, mouseY):
+        '''
+        Records the latest mouse position. The position is stored with a single assignment, so the
+        sampling thread never sees the x of one update with the y of another.
+
+        Parameters:
+            self (object): The SharedInput object itself
+            mouseX (int/float): The mouse's horizontal position
+            mouseY (int/float): The mouse's vertical position
+
+        Return value: None
+
+        Sample call: source.update(*pygame.mouse.get_pos())
+        '''
+        self.__mouse = (mouseX, mouseY)
+
+class ScriptedInput:
+    '''
+    Input produced by a function of the tick instead of the mouse, for bots, tests and benchmarks
+
+    Attributes:
+        script (function): Takes a tick and returns the paddle's horizontal position for it
+        screenWidth (int): The width of the screen that is reported
+        screenHeight (int): The height of the screen that is reported
+
+    Methods:
+        __init__: Instantiates the ScriptedInput object
+        sample: Returns the snapshot for a tick
+    '''
+    # Constructor
+    def __init__(self, script, screenWidth=800, screenHeight=600):
+        '''
+        Instantiates the ScriptedInput object
+
+        Parameters:
+            self (object): The ScriptedInput object itself
+            script (function): Takes a tick and returns the paddle's horizontal position for it
+            screenWidth (int): The width of the screen that is reported
+            screenHeight (int): The height of the screen that is reported
+
+        Return value: None
+
+        Sample call: source = ScriptedInput(lambda tick: 400 + 100 * math.sin(tick / 30))
+        '''
+        self.__script = script
+        self.__screenWidth = screenWidth
+        self.__screenHeight = screenHeight
+    def sample(self, tick):
+        '''
+        Returns the snapshot for a tick, placing the mouse where the script says, halfway down the screen
+
+        Parameters:
+            self (object): The ScriptedInput object itself
+            tick (int): The tick the snapshot is for
+
+        Return value: A FrameInput object
+
+        Sample call: frame = source.sample(world.getTick())
+        '''
+        return FrameInput(tick, self.__script(tick), self.__screenHeight / 2, \
+                          self.__screenWidth, self.__screenHeight)
+
+class ReplayInput:
+    '''
+    Plays back recorded paddle positions, one per tick, and hands over to another input source once
+    the recording runs out
+
+    Attributes:
+        inputs (list): The recorded paddle position for each tick, as kept by an InputLog
+        fallback (object): The input source used after the recording ends, or None to hold the last
+        recorded position
+        screenWidth (int): The width of the screen that is reported while replaying
+        screenHeight (int): The height of the screen that is reported while replaying
+
+    Methods:
+        __init__: Instantiates the ReplayInput object
+        sample: Returns the snapshot for a tick
+        isReplaying: Returns whether a tick is still covered by the recording
+    '''
+    # Constructor
+    def __init__(self, inputs, fallback=None, screenWidth=800, screenHeight=600):
+        '''
+        Instantiates the ReplayInput object
+
+        Parameters:
+            self (object): The ReplayInput object itself
+            inputs (list): The recorded paddle position for each tick
+            fallback (object): The input source used after the recording ends, or None to hold the
+            last recorded position
+            screenWidth (int): The width of the screen that is reported while replaying
+            screenHeight (int): The height of the screen that is reported while replaying
+
+        Return value: None
+
+        Sample call: source = ReplayInput(log.getInputs(), PygameInput())
+        '''
+        self.__inputs = list(inputs)
+        self.__fallback = fallback
+        self.__screenWidth = screenWidth
+        self.__screenHeight = screenHeight
+    def sample(self, tick):
+        '''
+        Returns the recorded snapshot for a tick, or the fallback's once the recording has ended
+
+        Parameters:
+            self (object): The ReplayInput object itself
+            tick (int): The tick the snapshot is for
+
+        Return value: A FrameInput object
+
+        Sample call: frame = source.sample(world.getTick())
+        '''
+        if self.isReplaying(tick):
+            paddleX = self.__inputs[tick]
+        elif self.__fallback is not None:
+            return self.__fallback.sample(tick)
+        else:
+            paddleX = self.__inputs[-1] if self.__inputs else self.__screenWidth / 2
+        return FrameInput(tick, paddleX, self.__screenHeight / 2, self.__screenWidth, self.__screenHeight)
+    # Getter
+    def isReplaying(self, tick):
+        '''
+        Returns whether a tick is still covered by the recording
+
+        Parameters:
+            self (object): The ReplayInput object itself
+            tick (int): The tick to check
+
+        Return value: Boolean of whether the tick was recorded
+
+        Sample call: if source.isReplaying(world.getTick()): ...
+        '''
+        return tick < len(self.__inputs)
\ No newline at end of file
@@ -3,117 +3,242 @@
 # Program Description: Simulates a pygame that spawns moveable balls and a moveable paddle. The game uses
 # attributes and methods from various classes.
 
-import pygame, sys
+import argparse, pygame, random, sys
 from ball import Ball
+from frameinput import PygameInput, ReplayInput, SharedInput
+from obstacles import ObstacleLayer, makeBrickWall
 from paddle import Paddle
-from text import Text
+from profiler import FrameProfiler, ProfilerOverlay
+from renderer import DirtyRectRenderer
+from replayfile import ReplayRecorder
+from simthread import SimulationThread, drawSnapshot
+from simulation import FixedTimestep, FramePacer, InputLog, loadInputLog
+from sprites import SpriteCache, drawBalls
+from text import CounterText, Text, getRenderCount
+from world import World, DREXEL_BLUE, GREEN
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collide all the balls before the gold one falls.")
+    parser.add_argument("--seed", type=int, help="seed for the ball directions, for a repeatable game")
+    parser.add_argument("--record", metavar="FILE", help="save the paddle position of every tick to FILE on exit")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recorded game, then hand control to the mouse")
+    parser.add_argument("--fixed-step", action="store_true", \
+                        help="advance the game at a fixed 60 steps per second of real time instead of once per frame")
+    parser.add_argument("--delta-time", action="store_true", \
+                        help="move the balls by the real time each frame took, so a slow frame does not slow the game")
+    parser.add_argument("--adaptive", action="store_true", \
+                        help="keep the game at full speed when frames run long by skipping drawing, then by taking longer steps")
+    parser.add_argument("--collisions", choices=["discrete", "swept"], default="discrete", \
+                        help="'swept' finds contacts during the frame so fast balls cannot pass through things")
+    parser.add_argument("--contact-cache", action="store_true", \
+                        help="count a ball collision once when two balls start touching, not on every frame they overlap")
+    parser.add_argument("--sprites", action="store_true", \
+                        help="draw the balls from cached sprites with one batched blit per frame")
+    parser.add_argument("--dirty-rects", action="store_true", \
+                        help="only redraw and update the parts of the screen that changed")
+    parser.add_argument("--profile", metavar="FILE", \
+                        help="time every frame and save the timings to FILE (.csv or .json) on exit; F3 shows them")
+    parser.add_argument("--threaded", action="store_true", \
+                        help="step the game at 60 steps per second on its own thread and draw between the last two steps")
+    parser.add_argument("--bricks", type=int, default=0, metavar="ROWS", \
+                        help="add a wall of ROWS rows of bricks for the balls to break")
+    parser.add_argument("--archive", metavar="FILE", \
+                        help="write the state of every tick to FILE as a binary replay (see replayfile.py)")
+    args = parser.parse_args()
+    if args.threaded and (args.dirty_rects or args.fixed_step or args.delta_time or args.adaptive):
+        parser.error("--threaded already steps at a fixed rate and always redraws the whole screen")
+    if sum([args.fixed_step, args.delta_time, args.adaptive]) > 1:
+        parser.error("choose only one of --fixed-step, --delta-time and --adaptive")
+    if args.threaded and args.archive:
+        parser.error("--archive reads the World after every step, which --threaded does on another thread")
     pygame.init()
     # Creates a rectangular display 800 x 600 pixels
     screenWidth = 800
     screenHeight = 600
     surface = pygame.display.set_mode((screenWidth,screenHeight))
-    DREXEL_BLUE = (7, 41, 77)
-    DREXEL_GOLD = (244, 219, 133)
-    GREEN = (158, 214, 149)
-    BLACK = (0, 0, 0)
-    balls = []
+    # Picks how candidate ball pairs are found each frame: "grid" uses a spatial hash and
+    # "brute" lists every pair (kept for comparison)
+    BROAD_PHASE = "grid"
+    # Stores the balls in NumPy arrays (see ballsystem.py) instead of one Ball object each
+    USE_BALL_SYSTEM = False
+    # The game's rules live in the World, which this loop steps and then draws
+    # The mouse is read once per tick into a snapshot that the whole step uses. With --threaded the
+    # drawing thread writes the mouse position for the simulation thread to sample.
+    sharedInput = SharedInput(screenWidth, screenHeight) if args.threaded else None
+    inputSource = sharedInput if args.threaded else PygameInput()
+    if args.replay:
+        replayLog = loadInputLog(args.replay)
+        # The paddle follows the recorded positions and then hands control to the mouse
+        inputSource = ReplayInput(replayLog.getInputs(), inputSource, screenWidth, screenHeight)
+        world = replayLog.makeWorld(BROAD_PHASE, USE_BALL_SYSTEM)
+        # The recorded ticks are stepped by their recorded lengths, however this run is paced
+        recordedSteps = list(replayLog.getTimeSteps())
+        # This run's ticks, replayed ones included, go into a new log so --record saves just this run
+        log = replayLog.makeEmpty()
+    else:
+        recordedSteps = []
+        seed = args.seed if args.seed is not None else random.randrange(2**32)
+        log = InputLog(seed, screenWidth, screenHeight, collisionMode=args.collisions, brickRows=args.bricks, \
+                       contactCache=args.contact_cache)
+        # The bricks are packed into their index once, when the level is built
+        obstacles = ObstacleLayer(makeBrickWall(screenWidth, screenHeight, args.bricks)) if args.bricks else None
+        world = World(screenWidth, screenHeight, BROAD_PHASE, USE_BALL_SYSTEM, seed, \
+                      collisionMode=args.collisions, obstacles=obstacles, contactCache=args.contact_cache)
+    timestep = FixedTimestep(60) if args.fixed_step else None
+    pacer = None
+    if args.delta_time or args.adaptive:
+        pacer = FramePacer("adaptive" if args.adaptive else "delta", 60)
+    archive = ReplayRecorder(args.archive, screenWidth, screenHeight) if args.archive else None
+    paddle = world.getPaddle()
+    scoreBoard = CounterText("Number of green balls: ", 0, 10, 10)
+    # The end screens never change, so their text is created once up front
+    WHITE = (255, 255, 255)
+    playerWin = Text("YOU WON!!", (screenWidth/2)-50, (screenHeight/2), WHITE, 40)
+    playerLose = []
+    playerLose.append(Text("You lost :(", (screenWidth/2)-50, (screenHeight/2)-50, WHITE, 40))
+    playerLose.append(Text("Press 'q' to quit", (screenWidth/2)-50, (screenHeight/2), WHITE, 40))
     
-    ball = Ball(400, 300, 30, DREXEL_GOLD)
-    paddle = Paddle(200, 20, DREXEL_BLUE)
-    scoreBoard = Text("Score: 0", 10, 10)
+    initialColor = (255, 255, 255)
+    renderer = DirtyRectRenderer(surface, initialColor) if args.dirty_rects else None
+    spriteCache = SpriteCache() if args.sprites else None
+    # The profiler records nothing, and costs next to nothing, unless --profile or F3 turns it on
+    profiler = FrameProfiler()
+    profiler.addCounter("pairsTested", world.getPairsTested)
+    profiler.addCounter("textRenders", getRenderCount)
+    if world.getContacts() is not None:
+        profiler.addCounter("contacts", lambda: len(world.getContacts().getContacts()))
+    if pacer is not None:
+        profiler.addCounter("framesSkipped", lambda: pacer.getMetrics()["framesSkipped"])
+        profiler.addCounter("overruns", lambda: pacer.getMetrics()["overruns"])
+    profiler.trackRects((Ball, Paddle, Text, CounterText))
+    profiler.setEnabled(args.profile is not None)
+    overlay = None
+    frameCount = 0
+    # From here on only the simulation thread touches the World; this loop draws its snapshots
+    simulation = SimulationThread(world, inputSource, 60, log) if args.threaded else None
+    if simulation is not None:
+        simulation.start()
     
-    balls.append(ball)
-    
-    numGreen = 0
-    lose = False
-    win = False
     fpsClock = pygame.time.Clock()
+    frameTime = 1 / 60
     while True:
-        initialColor = (255, 255, 255)
-        # Initializes a white background
-        surface.fill(initialColor)
-        paddle.draw(surface)
-        scoreBoard.draw(surface)
-        try:
-            for i in range(0,len(balls)):
-                # If balls[i] does not exist, then restart the for loop
-                if balls[i] == None:
-                    break
-                balls[i].draw(surface)
-                # Results in a game over if the ball hits the sides of the paddle
-                if balls[i].intersectSide(paddle):
-                    lose = True
-                if balls[i].intersects(paddle):
-                    # Increases movement speed each time the ball hits the paddle, but prevents the ball from moving too fast
-                    if (balls[i].getYSpeed() < 5) and (balls[i].getYSpeed() > -5):
-                        balls[i].setYSpeed(balls[i].getYSpeed()*-1.5)
-                        balls[i].setXSpeed(balls[i].getXSpeed()*1.5)
-                    else:
-                        balls[i].setYSpeed(balls[i].getYSpeed()*-1)
-                        balls[i].setXSpeed(balls[i].getXSpeed()*1)
-                    # Checking if it was the gold ball that hit the paddle
-                    if i == 0:
-                        # Spawns a ball if the gold ball hit the paddle
-                        if len(balls) < 10:
-                            balls.append(Ball(400, 300, 18, BLACK))
-                for ball in balls:
-                    if (balls[i] is not ball) and balls[i].isTouchingBall(ball):
-                        # Increases the number of green balls score by 2 if both balls were not initially green
-                        if (balls[i].getColor() != GREEN) and (ball.getColor() != GREEN):
-                            numGreen += 2
-                        # Increases number of green balls score by 1 if only one of the balls weren't initially green
-                        elif (balls[i].getColor() != GREEN) or (ball.getColor() != GREEN):
-                            numGreen += 1
-                        balls[i].setXSpeed(balls[i].getXSpeed()*-1)
-                        ball.setXSpeed(ball.getXSpeed()*-1)
-                        balls[i].setColor(GREEN)
-                        ball.setColor(GREEN)
-                # Causes the ball to move in the down-right direction
-                balls[i].move()
-                # Results in a game over if the ball hits the bottom of the screen
-                if ((balls[i].getLoc())[1] + balls[i].getRadius()) >= screenHeight:
-                    # If the initial ball (gold) disappears, then it is a game over
-                    if i == 0:
-                        lose = True
-                    balls.pop(i)
-                    # If the ball that went out of bounds was a green ball, then the score decreases
-                    if (balls[i].getColor() == GREEN):
-                        numGreen -= 1
-                    break
-                scoreBoard.setMessage("Number of green balls: " + str(numGreen))
-        # Ignores the situation where list index is out of range, preventing the program from crashing
-        except:
-            print()
-        # Number of green balls cannot be below 0
-        if numGreen <= -1:
-            lose = True
-        # Spawning all balls possible and getting them all to collide with each other results in a victory
-        elif numGreen >= 10:
-            win = True
-        if win == True:
-            surface.fill(GREEN)
-            WHITE = (255, 255, 255)
-            playerWin = Text("YOU WON!!", (screenWidth/2)-50, (screenHeight/2), WHITE, 40)
-        if lose == True:
-            # Changes surface to display losing state
-            PINK_UNICORN = (255, 192, 192)
-            surface.fill(PINK_UNICORN)
-            WHITE = (255, 255, 255)
-            playerLose = []
-            playerLose.append(Text("You lost :(", (screenWidth/2)-50, (screenHeight/2)-50, WHITE, 40))
-            playerLose.append(Text("Press 'q' to quit", (screenWidth/2)-50, (screenHeight/2), WHITE, 40))
-            for element in playerLose:
-                element.draw(surface)
+        profiler.beginFrame()
+        render = True
+        if simulation is None:
+            if pacer is not None:
+                stepLengths = pacer.advance(frameTime)
+                render = pacer.shouldRender()
+            else:
+                stepLengths = [1] * (1 if timestep is None else timestep.advance(frameTime))
+            for dt in stepLengths:
+                frame = inputSource.sample(world.getTick())
+                if world.getTick() < len(recordedSteps):
+                    dt = recordedSteps[world.getTick()]
+                log.record(frame.getMouseX(), dt)
+                profiler.lap("input")
+                world.stepFrame(frame, dt)
+                if archive is not None:
+                    archive.record(world)
+                profiler.lap("physics")
+            score, won, lost = world.getScore(), world.isWon(), world.isLost()
+        else:
+            mouseX, mouseY = pygame.mouse.get_pos()
+            sharedInput.update(mouseX, mouseY)
+            previous, latest, alpha = simulation.getFrame()
+            score, won, lost = latest.getScore(), latest.isWon(), latest.isLost()
+            profiler.lap("input")
+        # The digit glyphs are the only part of the scoreboard that changes
+        if scoreBoard.getValue() != score:
+            scoreBoard.setValue(score)
+            if renderer is not None:
+                renderer.markDirty(scoreBoard)
+        profiler.lap("text")
+        gameOver = won or lost
+        if not render:
+            # The pacer is behind, so this frame is not drawn and the loop goes straight back to stepping
+            updateRects = []
+        elif renderer is not None and not gameOver:
+            # Only the areas that changed are cleared, redrawn and sent to the display
+            drawables = [paddle, scoreBoard] + world.getBalls()
+            if world.getObstacles() is not None:
+                drawables += world.getObstacles().getObstacles()
+            if overlay is not None:
+                drawables.append(overlay)
+            updateRects = renderer.render(drawables)
+            profiler.lap("draw")
+        else:
+            updateRects = None
+            # Initializes a white background
+            surface.fill(initialColor)
+            if simulation is not None:
+                drawSnapshot(surface, previous, latest, alpha, DREXEL_BLUE, spriteCache)
+                scoreBoard.draw(surface)
+            else:
+                paddle.draw(surface)
+                scoreBoard.draw(surface)
+                if world.getObstacles() is not None:
+                    world.getObstacles().draw(surface)
+                if spriteCache is not None:
+                    drawBalls(surface, world.getBalls(), spriteCache)
+                else:
+                    for ball in world.getBalls():
+                        ball.draw(surface)
+            if won:
+                surface.fill(GREEN)
+                playerWin.draw(surface)
+            if lost:
+                # Changes surface to display losing state
+                PINK_UNICORN = (255, 192, 192)
+                surface.fill(PINK_UNICORN)
+                for element in playerLose:
+                    element.draw(surface)
+            profiler.lap("draw")
+            if overlay is not None:
+                overlay.draw(surface)
+        frameCount += 1
+        if overlay is not None and frameCount % 30 == 0:
+            # The overlay's text is only rebuilt twice a second so it stays readable and cheap
+            overlay.refresh()
+            if renderer is not None:
+                renderer.markDirty(overlay)
+        profiler.lap("overlay")
         for event in pygame.event.get():
             if (event.type == pygame.QUIT) or \
                (event.type == pygame.KEYDOWN and event.__dict__['key'] == pygame.K_q):
+                if simulation is not None:
+                    simulation.stop()
+                    print("Simulation thread:", simulation.getMetrics())
+                if args.record:
+                    log.save(args.record)
+                if archive is not None:
+                    archive.close()
+                if renderer is not None:
+                    print("Average dirty-pixel ratio:", round(renderer.getAverageDirtyRatio(), 4))
+                if pacer is not None:
+                    print("Frame pacing:", pacer.getMetrics())
+                if args.profile:
+                    profiler.export(args.profile)
                 pygame.quit()
                 exit()
+            elif event.type == pygame.KEYDOWN and event.__dict__['key'] == pygame.K_F3:
+                # Shows or hides the profiler overlay, recording frames while it is shown
+                if overlay is None:
+                    profiler.setEnabled(True)
+                    overlay = ProfilerOverlay(profiler, screenWidth - 250, 10)
+                else:
+                    overlay = None
+                    profiler.setEnabled(args.profile is not None)
             # Below is not needed/detrimental to the game
             #elif event.type == pygame.MOUSEBUTTONDOWN:
             #    ball.setVisible(not ball.isVisible())
         # Regularly updates the display after any graphical changes are made
-        pygame.display.update()
-        fpsClock.tick(60)
\ No newline at end of file
+        profiler.lap("events")
+        if updateRects is None:
+            pygame.display.update()
+        elif updateRects:
+            pygame.display.update(updateRects)
+        profiler.lap("update")
+        # A frame that was not drawn does not wait for the frame rate cap
+        frameTime = fpsClock.tick(60 if render else 0) / 1000
+        profiler.lap("sleep")
+        profiler.endFrame()
\ No newline at end of file
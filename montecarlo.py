@@ -0,0 +1,232 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Plays thousands of headless games with a scripted paddle across all CPU cores and
+# reports how often each set of rule settings is won, how long games last and how the score grows
+
+import os
+# Keeps pygame's import banner out of the JSON report printed to the screen
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse, itertools, json, math, random, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from world import World
+
+def followGold(world):
+    '''
+    Paddle policy that keeps the paddle under the gold ball
+
+    Parameters:
+        world (object): The World being played
+
+    Return value: The paddle's horizontal center for the next tick
+
+    Sample call: paddleX = followGold(world)
+    '''
+    return world.getBalls()[0].getLoc()[0]
+
+def followLowest(world):
+    '''
+    Paddle policy that keeps the paddle under whichever falling ball is closest to the bottom,
+    falling back to the gold ball when no ball is falling
+
+    Parameters:
+        world (object): The World being played
+
+    Return value: The paddle's horizontal center for the next tick
+
+    Sample call: paddleX = followLowest(world)
+    '''
+    balls = world.getBalls()
+    target = balls[0]
+    for ball in balls:
+        if ball.getYSpeed() > 0 and ball.getLoc()[1] > target.getLoc()[1]:
+            target = ball
+    return target.getLoc()[0]
+
+def stayCentered(world):
+    '''
+    Paddle policy that never moves the paddle from the middle of the play area
+
+    Parameters:
+        world (object): The World being played
+
+    Return value: The paddle's horizontal center for the next tick
+
+    Sample call: paddleX = stayCentered(world)
+    '''
+    return world.getSize()[0] / 2
+
+# Paddle policies by name, so they can be picked on the command line and sent to worker processes
+POLICIES = {"gold": followGold, "lowest": followLowest, "center": stayCentered}
+
+def playGame(seed, policy="gold", rules=None, maxTicks=20000, sampleEvery=60):
+    '''
+    Plays one game to the end with a scripted paddle
+
+    Parameters:
+        seed (int): The seed for the World
+        policy (string): The name of a paddle policy in POLICIES
+        rules (dictionary): Rule settings passed to the World, such as maxBalls or bounceMultiplier
+        maxTicks (int): Ticks after which a game that has not ended counts as a timeout
+        sampleEvery (int): How often, in ticks, the score is written to the trajectory
+
+    Return value: A dictionary with the outcome, the tick it happened on, the final score and the
+    sampled score trajectory
+
+    Sample call: result = playGame(7, "lowest", {"maxBalls": 15})
+    '''
+    world = World(seed=seed, **(rules or {}))
+    choosePaddleX = POLICIES[policy]
+    trajectory = []
+    while not (world.isWon() or world.isLost()) and world.getTick() < maxTicks:
+        if world.getTick() % sampleEvery == 0:
+            trajectory.append(world.getScore())
+        world.step(choosePaddleX(world))
+    if world.isLost():
+        outcome = "lose"
+    elif world.isWon():
+        outcome = "win"
+    else:
+        outcome = "timeout"
+    return {"seed": seed, "outcome": outcome, "ticks": world.getTick(), "score": world.getScore(), \
+            "trajectory": trajectory}
+
+def playBatch(seeds, policy, rules, maxTicks, sampleEvery):
+    '''
+    Plays several games in one worker process, which keeps the cost of sending work between
+    processes small compared to the games themselves
+
+    Parameters:
+        seeds (list): One World seed per game
+        policy (string): The name of a paddle policy in POLICIES
+        rules (dictionary): Rule settings passed to the World
+        maxTicks (int): Ticks after which a game counts as a timeout
+        sampleEvery (int): How often, in ticks, the score is sampled
+
+    Return value: A list of game results from playGame
+
+    Sample call: results = playBatch([1, 2, 3], "gold", {}, 20000, 60)
+    '''
+    return [playGame(seed, policy, rules, maxTicks, sampleEvery) for seed in seeds]
+
+def summarizeGames(results, elapsed):
+    '''
+    Combines the results of many games played with the same settings
+
+    Parameters:
+        results (list): Game results from playGame
+        elapsed (float): Wall-clock seconds spent playing them
+
+    Return value: A dictionary with outcome counts, game lengths, the average score trajectory and
+    throughput
+
+    Sample call: report = summarizeGames(results, 12.5)
+    '''
+    counts = {"win": 0, "lose": 0, "timeout": 0}
+    ticksByOutcome = {"win": [], "lose": [], "timeout": []}
+    for result in results:
+        counts[result["outcome"]] += 1
+        ticksByOutcome[result["outcome"]].append(result["ticks"])
+    lengths = {}
+    for outcome, ticks in ticksByOutcome.items():
+        if ticks:
+            ticks.sort()
+            lengths[outcome] = {"mean": sum(ticks) / len(ticks), "p50": ticks[len(ticks) // 2], \
+                                "p90": ticks[max(0, math.ceil(0.9 * len(ticks)) - 1)]}
+    # Games that already ended keep their final score for the rest of the trajectory
+    longest = max(len(result["trajectory"]) for result in results)
+    meanTrajectory = []
+    for index in range(longest):
+        total = 0
+        for result in results:
+            trajectory = result["trajectory"]
+            total += trajectory[index] if index < len(trajectory) else result["score"]
+        meanTrajectory.append(total / len(results))
+    totalTicks = sum(result["ticks"] for result in results)
+    return {"games": len(results), "outcomes": counts, "winRate": counts["win"] / len(results), \
+            "ticksToOutcome": lengths, "meanScore": sum(r["score"] for r in results) / len(results), \
+            "meanScoreTrajectory": meanTrajectory, "gamesPerSecond": len(results) / elapsed, \
+            "ticksPerSecond": totalTicks / elapsed}
+
+def runSweep(settingsList, games, policy, baseSeed, workers, batchSize, maxTicks, sampleEvery, stream=None):
+    '''
+    Plays the given number of games for every set of rule settings in parallel, streaming each
+    finished game to an optional file
+
+    Parameters:
+        settingsList (list): Dictionaries of rule settings to try
+        games (int): Games played per set of settings
+        policy (string): The name of a paddle policy in POLICIES
+        baseSeed (int): Seed that the per-game World seeds are drawn from
+        workers (int): The number of worker processes
+        batchSize (int): Games handed to a worker at a time
+        maxTicks (int): Ticks after which a game counts as a timeout
+        sampleEvery (int): How often, in ticks, the score is sampled
+        stream (file): An open file that each game's result is written to as a JSON line, or None
+
+    Return value: A list with one report per set of settings
+
+    Sample call: reports = runSweep([{}], 1000, "gold", 1, 4, 25, 20000, 60)
+    '''
+    # Every game gets its own seed drawn up front, so results do not depend on the number of workers
+    seedSource = random.Random(baseSeed)
+    seeds = [seedSource.randrange(2**32) for _ in range(games)]
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rules in settingsList:
+            start = time.perf_counter()
+            futures = []
+            for first in range(0, games, batchSize):
+                batch = seeds[first:first + batchSize]
+                futures.append(pool.submit(playBatch, batch, policy, rules, maxTicks, sampleEvery))
+            results = []
+            for future in as_completed(futures):
+                for result in future.result():
+                    results.append(result)
+                    if stream is not None:
+                        stream.write(json.dumps(dict(result, rules=rules)) + "\n")
+                print("%s: %d/%d games" % (json.dumps(rules), len(results), games), file=sys.stderr)
+            report = summarizeGames(results, time.perf_counter() - start)
+            report["rules"] = rules
+            report["policy"] = policy
+            reports.append(report)
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many scripted games in parallel and report the outcomes.")
+    parser.add_argument("--games", type=int, default=1000, help="games per set of rule settings")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="gold", help="paddle policy")
+    parser.add_argument("--seed", type=int, default=1, help="seed the per-game seeds are drawn from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--batch", type=int, default=25, help="games sent to a worker at a time")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="ticks before a game counts as a timeout")
+    parser.add_argument("--sample-every", type=int, default=60, help="ticks between score samples")
+    # Each of these takes several values, and every combination of them is played
+    parser.add_argument("--max-balls", type=int, nargs="+", default=[10], help="ball caps to try")
+    parser.add_argument("--bounce", type=float, nargs="+", default=[1.5], help="paddle speed multipliers to try")
+    parser.add_argument("--gold-radius", type=float, nargs="+", default=[30], help="gold ball radii to try")
+    parser.add_argument("--small-radius", type=float, nargs="+", default=[18], help="black ball radii to try")
+    parser.add_argument("--collisions", choices=["discrete", "swept"], nargs="+", default=["discrete"], \
+                        help="collision modes to try")
+    parser.add_argument("--stream", metavar="FILE", help="write each finished game to FILE as a JSON line")
+    parser.add_argument("--output", metavar="FILE", help="write the report to FILE instead of the screen")
+    args = parser.parse_args()
+
+    settingsList = []
+    for maxBalls, bounce, goldRadius, smallRadius, collisionMode in \
+        itertools.product(args.max_balls, args.bounce, args.gold_radius, args.small_radius, args.collisions):
+        settingsList.append({"maxBalls": maxBalls, "bounceMultiplier": bounce, \
+                             "goldRadius": goldRadius, "smallRadius": smallRadius, \
+                             "collisionMode": collisionMode})
+    stream = open(args.stream, "w") if args.stream else None
+    try:
+        reports = runSweep(settingsList, args.games, args.policy, args.seed, args.workers, args.batch, \
+                           args.max_ticks, args.sample_every, stream)
+    finally:
+        if stream is not None:
+            stream.close()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(reports, file, indent=2)
+    else:
+        print(json.dumps(reports, indent=2))
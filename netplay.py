@@ -0,0 +1,651 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Two players, each with a paddle, playing one ball field from separate processes. The
+# peers run the World in lockstep over UDP: only each tick's paddle position is exchanged, and every peer
+# steps its own copy of the World once it has both players' inputs for a tick.
+
+import argparse, json, math, os, random, socket, subprocess, sys, time
+from simulation import stateDigest
+from world import World
+
+# The first byte of every packet, so stray datagrams are ignored
+MAGIC = 0x4C
+# The most inputs sent in one packet when the peer has fallen far behind
+MAX_BATCH = 255
+# IPv4 and UDP header bytes added to every packet on the wire
+HEADER_BYTES = 28
+# How many packets after a checksum is taken carry it, in case some are lost
+CHECKSUM_REPEATS = 8
+
+def writeVarint(out, value):
+    '''
+    Appends a non-negative integer to a bytearray using 7 bits per byte, low bits first. The top bit of
+    each byte says whether more bytes follow, so values below 128 take one byte.
+
+    Parameters:
+        out (bytearray): The buffer to append to
+        value (int): A non-negative integer
+
+    Return value: None
+
+    Sample call: writeVarint(packet, tick)
+    '''
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def readVarint(data, offset):
+    '''
+    Reads an integer written by writeVarint
+
+    Parameters:
+        data (bytes): The packet
+        offset (int): Where the integer starts
+
+    Return value: A tuple of (value, offset just past the integer)
+
+    Sample call: tick, offset = readVarint(packet, offset)
+    '''
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def zigzag(value):
+    '''
+    Maps a signed integer to a non-negative one so small changes either way stay small:
+    0, -1, 1, -2, 2 become 0, 1, 2, 3, 4
+
+    Parameters:
+        value (int): A signed integer
+
+    Return value: A non-negative integer
+
+    Sample call: writeVarint(packet, zigzag(delta))
+    '''
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def unzigzag(value):
+    '''
+    Undoes zigzag
+
+    Parameters:
+        value (int): A non-negative integer made by zigzag
+
+    Return value: The signed integer
+
+    Sample call: delta = unzigzag(encoded)
+    '''
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def encodePacket(player, nextWanted, start, inputs, base, sentMs, echoMs, heldMs, checksum):
+    '''
+    Builds one packet. The inputs are written as the change from the input before them, so a paddle
+    that is still or moving slowly costs a byte per tick.
+
+    Parameters:
+        player (int): The sender's player number
+        nextWanted (int): The first tick the sender does not have the receiver's input for, which
+        acknowledges every input before it
+        start (int): The tick of the first input in the batch
+        inputs (list): Whole-pixel paddle positions for start, start + 1, ...
+        base (int): The sender's input for the tick before start, which the receiver already has
+        sentMs (int): Milliseconds since the sender started, for measuring round trips
+        echoMs (int): The sentMs of the latest packet received from the peer, or None
+        heldMs (int): Milliseconds since that packet arrived
+        checksum (tuple): A (tick, 32-bit checksum) pair to compare, or None
+
+    Return value: The packet as bytes
+
+    Sample call: data = encodePacket(0, 40, 38, [400, 402], 399, 655, 640, 2, None)
+    '''
+    out = bytearray((MAGIC, player))
+    writeVarint(out, nextWanted)
+    writeVarint(out, start)
+    writeVarint(out, len(inputs))
+    previous = base
+    for paddleX in inputs:
+        writeVarint(out, zigzag(paddleX - previous))
+        previous = paddleX
+    writeVarint(out, sentMs)
+    writeVarint(out, 0 if echoMs is None else echoMs + 1)
+    writeVarint(out, heldMs)
+    if checksum is None:
+        out.append(0)
+    else:
+        writeVarint(out, checksum[0] + 1)
+        out += checksum[1].to_bytes(4, "little")
+    return bytes(out)
+
+def decodePacket(data):
+    '''
+    Reads a packet built by encodePacket. The inputs come back as changes, since turning them into
+    positions needs the receiver's copy of the input before the batch.
+
+    Parameters:
+        data (bytes): The packet
+
+    Return value: A dictionary with the packet's fields, or None if it is not a lockstep packet
+
+    Sample call: packet = decodePacket(data)
+    '''
+    if len(data) < 2 or data[0] != MAGIC:
+        return None
+    packet = {"player": data[1]}
+    offset = 2
+    packet["nextWanted"], offset = readVarint(data, offset)
+    packet["start"], offset = readVarint(data, offset)
+    count, offset = readVarint(data, offset)
+    deltas = []
+    for _ in range(count):
+        encoded, offset = readVarint(data, offset)
+        deltas.append(unzigzag(encoded))
+    packet["deltas"] = deltas
+    packet["sentMs"], offset = readVarint(data, offset)
+    echo, offset = readVarint(data, offset)
+    packet["echoMs"] = echo - 1 if echo else None
+    packet["heldMs"], offset = readVarint(data, offset)
+    checksumTick, offset = readVarint(data, offset)
+    if checksumTick:
+        packet["checksum"] = (checksumTick - 1, int.from_bytes(data[offset:offset + 4], "little"))
+    else:
+        packet["checksum"] = None
+    return packet
+
+def percentile(values, share):
+    '''
+    Returns the nearest-rank percentile of a list of numbers
+
+    Parameters:
+        values (list): The numbers, in any order
+        share (float): The percentile as a fraction, such as 0.99
+
+    Return value: The value at that percentile, or None for an empty list
+
+    Sample call: p99 = percentile(roundTrips, 0.99)
+    '''
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+class LockstepPeer:
+    '''
+    One player's end of a lockstep game. Each local input is scheduled delay ticks ahead, which gives
+    it that long to reach the other peer before anyone needs it. Every packet carries all the local
+    inputs the peer has not acknowledged yet, so a lost packet is covered by the next one. The World
+    is only stepped once both players' inputs for the tick are in, so both copies see exactly the
+    same inputs and stay identical. Every checksumInterval ticks the state is hashed and the hashes
+    are compared to catch a desync.
+
+    Attributes:
+        world (object): This peer's copy of the World, built with one paddle per player
+        player (int): This peer's player number, 0 or 1
+        socket (object): A non-blocking UDP socket bound to this peer's address
+        peer (tuple): The other peer's (host, port)
+        delay (int): How many ticks ahead local inputs are scheduled
+        checksumInterval (int): Ticks between state checksums
+        dropRate (float): The share of outgoing packets thrown away on purpose, to test loss
+        inputs (list): Two lists, the paddle positions for each player, indexed by tick
+        peerNext (int): The first tick the peer has not acknowledged a local input for
+        checksums (dictionary): This peer's checksum for each checked tick not yet compared
+        peerChecksums (dictionary): The peer's checksums not yet compared
+        outgoingChecksum (tuple): The latest local (tick, checksum), sent with the next few packets
+        echo (tuple): The peer's latest sentMs and the time it arrived, echoed back to measure round trips
+        lastEcho (int): The latest of this peer's sentMs values the peer has echoed
+        roundTrips (list): Round-trip times in milliseconds
+        desyncTick (int): The first tick whose checksums differed, or None
+        stats (dictionary): Packet, byte and stall counts
+
+    Methods:
+        __init__: Instantiates the LockstepPeer object
+        advance: Schedules a local input and steps the World if both inputs for the next tick are in
+        pump: Reads every waiting packet and sends the unacknowledged local inputs
+        isSettled: Returns whether the peer has acknowledged every local input
+        getWorld: Returns the world attribute
+        getDesyncTick: Returns the desyncTick attribute
+        getMetrics: Returns bandwidth, latency and stall figures
+        close: Closes the socket
+    '''
+    # Constructor
+    def __init__(self, world, player, address, peer, delay=3, checksumInterval=60, dropRate=0.0, seed=None):
+        '''
+        Instantiates the LockstepPeer object and binds its socket
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+            world (object): A World with two paddles, built the same way by both peers
+            player (int): This peer's player number, 0 or 1
+            address (tuple): The (host, port) to bind
+            peer (tuple): The other peer's (host, port)
+            delay (int): How many ticks ahead local inputs are scheduled, at least 1. It should cover the
+            round trip.
+            checksumInterval (int): Ticks between state checksums
+            dropRate (float): The share of outgoing packets to throw away, to test packet loss
+            seed (int): Seed for picking which packets to throw away
+
+        Return value: None
+
+        Sample call: peer = LockstepPeer(world, 0, ("127.0.0.1", 5000), ("127.0.0.1", 5001))
+        '''
+        if delay < 1:
+            raise ValueError("the input delay must be at least one tick")
+        self.__world = world
+        self.__player = player
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.bind(address)
+        self.__socket.setblocking(False)
+        self.__peer = peer
+        self.__delay = delay
+        self.__checksumInterval = checksumInterval
+        self.__dropRate = dropRate
+        self.__dropRng = random.Random(seed)
+        # Both peers start both paddles in the middle for the first delay ticks, so those are never sent
+        start = int(world.getSize()[0] / 2)
+        self.__inputs = [[start] * delay, [start] * delay]
+        self.__peerNext = delay
+        self.__checksums = {}
+        self.__peerChecksums = {}
+        self.__outgoingChecksum = None
+        self.__checksumSends = 0
+        self.__echo = None
+        self.__lastEcho = None
+        self.__roundTrips = []
+        self.__desyncTick = None
+        self.__clockStart = time.perf_counter()
+        self.__stats = {"packetsSent": 0, "packetsReceived": 0, "packetsDropped": 0, "bytesSent": 0, \
+                        "inputsSent": 0, "stalls": 0, "checksumsMatched": 0}
+    def advance(self, paddleX):
+        '''
+        Schedules this player's paddle position for delay ticks from now, then steps the World if
+        both players' inputs for the current tick have arrived. While the peer's input is missing the
+        World waits and the position is not used, so the caller should sample it again next frame.
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+            paddleX (int/float): This player's paddle position, rounded to a whole pixel
+
+        Return value: True if the World was stepped, False if it is waiting on the peer
+
+        Sample call: if not peer.advance(pygame.mouse.get_pos()[0]): stalledFrames += 1
+        '''
+        world = self.__world
+        tick = world.getTick()
+        local = self.__inputs[self.__player]
+        remote = self.__inputs[1 - self.__player]
+        if len(local) <= tick + self.__delay:
+            local.append(int(round(paddleX)))
+        if len(remote) <= tick:
+            self.__stats["stalls"] += 1
+            return False
+        world.step((self.__inputs[0][tick], self.__inputs[1][tick]))
+        if world.getTick() % self.__checksumInterval == 0:
+            checksum = int(stateDigest(world)[:8], 16)
+            self.__checksums[world.getTick()] = checksum
+            self.__outgoingChecksum = (world.getTick(), checksum)
+            self.__checksumSends = CHECKSUM_REPEATS
+            self.__compareChecksums()
+        return True
+    def pump(self):
+        '''
+        Reads every packet waiting on the socket, then sends the peer every local input it has not
+        acknowledged yet
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: None
+
+        Sample call: peer.pump()
+        '''
+        remote = self.__inputs[1 - self.__player]
+        while True:
+            try:
+                data, sender = self.__socket.recvfrom(2048)
+            except (BlockingIOError, ConnectionRefusedError):
+                break
+            packet = decodePacket(data)
+            if packet is None or packet["player"] == self.__player:
+                continue
+            self.__stats["packetsReceived"] += 1
+            now = self.__milliseconds()
+            self.__peerNext = max(self.__peerNext, packet["nextWanted"])
+            # Inputs already received are skipped, and the rest follow on from the last known one
+            start = packet["start"]
+            if start <= len(remote):
+                value = remote[start - 1]
+                for offset, delta in enumerate(packet["deltas"]):
+                    value += delta
+                    if start + offset == len(remote):
+                        remote.append(value)
+            if self.__echo is None or packet["sentMs"] > self.__echo[0]:
+                self.__echo = (packet["sentMs"], now)
+            # Each of this peer's packets is timed once, by the first reply that echoes it
+            if packet["echoMs"] is not None and packet["echoMs"] != self.__lastEcho:
+                self.__lastEcho = packet["echoMs"]
+                self.__roundTrips.append(now - packet["echoMs"] - packet["heldMs"])
+            if packet["checksum"] is not None:
+                self.__peerChecksums[packet["checksum"][0]] = packet["checksum"][1]
+                self.__compareChecksums()
+        self.__send(len(remote))
+    def __send(self, nextWanted):
+        '''
+        Sends one packet with the local inputs the peer still needs
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+            nextWanted (int): The first tick this peer does not have the peer's input for
+
+        Return value: None
+        '''
+        local = self.__inputs[self.__player]
+        start = self.__peerNext
+        batch = local[start:start + MAX_BATCH]
+        now = self.__milliseconds()
+        echoMs, heldMs = None, 0
+        if self.__echo is not None:
+            echoMs = self.__echo[0]
+            heldMs = now - self.__echo[1]
+        checksum = None
+        if self.__checksumSends > 0:
+            checksum = self.__outgoingChecksum
+            self.__checksumSends -= 1
+        data = encodePacket(self.__player, nextWanted, start, batch, local[start - 1], now, echoMs, heldMs, checksum)
+        stats = self.__stats
+        stats["packetsSent"] += 1
+        stats["bytesSent"] += len(data)
+        stats["inputsSent"] += len(batch)
+        if self.__dropRate and self.__dropRng.random() < self.__dropRate:
+            stats["packetsDropped"] += 1
+            return
+        try:
+            self.__socket.sendto(data, self.__peer)
+        except ConnectionRefusedError:
+            # The peer is not listening yet, and the inputs go out again with the next packet
+            pass
+    def __compareChecksums(self):
+        '''
+        Compares every tick both peers have a checksum for, and records the first one that differs
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: None
+        '''
+        for tick in [tick for tick in self.__peerChecksums if tick in self.__checksums]:
+            if self.__checksums.pop(tick) == self.__peerChecksums.pop(tick):
+                self.__stats["checksumsMatched"] += 1
+            elif self.__desyncTick is None or tick < self.__desyncTick:
+                self.__desyncTick = tick
+    def __milliseconds(self):
+        '''
+        Returns the whole milliseconds since this peer started
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: An integer time
+        '''
+        return int((time.perf_counter() - self.__clockStart) * 1000)
+    # Getters
+    def isSettled(self):
+        '''
+        Returns whether the peer has acknowledged every local input scheduled so far, so leaving now
+        cannot keep it waiting
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: A boolean
+
+        Sample call: while not peer.isSettled(): peer.pump()
+        '''
+        return self.__peerNext >= len(self.__inputs[self.__player])
+    def getWorld(self):
+        '''
+        Returns this peer's copy of the World
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: A World object
+
+        Sample call: world = peer.getWorld()
+        '''
+        return self.__world
+    def getDesyncTick(self):
+        '''
+        Returns the first tick whose state checksums differed between the peers
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: A tick, or None if every compared checksum matched
+
+        Sample call: if peer.getDesyncTick() is not None: print("desync")
+        '''
+        return self.__desyncTick
+    def getMetrics(self):
+        '''
+        Returns how much the game sent, how long round trips took and how often it waited on the peer
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: A dictionary with the packet, byte and stall counts, the bytes sent per tick with
+        and without IP and UDP headers, the average inputs per packet and the round-trip percentiles in
+        milliseconds
+
+        Sample call: print(peer.getMetrics())
+        '''
+        metrics = dict(self.__stats)
+        ticks = max(1, self.__world.getTick())
+        packets = max(1, metrics["packetsSent"])
+        metrics["ticks"] = self.__world.getTick()
+        metrics["bytesPerTick"] = metrics["bytesSent"] / ticks
+        metrics["wireBytesPerTick"] = (metrics["bytesSent"] + HEADER_BYTES * metrics["packetsSent"]) / ticks
+        metrics["inputsPerPacket"] = metrics["inputsSent"] / packets
+        metrics["roundTripMs"] = {"p50": percentile(self.__roundTrips, 0.5), \
+                                  "p90": percentile(self.__roundTrips, 0.9), \
+                                  "p99": percentile(self.__roundTrips, 0.99), \
+                                  "max": max(self.__roundTrips) if self.__roundTrips else None}
+        metrics["desyncTick"] = self.__desyncTick
+        return metrics
+    # Setter
+    def close(self):
+        '''
+        Closes the socket
+
+        Parameters:
+            self (object): The LockstepPeer object itself
+
+        Return value: None
+
+        Sample call: peer.close()
+        '''
+        self.__socket.close()
+
+def parseAddress(text):
+    '''
+    Turns "host:port" or just "port" into a (host, port) tuple, with localhost as the default host
+
+    Parameters:
+        text (string): The address
+
+    Return value: A (host, port) tuple
+
+    Sample call: peer = parseAddress("127.0.0.1:5001")
+    '''
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+def followGold(world, player):
+    '''
+    A scripted player for headless games: keeps its paddle under the gold ball, player 0 a little to
+    the left of it and player 1 a little to the right
+
+    Parameters:
+        world (object): The World to look at
+        player (int): The player number
+
+    Return value: A paddle position
+
+    Sample call: paddleX = followGold(world, 1)
+    '''
+    balls = world.getBalls()
+    if not balls:
+        return world.getSize()[0] / 2
+    return balls[0].getLoc()[0] + (-60 if player == 0 else 60)
+
+def play(args):
+    '''
+    Plays one peer's side of a game until it ends, the tick limit is reached or the window is closed,
+    then waits for the peer to have every input it needs
+
+    Parameters:
+        args (object): The parsed command line
+
+    Return value: The peer's metrics with the final state digest added
+
+    Sample call: metrics = play(parser.parse_args())
+    '''
+    world = World(seed=args.seed, collisionMode=args.collisions, paddleCount=2)
+    peer = LockstepPeer(world, args.player, parseAddress(args.port), parseAddress(args.peer), args.delay, \
+                        args.checksum_every, args.drop, args.seed * 2 + args.player)
+    surface = None
+    if not args.headless:
+        import pygame
+        from text import CounterText
+        pygame.init()
+        width, height = world.getSize()
+        surface = pygame.display.set_mode((width, height))
+        pygame.display.set_caption("Player " + str(args.player + 1))
+        scoreBoard = CounterText("Number of green balls: ", 0, 10, 10)
+        fpsClock = pygame.time.Clock()
+    frameTime = 1 / args.rate
+    nextFrame = time.perf_counter()
+    running = True
+    while running and world.getTick() < args.ticks and not (world.isWon() or world.isLost()):
+        if surface is None:
+            paddleX = followGold(world, args.player)
+        else:
+            paddleX = pygame.mouse.get_pos()[0]
+        peer.pump()
+        peer.advance(paddleX)
+        if peer.getDesyncTick() is not None:
+            break
+        if surface is not None:
+            surface.fill((255, 255, 255))
+            for paddle in world.getPaddles():
+                paddle.draw(surface)
+            for ball in world.getBalls():
+                ball.draw(surface)
+            if scoreBoard.getValue() != world.getScore():
+                scoreBoard.setValue(world.getScore())
+            scoreBoard.draw(surface)
+            pygame.display.update()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            fpsClock.tick(args.rate)
+        else:
+            nextFrame += frameTime
+            time.sleep(max(0.0, nextFrame - time.perf_counter()))
+    # Keeps answering until the peer has every input, so it can finish the same ticks
+    deadline = time.perf_counter() + 2.0
+    while not peer.isSettled() and time.perf_counter() < deadline:
+        peer.pump()
+        time.sleep(frameTime)
+    metrics = peer.getMetrics()
+    metrics["player"] = args.player
+    metrics["digest"] = stateDigest(world)
+    peer.close()
+    if surface is not None:
+        pygame.quit()
+    return metrics
+
+def freePort():
+    '''
+    Asks the operating system for a UDP port that is not in use
+
+    Parameters: None
+
+    Return value: A port number
+
+    Sample call: port = freePort()
+    '''
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+def selfTest(args):
+    '''
+    Starts both peers as headless processes on this machine, waits for them and checks that they
+    ended in exactly the same state
+
+    Parameters:
+        args (object): The parsed command line
+
+    Return value: True if both peers finished with the same digest and no desync
+
+    Sample call: ok = selfTest(args)
+    '''
+    ports = [freePort(), freePort()]
+    children = []
+    for player in (0, 1):
+        command = [sys.executable, os.path.abspath(__file__), "--player", str(player), \
+                   "--port", str(ports[player]), "--peer", str(ports[1 - player]), "--seed", str(args.seed), \
+                   "--delay", str(args.delay), "--ticks", str(args.ticks), "--rate", str(args.rate), \
+                   "--checksum-every", str(args.checksum_every), "--drop", str(args.drop), \
+                   "--collisions", args.collisions, "--headless", "--json"]
+        children.append(subprocess.Popen(command, stdout=subprocess.PIPE, text=True))
+    results = [json.loads(child.communicate()[0].strip().splitlines()[-1]) for child in children]
+    for result in results:
+        trips = result["roundTripMs"]
+        print("Player %d: %d ticks, %.1f bytes/tick (%.1f with headers), %.2f inputs/packet, %d stalls, " \
+              "%d/%d packets dropped, %d checksums matched, round trip p50 %s p90 %s p99 %s max %s ms" % \
+              (result["player"] + 1, result["ticks"], result["bytesPerTick"], result["wireBytesPerTick"], \
+               result["inputsPerPacket"], result["stalls"], result["packetsDropped"], result["packetsSent"], \
+               result["checksumsMatched"], trips["p50"], trips["p90"], trips["p99"], trips["max"]))
+    same = results[0]["digest"] == results[1]["digest"] and results[0]["ticks"] == results[1]["ticks"]
+    synced = results[0]["desyncTick"] is None and results[1]["desyncTick"] is None
+    print("Same final state:", same, " No desync:", synced)
+    return same and synced
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play one shared ball field with two paddles over UDP.")
+    parser.add_argument("--selftest", action="store_true", help="run both peers headless on this machine and compare them")
+    parser.add_argument("--player", type=int, choices=[0, 1], default=0, help="this peer's player number")
+    parser.add_argument("--port", default="5000", help="[host:]port to listen on")
+    parser.add_argument("--peer", default="5001", help="[host:]port of the other player")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the shared World (both players must match)")
+    parser.add_argument("--delay", type=int, default=3, help="ticks of input delay")
+    parser.add_argument("--ticks", type=int, default=600, help="stop after this many ticks")
+    parser.add_argument("--rate", type=int, default=60, help="ticks per second")
+    parser.add_argument("--checksum-every", type=int, default=60, help="ticks between state checksums")
+    parser.add_argument("--drop", type=float, default=0.0, help="share of outgoing packets to drop, to test loss")
+    parser.add_argument("--collisions", choices=["discrete", "swept"], default="discrete", help="collision mode")
+    parser.add_argument("--headless", action="store_true", help="no window; the paddle follows the gold ball")
+    parser.add_argument("--json", action="store_true", help="print the metrics as JSON")
+    args = parser.parse_args()
+
+    if args.selftest:
+        sys.exit(0 if selfTest(args) else 1)
+    if not args.headless:
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    metrics = play(args)
+    if args.json:
+        print(json.dumps(metrics))
+    else:
+        print("Lockstep:", metrics)
+    if metrics["desyncTick"] is not None:
+        print("Desync detected at tick", metrics["desyncTick"])
+        sys.exit(1)
@@ -0,0 +1,462 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Bricks and walls that stay put for a whole level, kept in a bounding volume hierarchy
+# that is packed once when the level is built and can then quickly say which of them a moving ball might hit
+
+import math
+from drawable import Drawable
+
+# The most bricks in a leaf of the hierarchy and the most children of any other node
+NODE_SIZE = 8
+
+class Brick(Drawable):
+    '''
+    A rectangle that balls bounce off. Breakable bricks are removed when a ball hits them.
+
+    Parameters:
+        Drawable (base class): Instantiated in constructor
+
+    Attributes:
+        width (int/float): The width of the brick
+        height (int/float): The height of the brick
+        color (tuple): An RGB tuple that sets the color of the brick
+        breakable (boolean): Whether a hit removes the brick
+
+    Methods:
+        __init__: Instantiates the Brick object
+        draw: Draws the brick to a surface
+        get_rect: Instantiates a pygame.Rect object that covers the brick
+        makeBounds: Works out the edges of the brick's rectangle without building a Rect
+        getColor: Returns the color attribute
+        isBreakable: Returns the breakable attribute
+    '''
+    __slots__ = ("__width", "__height", "__color", "__breakable")
+    # Constructor
+    def __init__(self, left, top, width, height, color=(0, 0, 0), breakable=True):
+        '''
+        Instantiates the Brick object. Unlike the Paddle, a Brick's location is its top-left corner.
+
+        Parameters:
+            self (object): The Brick object itself
+            left (int/float): The left edge of the brick
+            top (int/float): The top edge of the brick
+            width (int/float): The width of the brick
+            height (int/float): The height of the brick
+            color (tuple): An RGB tuple that sets the color of the brick
+            breakable (boolean): Whether a hit removes the brick
+
+        Return value: None
+
+        Sample call: brick = Brick(100, 80, 60, 20, DREXEL_BLUE)
+        '''
+        super().__init__(left, top)
+        self.__width = width
+        self.__height = height
+        self.__color = color
+        self.__breakable = breakable
+    def draw(self, surface):
+        '''
+        Draws the brick onto a surface if it is visible
+
+        Parameters:
+            self (object): The Brick object itself
+            surface (object): The surface to draw on
+
+        Return value: None
+
+        Sample call: brick.draw(surface)
+        '''
+        if self.isVisible():
+            import pygame
+            pygame.draw.rect(surface, self.__color, self.get_rect())
+    # Getters
+    def get_rect(self):
+        '''
+        Instantiates and returns a pygame.Rect object that covers the brick
+
+        Parameters:
+            self (object): The Brick object itself
+
+        Return value: A pygame.Rect object
+
+        Sample call: rect = brick.get_rect()
+        '''
+        import pygame
+        left, top = self.getLoc()
+        return pygame.Rect(left, top, self.__width, self.__height)
+    def makeBounds(self):
+        '''
+        Works out the edges of the rectangle get_rect would build, rounding toward zero as pygame.Rect does
+
+        Parameters:
+            self (object): The Brick object itself
+
+        Return value: A tuple of four integers (left, top, right, bottom)
+
+        Sample call: bounds = brick.makeBounds()
+        '''
+        left, top = self.getLoc()
+        left = int(left)
+        top = int(top)
+        return (left, top, left + int(self.__width), top + int(self.__height))
+    def getColor(self):
+        '''
+        Returns the brick's color
+
+        Parameters:
+            self (object): The Brick object itself
+
+        Return value: An RGB tuple
+
+        Sample call: color = brick.getColor()
+        '''
+        return self.__color
+    def isBreakable(self):
+        '''
+        Returns whether a hit removes the brick
+
+        Parameters:
+            self (object): The Brick object itself
+
+        Return value: Boolean indicating whether the brick can be broken
+
+        Sample call: if brick.isBreakable(): layer.remove(brick)
+        '''
+        return self.__breakable
+
+class ObstacleLayer:
+    '''
+    Holds a level's obstacles in a bounding volume hierarchy. The hierarchy is bulk-loaded with
+    sort-tile-recursive packing: the obstacles are sorted into vertical strips by their centers, each
+    strip is sorted top to bottom and cut into full leaves, and the same is done to the leaves to build
+    each level above until one root is left. Every node is full, so a query only descends into the
+    few nodes whose boxes overlap what it asks about.
+
+    Removed obstacles are only marked as removed. Each node counts the obstacles still alive beneath it,
+    so subtrees that have been cleared are skipped without the hierarchy ever being rebuilt.
+
+    Attributes:
+        obstacles (list): Every obstacle, in leaf order
+        alive (list): Whether each obstacle in obstacles is still in the level
+        positions (dictionary): Each obstacle's index in obstacles
+        nodeBounds (list): The (left, top, right, bottom) box of each node
+        nodeItems (list): The child nodes of each node as a tuple, or for a leaf the range of its
+        positions in obstacles
+        nodeLeaf (list): Whether each node is a leaf
+        nodeLive (list): The number of obstacles still alive beneath each node
+        parents (list): The parent of each node, or -1 for the root
+        leafOf (list): The leaf each obstacle is in
+        root (int): The index of the root node, or -1 when there are no obstacles
+        nodesVisited (int): The running total of nodes looked at by queries
+
+    Methods:
+        __init__: Builds the hierarchy over a list of obstacles
+        query: Returns the obstacles whose rectangles overlap a box
+        querySwept: Returns the obstacles a moving ball's box could overlap during its motion
+        remove: Takes an obstacle out of the level
+        draw: Draws every obstacle still in the level
+        getObstacles: Returns the obstacles still in the level
+        getLiveCount: Returns the number of obstacles still in the level
+        getDepth: Returns the number of levels in the hierarchy
+        getNodesVisited: Returns the nodesVisited attribute
+        getState: Copies which obstacles have been removed
+        setState: Puts back which obstacles have been removed
+    '''
+    # Constructor
+    def __init__(self, obstacles):
+        '''
+        Packs the obstacles into the hierarchy. This is done once per level.
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            obstacles (list): Drawables that will not move, such as Bricks
+
+        Return value: None
+
+        Sample call: layer = ObstacleLayer(makeBrickWall(800, 600, 6, 12))
+        '''
+        self.__nodeBounds = []
+        self.__nodeItems = []
+        self.__nodeLeaf = []
+        self.__nodeLive = []
+        self.__parents = []
+        self.__nodesVisited = 0
+        # The leaves hold the obstacles in the order the packing puts them in
+        entries = [(obstacle.getBounds(), obstacle) for obstacle in obstacles]
+        groups = self.__pack(entries)
+        self.__obstacles = []
+        self.__leafOf = []
+        level = []
+        for group in groups:
+            first = len(self.__obstacles)
+            node = self.__addNode(group, range(first, first + len(group)), True)
+            for bounds, obstacle in group:
+                self.__obstacles.append(obstacle)
+                self.__leafOf.append(node)
+            level.append((self.__nodeBounds[node], node))
+        self.__alive = [True] * len(self.__obstacles)
+        self.__positions = {obstacle: index for index, obstacle in enumerate(self.__obstacles)}
+        self.__depth = 1 if level else 0
+        # Each level above packs the nodes of the level below in the same way
+        while len(level) > 1:
+            upper = []
+            for group in self.__pack(level):
+                node = self.__addNode(group, tuple(child for bounds, child in group), False)
+                for bounds, child in group:
+                    self.__parents[child] = node
+                upper.append((self.__nodeBounds[node], node))
+            level = upper
+            self.__depth += 1
+        self.__root = level[0][1] if level else -1
+    def __pack(self, entries):
+        '''
+        Groups boxes into runs of at most NODE_SIZE with sort-tile-recursive packing, keeping the
+        groups in the order their members should be stored
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            entries (list): (bounds, payload) tuples
+
+        Return value: A list of groups, each a list of (bounds, payload) tuples
+        '''
+        if not entries:
+            return []
+        leaves = math.ceil(len(entries) / NODE_SIZE)
+        strips = math.ceil(math.sqrt(leaves))
+        perStrip = strips * NODE_SIZE
+        ordered = sorted(entries, key=lambda entry: entry[0][0] + entry[0][2])
+        groups = []
+        for start in range(0, len(ordered), perStrip):
+            strip = sorted(ordered[start:start + perStrip], key=lambda entry: entry[0][1] + entry[0][3])
+            for first in range(0, len(strip), NODE_SIZE):
+                groups.append(strip[first:first + NODE_SIZE])
+        return groups
+    def __addNode(self, group, items, leaf):
+        '''
+        Adds a node whose box covers every box in a group
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            group (list): (bounds, payload) tuples the node covers
+            items (object): The range of the leaf's obstacles, or a tuple of the node's children
+            leaf (boolean): Whether the node is a leaf
+
+        Return value: The new node's index
+        '''
+        node = len(self.__nodeBounds)
+        self.__nodeBounds.append((min(bounds[0] for bounds, payload in group), \
+                                  min(bounds[1] for bounds, payload in group), \
+                                  max(bounds[2] for bounds, payload in group), \
+                                  max(bounds[3] for bounds, payload in group)))
+        self.__nodeItems.append(items)
+        self.__nodeLeaf.append(leaf)
+        self.__nodeLive.append(len(group) if leaf else sum(self.__nodeLive[payload] for bounds, payload in group))
+        self.__parents.append(-1)
+        return node
+    def query(self, box):
+        '''
+        Returns every obstacle still in the level whose rectangle overlaps a box. Boxes that only
+        share an edge do not overlap, which matches Drawable.intersects.
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            box (tuple): The (left, top, right, bottom) box to test
+
+        Return value: A list of obstacles
+
+        Sample call: hits = layer.query(ball.getBounds())
+        '''
+        found = []
+        if self.__root < 0:
+            return found
+        left, top, right, bottom = box
+        nodeBounds = self.__nodeBounds
+        nodeItems = self.__nodeItems
+        nodeLeaf = self.__nodeLeaf
+        nodeLive = self.__nodeLive
+        obstacles = self.__obstacles
+        alive = self.__alive
+        visited = 0
+        stack = [self.__root]
+        while stack:
+            node = stack.pop()
+            visited += 1
+            if nodeLive[node] == 0:
+                continue
+            nodeLeft, nodeTop, nodeRight, nodeBottom = nodeBounds[node]
+            if left >= nodeRight or right <= nodeLeft or top >= nodeBottom or bottom <= nodeTop:
+                continue
+            if not nodeLeaf[node]:
+                stack.extend(nodeItems[node])
+                continue
+            for index in nodeItems[node]:
+                if alive[index]:
+                    obstacleLeft, obstacleTop, obstacleRight, obstacleBottom = obstacles[index].getBounds()
+                    if left < obstacleRight and right > obstacleLeft and top < obstacleBottom and bottom > obstacleTop:
+                        found.append(obstacles[index])
+        self.__nodesVisited += visited
+        return found
+    def querySwept(self, box, dx, dy):
+        '''
+        Returns every obstacle still in the level that a box could overlap while moving in a straight
+        line, by querying the box that covers the whole motion
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            box (tuple): The moving (left, top, right, bottom) box at the start of the motion
+            dx (float): How far the box travels horizontally
+            dy (float): How far the box travels vertically
+
+        Return value: A list of obstacles
+
+        Sample call: hits = layer.querySwept(ballBox(ball), ball.getXSpeed(), ball.getYSpeed())
+        '''
+        left, top, right, bottom = box
+        return self.query((min(left, left + dx), min(top, top + dy), max(right, right + dx), max(bottom, bottom + dy)))
+    def remove(self, obstacle):
+        '''
+        Takes an obstacle out of the level. Only the live counts on the path to the root change, so
+        this costs one step per level of the hierarchy.
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            obstacle (object): The obstacle to remove
+
+        Return value: Boolean of whether the obstacle was still in the level
+
+        Sample call: layer.remove(brick)
+        '''
+        index = self.__positions.get(obstacle)
+        if index is None or not self.__alive[index]:
+            return False
+        self.__alive[index] = False
+        node = self.__leafOf[index]
+        while node >= 0:
+            self.__nodeLive[node] -= 1
+            node = self.__parents[node]
+        return True
+    def draw(self, surface):
+        '''
+        Draws every obstacle still in the level
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            surface (object): The surface to draw on
+
+        Return value: None
+
+        Sample call: layer.draw(surface)
+        '''
+        for obstacle in self.getObstacles():
+            obstacle.draw(surface)
+    # Getters
+    def getObstacles(self):
+        '''
+        Returns the obstacles still in the level
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+
+        Return value: A new list of obstacles
+
+        Sample call: drawables = [paddle] + layer.getObstacles()
+        '''
+        alive = self.__alive
+        return [obstacle for index, obstacle in enumerate(self.__obstacles) if alive[index]]
+    def getLiveCount(self):
+        '''
+        Returns the number of obstacles still in the level
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+
+        Return value: An integer count
+
+        Sample call: if layer.getLiveCount() == 0: ...
+        '''
+        return self.__nodeLive[self.__root] if self.__root >= 0 else 0
+    def getDepth(self):
+        '''
+        Returns the number of levels in the hierarchy, counting the leaves
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+
+        Return value: An integer depth
+
+        Sample call: depth = layer.getDepth()
+        '''
+        return self.__depth
+    def getNodesVisited(self):
+        '''
+        Returns how many nodes queries have looked at so far
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+
+        Return value: An integer running total
+
+        Sample call: profiler.addCounter("nodesVisited", layer.getNodesVisited)
+        '''
+        return self.__nodesVisited
+    def getState(self):
+        '''
+        Copies which obstacles have been removed, for World snapshots
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+
+        Return value: A tuple that can be passed to setState
+
+        Sample call: state = layer.getState()
+        '''
+        return (tuple(self.__alive), tuple(self.__nodeLive))
+    # Setter
+    def setState(self, state):
+        '''
+        Puts back which obstacles have been removed, as returned by getState
+
+        Parameters:
+            self (object): The ObstacleLayer object itself
+            state (tuple): A tuple returned by getState
+
+        Return value: None
+
+        Sample call: layer.setState(state)
+        '''
+        alive, nodeLive = state
+        self.__alive = list(alive)
+        self.__nodeLive = list(nodeLive)
+
+def makeBrickWall(width, height, rows, columns=12, top=60, brickHeight=20, gap=4, color=(7, 41, 77)):
+    '''
+    Builds rows of breakable bricks spread across the play area, with an unbreakable wall piece at
+    each end of every other row
+
+    Parameters:
+        width (int): The width of the play area
+        height (int): The height of the play area
+        rows (int): The number of rows of bricks
+        columns (int): The number of bricks in each row
+        top (int): The top edge of the first row
+        brickHeight (int): The height of each brick
+        gap (int): The space between bricks
+        color (tuple): An RGB tuple for the breakable bricks
+
+    Return value: A list of Brick objects
+
+    Sample call: layer = ObstacleLayer(makeBrickWall(800, 600, 4, 10))
+    '''
+    GRAY = (128, 128, 128)
+    brickWidth = (width - gap * (columns + 1)) / columns
+    bricks = []
+    for row in range(rows):
+        y = top + row * (brickHeight + gap)
+        for column in range(columns):
+            x = gap + column * (brickWidth + gap)
+            ends = column == 0 or column == columns - 1
+            if row % 2 == 1 and ends:
+                bricks.append(Brick(x, y, brickWidth, brickHeight, GRAY, False))
+            else:
+                bricks.append(Brick(x, y, brickWidth, brickHeight, color))
+    return bricks
\ No newline at end of file
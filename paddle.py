@@ -2,7 +2,7 @@
 # 05/14/2024
 # Program Description: A class to provide a blueprint to make a paddle object
 
-import pygame
+# pygame is only imported where the paddle is drawn or follows the mouse, so the physics can run without it
 from drawable import Drawable
 
 class Paddle(Drawable):
@@ -17,14 +17,22 @@ class Paddle(Drawable):
         color (tuple): An RGB tuple that sets the color of the object
         width (int): The width of the paddle
         height (int): The height of the paddle
+        screenWidth (int): The width of the area the paddle moves in
+        screenHeight (int): The height of the area the paddle moves in
+        followMouse (boolean): Whether the paddle follows the mouse or is placed with setX
+        rect (object): The last rectangle built for the paddle, reused until the paddle moves
+        rectBounds (tuple): The edges of that rectangle, handed out by getBounds
     
     Methods:
         __init__: Instantiates the Paddle class
         draw: Draws the rectangle object that defines the paddle to the display
         get_rect: Instantiates the rectangle object for the paddle
+        getBounds: Returns the edges of the paddle's rectangle
     '''
+    __slots__ = ("__color", "__width", "__height", "__screenHeight", "__followMouse", "__rect", \
+                 "__rectX", "__rectBounds")
     # Constructor
-    def __init__(self, width, height, color):
+    def __init__(self, width, height, color, screenWidth=None, screenHeight=None, followMouse=True):
         '''
         Instantiates the base class Drawable as well as Paddle
         
@@ -33,17 +41,30 @@ class Paddle(Drawable):
             width (int): The width of the paddle
             height (int): The height of the paddle
             color (tuple): An RGB tuple that sets the color of the object
+            screenWidth (int): The width of the area the paddle moves in. If no argument is passed,
+            the display surface's width is used.
+            screenHeight (int): The height of the area the paddle moves in. If no argument is passed,
+            the display surface's height is used.
+            followMouse (boolean): If True, the paddle is placed under the mouse. If False, the paddle's
+            horizontal center is whatever was last passed to setX.
             
         Return value: None
         
         Sample call: paddle1 = Paddle(1,2,(DREXEL_BLUE))
         '''
-        surface = pygame.display.get_surface()
-        screenWidth, screenHeight = surface.get_size()
+        if screenWidth is None or screenHeight is None:
+            import pygame
+            surface = pygame.display.get_surface()
+            screenWidth, screenHeight = surface.get_size()
         super().__init__(screenWidth/2, screenHeight/2)
         self.__color = color
         self.__width = width
         self.__height = height
+        self.__screenHeight = screenHeight
+        self.__followMouse = followMouse
+        self.__rect = None
+        self.__rectX = None
+        self.__rectBounds = None
     def draw(self, surface):
         '''
         Draws the paddle object to the surface in the form of a rectangle
@@ -56,6 +77,7 @@ class Paddle(Drawable):
         
         Sample call: paddle1.draw(surface)
         '''
+        import pygame
         pygame.draw.rect(surface, self.__color, self.get_rect())
     # Getter
     def get_rect(self):
@@ -67,11 +89,37 @@ class Paddle(Drawable):
             self (object): The Paddle object itself
             
         Return value: A rectangle object that covers the area of the Paddle, whose position
-        is based on the user's mouse's horizontal position
+        is based on the user's mouse's horizontal position (or the paddle's x attribute when it
+        does not follow the mouse). The same rectangle is handed back until the paddle moves, so
+        it should not be changed in place.
         '''
-        surface = pygame.display.get_surface()
-        screenWidth, screenHeight = surface.get_size()
-        mouseX = pygame.mouse.get_pos()[0]
-        return pygame.Rect(mouseX - (self.__width/2), screenHeight - 20 - self.__height, \
-                           self.__width, self.__height)
-    
\ No newline at end of file
+        left, top, right, bottom = self.getBounds()
+        if self.__rect is None:
+            import pygame
+            self.__rect = pygame.Rect(left, top, right - left, bottom - top)
+        return self.__rect
+    def getBounds(self):
+        '''
+        Returns the edges of the paddle's rectangle, rounded toward zero as pygame.Rect does. They
+        follow the mouse as well as setX, so they are kept alongside the cached rectangle
+        instead of in Drawable, and no Rect is built until the paddle is drawn.
+        
+        Parameters:
+            self (object): The Paddle object itself
+            
+        Return value: A tuple of four integers (left, top, right, bottom)
+        
+        Sample call: left, top, right, bottom = paddle1.getBounds()
+        '''
+        if not self.__followMouse:
+            paddleX = self.getLoc()[0]
+        else:
+            import pygame
+            paddleX = pygame.mouse.get_pos()[0]
+        if paddleX != self.__rectX:
+            left = int(paddleX - (self.__width/2))
+            top = int(self.__screenHeight - 20 - self.__height)
+            self.__rectBounds = (left, top, left + int(self.__width), top + int(self.__height))
+            self.__rectX = paddleX
+            self.__rect = None
+        return self.__rectBounds
@@ -0,0 +1,565 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Steps very large ball fields on several cores. Every ball's state lives in one shared
+# memory block, the field is split into vertical strips handed to a persistent pool of worker processes, and
+# the balls that straddle a strip's edge are shared with the neighboring strip as ghosts. Run on its own, it
+# checks the result against a serial BallSystem and times 1 to N workers on 100,000 and 1,000,000 balls.
+
+import argparse, json, math, multiprocessing, os, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from ballsystem import BallSystem, gridPairs
+
+# Screen area given to each ball in generated fields, the same crowding as benchmark.py
+AREA_PER_BALL = 4800
+
+# The worker process's view of the shared arrays, set up once by attachField
+_workerState = {}
+
+def layoutArrays(buffer, capacity, strips):
+    '''
+    Lays out every array the field needs one after another in a buffer. The same layout is used by
+    the process that owns the block and by every worker, so they all see the same arrays.
+
+    Parameters:
+        buffer (object): The buffer to lay the arrays over, or None to only work out the size
+        capacity (int): The number of ball slots
+        strips (int): The number of strips (and of chunks of slots)
+
+    Return value: A tuple of (arrays, size), where arrays is a dictionary of NumPy arrays by name (empty
+    when buffer is None) and size is the number of bytes the layout needs
+
+    Sample call: arrays, size = layoutArrays(memory.buf, 100000, 4)
+    '''
+    fields = (("x", np.float64, capacity), ("y", np.float64, capacity), ("vx", np.float64, capacity), \
+              ("vy", np.float64, capacity), ("radius", np.float64, capacity), \
+              ("colorIndex", np.int32, capacity), ("alive", np.bool_, capacity), \
+              ("lowStrip", np.int32, capacity), ("highStrip", np.int32, capacity), \
+              ("order", np.int64, capacity), ("offsets", np.int64, strips * (strips + 2)), \
+              ("flips", np.int32, strips * capacity))
+    arrays = {}
+    size = 0
+    for name, dtype, count in fields:
+        # Every array starts on an 8 byte boundary
+        size = (size + 7) // 8 * 8
+        if buffer is not None:
+            arrays[name] = np.ndarray(count, dtype, buffer, size)
+        size += np.dtype(dtype).itemsize * count
+    if buffer is not None:
+        arrays["offsets"] = arrays["offsets"].reshape(strips, strips + 2)
+        arrays["flips"] = arrays["flips"].reshape(strips, capacity)
+    return arrays, max(size, 1)
+
+def attachField(name, capacity, strips):
+    '''
+    Runs once in each worker process: attaches to the field's shared memory block
+
+    Parameters:
+        name (string): The name of the shared memory block
+        capacity (int): The number of ball slots
+        strips (int): The number of strips
+
+    Return value: None
+
+    Sample call: ProcessPoolExecutor(initializer=attachField, initargs=(...))
+    '''
+    memory = shared_memory.SharedMemory(name=name)
+    _workerState["memory"] = memory
+    _workerState["arrays"] = layoutArrays(memory.buf, capacity, strips)[0]
+    _workerState["strips"] = strips
+
+def chunkRange(chunk, count, strips):
+    '''
+    Returns the slots in one chunk. The slots are cut into as many chunks as there are strips.
+
+    Parameters:
+        chunk (int): The chunk's number
+        count (int): The number of slots in use
+        strips (int): The number of chunks
+
+    Return value: A tuple of (first slot, slot after the last)
+
+    Sample call: lo, hi = chunkRange(0, 100000, 4)
+    '''
+    return (count * chunk // strips, count * (chunk + 1) // strips)
+
+def moveChunk(chunk, count, width, height, stripWidth, dt=1):
+    '''
+    Runs in a worker process: moves one chunk of slots following the same rules as BallSystem.step,
+    then works out which strips each ball's rectangle covers and groups the chunk's slots by the strip
+    their left edge is in, so each strip can find its balls without looking at the whole field
+
+    Parameters:
+        chunk (int): The chunk to move
+        count (int): The number of slots in use
+        width (int): The width of the field
+        height (int): The height of the field (balls leave through the bottom)
+        stripWidth (float): The width of every strip
+        dt (float): How many frames of motion to apply
+
+    Return value: None
+
+    Sample call: pool.submit(moveChunk, 0, 100000, 800, 600, 200.0)
+    '''
+    arrays = _workerState["arrays"]
+    strips = _workerState["strips"]
+    lo, hi = chunkRange(chunk, count, strips)
+    alive = arrays["alive"][lo:hi]
+    x = arrays["x"][lo:hi]
+    y = arrays["y"][lo:hi]
+    vx = arrays["vx"][lo:hi]
+    vy = arrays["vy"][lo:hi]
+    radius = arrays["radius"][lo:hi]
+    scale = alive if dt == 1 else alive * dt
+    x += vx * scale
+    y += vy * scale
+    hitSide = alive & ((x <= radius) | (x + radius >= width))
+    hitTop = alive & (y <= radius)
+    vx[hitSide] *= -1
+    vy[hitTop] *= -1
+
+    # The first and last strips reach past the field's edges, so every ball belongs somewhere
+    left = np.trunc(x - radius)
+    right = left + np.trunc(2 * radius)
+    low = np.clip(np.floor(left / stripWidth), 0, strips - 1).astype(np.int32)
+    high = np.clip(np.ceil(right / stripWidth) - 1, 0, strips - 1).astype(np.int32)
+    # Removed balls go into an extra group after the last strip
+    low[~alive] = strips
+    arrays["lowStrip"][lo:hi] = low
+    arrays["highStrip"][lo:hi] = high
+    arrays["order"][lo:hi] = lo + np.argsort(low, kind="stable")
+    offsets = arrays["offsets"][chunk]
+    offsets[0] = lo
+    offsets[1:] = lo + np.cumsum(np.bincount(low, minlength=strips + 1))
+
+def findPairs(strip, stripWidth, cellSize):
+    '''
+    Runs in a worker process: finds the touching pairs in one strip and counts, in the strip's own row
+    of the flip table, how many pairs each ball is in. The strip looks at the balls whose left edge is
+    inside it and at the ghosts whose left edge is in the strip before but which reach into this one.
+    A pair belongs to the strip holding the left edge of the pair's overlap, which is inside both
+    balls, so every pair is counted by exactly one strip.
+
+    Parameters:
+        strip (int): The strip to search
+        stripWidth (float): The width of every strip
+        cellSize (float): The size of a grid cell for gridPairs
+
+    Return value: A tuple of (ghosts, pairs), the number of ghost balls looked at and of pairs found
+
+    Sample call: ghosts, pairs = pool.submit(findPairs, 1, 200.0, 36.0).result()
+    '''
+    arrays = _workerState["arrays"]
+    strips = _workerState["strips"]
+    order = arrays["order"]
+    offsets = arrays["offsets"]
+    owned = [order[offsets[chunk, strip]:offsets[chunk, strip + 1]] for chunk in range(strips)]
+    ghosts = []
+    if strip > 0:
+        for chunk in range(strips):
+            candidates = order[offsets[chunk, strip - 1]:offsets[chunk, strip]]
+            ghosts.append(candidates[arrays["highStrip"][candidates] >= strip])
+    members = np.concatenate(owned + ghosts)
+    ghostCount = len(members) - sum(len(part) for part in owned)
+    if len(members) < 2:
+        return (ghostCount, 0)
+
+    radius = arrays["radius"][members]
+    left = np.trunc(arrays["x"][members] - radius)
+    top = np.trunc(arrays["y"][members] - radius)
+    size = np.trunc(2 * radius)
+    a, b = gridPairs(left, top, left + size, top + size, cellSize)
+    anchor = np.clip(np.floor(np.maximum(left[a], left[b]) / stripWidth), 0, strips - 1)
+    mine = anchor == strip
+    a = a[mine]
+    b = b[mine]
+    counts = np.bincount(np.concatenate((a, b)), minlength=len(members))
+    touched = counts > 0
+    arrays["flips"][strip][members[touched]] = counts[touched]
+    return (ghostCount, len(a))
+
+def applyFlips(chunk, count, greenIndex):
+    '''
+    Runs in a worker process: adds up every strip's flip counts for one chunk of slots and applies the
+    ball-vs-ball rules from BallSystem.resolveCollisions, then clears those counts for the next tick
+
+    Parameters:
+        chunk (int): The chunk to update
+        count (int): The number of slots in use
+        greenIndex (int): The palette index of the green color
+
+    Return value: The number of balls in the chunk that were not green before
+
+    Sample call: newlyGreen = pool.submit(applyFlips, 0, 100000, 2).result()
+    '''
+    arrays = _workerState["arrays"]
+    lo, hi = chunkRange(chunk, count, _workerState["strips"])
+    flips = arrays["flips"][:, lo:hi]
+    total = flips.sum(axis=0)
+    arrays["vx"][lo:hi][total % 2 == 1] *= -1
+    touched = total > 0
+    colorIndex = arrays["colorIndex"][lo:hi]
+    newlyGreen = int(np.count_nonzero(touched & (colorIndex != greenIndex)))
+    colorIndex[touched] = greenIndex
+    flips[:, :] = 0
+    return newlyGreen
+
+class ParallelField:
+    '''
+    Holds a field of balls in one shared memory block and steps it on a persistent pool of worker
+    processes. Each tick runs in three rounds, and every round waits for the one before it:
+    the chunks of slots are moved and grouped by strip, each strip finds its touching pairs using
+    ghosts from the strip before it, and the chunks add up the strips' results and apply them. The
+    workers read and write the shared arrays in place, so nothing but a few numbers is sent to them
+    each tick. A pool of no workers runs the same rounds in this process.
+
+    Attributes:
+        width (int): The width of the field
+        height (int): The height of the field
+        count (int): The number of slots in use
+        strips (int): The number of strips and chunks
+        stripWidth (float): The width of every strip
+        cellSize (float): The grid cell size used to find pairs, the size of the largest ball
+        memory (object): The SharedMemory block holding the arrays
+        arrays (dictionary): NumPy arrays over the shared block, by name
+        palette (list): The RGB tuples that colorIndex refers to
+        pool (object): The ProcessPoolExecutor stepping the field, or None to step in this process
+        ticks (int): Ticks stepped so far
+        pairs (int): Touching pairs found so far
+        ghosts (int): Ghost balls looked at so far
+        roundTimes (list): Seconds spent in each of the three rounds
+
+    Methods:
+        __init__: Instantiates the ParallelField object and starts the workers
+        step: Moves every ball, finds touching pairs and applies the collision rules
+        copyTo: Writes the field's state into a BallSystem
+        close: Stops the workers and frees the shared memory
+        getArrays: Returns the arrays attribute
+        getStrips: Returns the strips attribute
+        getMetrics: Returns the totals and time spent in each round
+        resetMetrics: Sets the totals and round times back to zero
+    '''
+    # Constructor
+    def __init__(self, system, width, height, workers=0, strips=None):
+        '''
+        Instantiates the ParallelField object, copying a BallSystem's balls into shared memory
+
+        Parameters:
+            self (object): The ParallelField object itself
+            system (object): The BallSystem holding the balls to step
+            width (int): The width of the field
+            height (int): The height of the field
+            workers (int): The number of worker processes, or 0 to step in this process
+            strips (int): The number of strips, or None for one per worker. Strips are never made
+            narrower than the largest ball, so a ball is only ever a ghost in the strip after its own.
+
+        Return value: None
+
+        Sample call: field = ParallelField(system, 800, 600, workers=4)
+        '''
+        count = system.getCount()
+        capacity = max(1, count)
+        largest = float(np.max(np.trunc(2 * system.radius[:count]))) if count else 1.0
+        strips = max(1, min(strips or workers or 1, int(width // max(largest, 1.0))))
+        self.__width = width
+        self.__height = height
+        self.__count = count
+        self.__strips = strips
+        self.__stripWidth = width / strips
+        self.__cellSize = max(largest, 1.0)
+        self.__memory = shared_memory.SharedMemory(create=True, size=layoutArrays(None, capacity, strips)[1])
+        self.__arrays = layoutArrays(self.__memory.buf, capacity, strips)[0]
+        for name in ("x", "y", "vx", "vy", "radius", "colorIndex", "alive"):
+            self.__arrays[name][:count] = getattr(system, name)[:count]
+        self.__arrays["flips"][:] = 0
+        self.__palette = list(system.palette)
+        self.__ticks = 0
+        self.__pairs = 0
+        self.__ghosts = 0
+        self.__roundTimes = [0.0, 0.0, 0.0]
+        if workers:
+            # Workers are started fresh instead of forked, the same as the frame exporter's
+            self.__pool = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"), attachField, \
+                                              (self.__memory.name, capacity, strips))
+        else:
+            self.__pool = None
+            _workerState["arrays"] = self.__arrays
+            _workerState["strips"] = strips
+    def __run(self, function, argumentLists):
+        '''
+        Runs one round, either on the pool or in this process, and waits for all of it to finish
+
+        Parameters:
+            self (object): The ParallelField object itself
+            function (function): The round's worker function
+            argumentLists (list): One tuple of arguments for each call
+
+        Return value: A list of the calls' results, in order
+        '''
+        if self.__pool is None:
+            return [function(*arguments) for arguments in argumentLists]
+        futures = [self.__pool.submit(function, *arguments) for arguments in argumentLists]
+        return [future.result() for future in futures]
+    def step(self, greenIndex, dt=1):
+        '''
+        Moves every living ball, finds every touching pair and applies the ball-vs-ball rules, giving the
+        same result as BallSystem.step, overlappingPairs and resolveCollisions
+
+        Parameters:
+            self (object): The ParallelField object itself
+            greenIndex (int): The palette index of the green color
+            dt (float): How many frames of motion to apply
+
+        Return value: The number of balls that were not green before, which is how much the score rises
+
+        Sample call: numGreen += field.step(green)
+        '''
+        chunks = range(self.__strips)
+        clock = time.perf_counter
+        start = clock()
+        self.__run(moveChunk, [(chunk, self.__count, self.__width, self.__height, self.__stripWidth, dt) \
+                               for chunk in chunks])
+        moved = clock()
+        found = self.__run(findPairs, [(strip, self.__stripWidth, self.__cellSize) for strip in chunks])
+        searched = clock()
+        newlyGreen = sum(self.__run(applyFlips, [(chunk, self.__count, greenIndex) for chunk in chunks]))
+        finished = clock()
+        self.__roundTimes[0] += moved - start
+        self.__roundTimes[1] += searched - moved
+        self.__roundTimes[2] += finished - searched
+        self.__ghosts += sum(ghosts for ghosts, _ in found)
+        self.__pairs += sum(pairs for _, pairs in found)
+        self.__ticks += 1
+        return newlyGreen
+    def copyTo(self, system):
+        '''
+        Writes every ball's state back into a BallSystem with the same slots, such as the one the field
+        was made from
+
+        Parameters:
+            self (object): The ParallelField object itself
+            system (object): The BallSystem to write into
+
+        Return value: None
+
+        Sample call: field.copyTo(system)
+        '''
+        count = self.__count
+        for name in ("x", "y", "vx", "vy", "radius", "colorIndex", "alive"):
+            getattr(system, name)[:count] = self.__arrays[name][:count]
+        system.palette = list(self.__palette)
+    def close(self):
+        '''
+        Stops the workers and frees the shared memory
+
+        Parameters:
+            self (object): The ParallelField object itself
+
+        Return value: None
+
+        Sample call: field.close()
+        '''
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+        elif _workerState.get("arrays") is self.__arrays:
+            _workerState.clear()
+        # The arrays point into the shared block, so they have to go before it can be closed
+        self.__arrays = {}
+        self.__memory.close()
+        self.__memory.unlink()
+    # Getters
+    def getArrays(self):
+        '''
+        Returns the arrays over the shared block
+
+        Parameters:
+            self (object): The ParallelField object itself
+
+        Return value: A dictionary of NumPy arrays by name. They are the field's own arrays, and
+        should only be changed between calls to step.
+
+        Sample call: x = field.getArrays()["x"]
+        '''
+        return self.__arrays
+    def getStrips(self):
+        '''
+        Returns the number of strips the field is split into
+
+        Parameters:
+            self (object): The ParallelField object itself
+
+        Return value: An integer count
+
+        Sample call: strips = field.getStrips()
+        '''
+        return self.__strips
+    def getMetrics(self):
+        '''
+        Returns the totals and the time spent in each round
+
+        Parameters:
+            self (object): The ParallelField object itself
+
+        Return value: A dictionary of ticks, pairs, ghosts per tick and milliseconds per tick in the move,
+        pairs and apply rounds
+
+        Sample call: print(field.getMetrics()["pairsMs"])
+        '''
+        ticks = max(self.__ticks, 1)
+        return {"ticks": self.__ticks, "strips": self.__strips, "pairs": self.__pairs, \
+                "ghostsPerTick": self.__ghosts / ticks, "moveMs": self.__roundTimes[0] * 1000 / ticks, \
+                "pairsMs": self.__roundTimes[1] * 1000 / ticks, "applyMs": self.__roundTimes[2] * 1000 / ticks}
+
+    # Setter
+    def resetMetrics(self):
+        '''
+        Sets the totals and round times back to zero, such as after a warm-up tick
+
+        Parameters:
+            self (object): The ParallelField object itself
+
+        Return value: None
+
+        Sample call: field.resetMetrics()
+        '''
+        self.__ticks = 0
+        self.__pairs = 0
+        self.__ghosts = 0
+        self.__roundTimes = [0.0, 0.0, 0.0]
+
+def makeSystem(count, seed):
+    '''
+    Builds a reproducible BallSystem of small black and green balls spread over a square field that
+    grows with the ball count
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The seed for the positions and directions
+
+    Return value: A tuple of (system, side, greenIndex)
+
+    Sample call: system, side, green = makeSystem(100000, 1)
+    '''
+    rng = np.random.default_rng(seed)
+    side = max(800, int(math.sqrt(count * AREA_PER_BALL)))
+    system = BallSystem(count)
+    x = rng.uniform(18, side - 18, count)
+    y = rng.uniform(18, side - 18, count)
+    vx = rng.choice((-2.0, 1.0, 2.0), count)
+    vy = rng.choice((-3.0, -2.0, 2.0, 3.0), count)
+    radius = np.full(count, 18.0)
+    colorIndex = rng.integers(0, 2, count).astype(np.int32)
+    # Palette order matches colorIndex: 0 is black and 1 is green
+    system.setState((x, y, vx, vy, radius, colorIndex, np.ones(count, dtype=bool), [(0,0,0), (0,255,0)], \
+                     count, []))
+    return system, side, 1
+
+def check(count, seed, ticks, workers):
+    '''
+    Steps the same field with a BallSystem and with a ParallelField and compares them
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The seed of the field
+        ticks (int): How many ticks to step
+        workers (int): The number of worker processes for the ParallelField
+
+    Return value: True if every array and the score match after every tick
+
+    Sample call: same = check(20000, 1, 20, 4)
+    '''
+    system, side, green = makeSystem(count, seed)
+    copy, _, _ = makeSystem(count, seed)
+    field = ParallelField(copy, side, side, workers, strips=max(workers, 3))
+    same = True
+    try:
+        for _ in range(ticks):
+            system.step(side, side)
+            expected = system.resolveCollisions(*system.overlappingPairs(), green)
+            same = same and field.step(green) == expected
+        field.copyTo(copy)
+    finally:
+        field.close()
+    for name in ("x", "y", "vx", "vy", "colorIndex", "alive"):
+        same = same and np.array_equal(getattr(system, name)[:count], getattr(copy, name)[:count])
+    return same
+
+def timeParallel(count, seed, ticks, workers):
+    '''
+    Times a ParallelField stepping a field. The first tick is left out, since it is when the workers
+    import NumPy and attach to the shared block.
+
+    Parameters:
+        count (int): The number of balls
+        seed (int): The seed of the field
+        ticks (int): How many ticks to time
+        workers (int): The number of worker processes, or 0 to step in this process
+
+    Return value: A dictionary of results for the run
+
+    Sample call: result = timeParallel(100000, 1, 10, 4)
+    '''
+    system, side, green = makeSystem(count, seed)
+    field = ParallelField(system, side, side, workers)
+    try:
+        field.step(green)
+        field.resetMetrics()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            field.step(green)
+        elapsed = time.perf_counter() - start
+        metrics = field.getMetrics()
+    finally:
+        field.close()
+    return {"workers": workers, "strips": metrics["strips"], "msPerTick": elapsed * 1000 / ticks, \
+            "ghostsPerTick": metrics["ghostsPerTick"], "moveMs": metrics["moveMs"], \
+            "pairsMs": metrics["pairsMs"], "applyMs": metrics["applyMs"]}
+
+def usableCores():
+    '''
+    Returns how many cores this process may run on
+
+    Parameters: None
+
+    Return value: An integer count
+
+    Sample call: cores = usableCores()
+    '''
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Step large ball fields on several cores and time them.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100000, 1000000], help="ball counts to time")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to time (default 1 to the core count)")
+    parser.add_argument("--ticks", type=int, default=10, help="ticks timed for each run")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated fields")
+    parser.add_argument("--check", type=int, default=20000, metavar="BALLS", \
+                        help="balls in the field compared against a serial BallSystem first (0 to skip)")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to FILE")
+    args = parser.parse_args()
+
+    cores = usableCores()
+    workerCounts = args.workers or list(range(1, max(cores, 1) + 1))
+    report = {"cores": cores, "results": []}
+    if args.check:
+        report["matchesSerial"] = check(args.check, args.seed, 20, max(workerCounts))
+        print("Matches a serial BallSystem:", report["matchesSerial"])
+    print("Usable cores:", cores)
+    print("%9s %8s %7s %10s %8s %9s %9s %9s" % ("balls", "workers", "strips", "ms/tick", "speedup", \
+                                                "move", "pairs", "apply"))
+    for count in args.counts:
+        runs = [timeParallel(count, args.seed, args.ticks, workers) for workers in [0] + workerCounts]
+        base = runs[1]["msPerTick"] if len(runs) > 1 else runs[0]["msPerTick"]
+        for run in runs:
+            run["balls"] = count
+            run["speedup"] = base / run["msPerTick"]
+            print("%9d %8s %7d %8.1fms %7.2fx %7.1fms %7.1fms %7.1fms" % (count, run["workers"] or "inline", \
+                  run["strips"], run["msPerTick"], run["speedup"], run["moveMs"], run["pairsMs"], run["applyMs"]))
+        report["results"] += runs
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
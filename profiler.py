@@ -0,0 +1,383 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Times each phase of the game loop and counts the work done per frame, keeping the
+# last few hundred frames in fixed-size ring buffers that can be shown on screen or saved to JSON or CSV
+
+import csv, json, time
+from array import array
+import pygame
+from drawable import Drawable
+from text import renderText
+
+# The parts of one pass through the game loop, in the order they happen
+PHASES = ("input", "physics", "text", "draw", "overlay", "events", "update", "sleep")
+
+class FrameProfiler:
+    '''
+    Records how long each phase of every frame took, with perf_counter_ns, along with per-frame counts
+    such as the ball pairs tested. Only the most recent frames are kept. While the profiler is disabled
+    each of its calls returns straight away and nothing in the game is wrapped or counted.
+
+    Attributes:
+        capacity (int): The number of frames kept in the ring buffers
+        enabled (boolean): Whether frames are being recorded
+        timings (dictionary): One ring buffer of nanosecond timings per phase
+        counters (dictionary): For each counter, the function giving its running total and the ring
+        buffer of per-frame amounts
+        frames (int): The number of frames recorded so far
+        rectClasses (tuple): Classes whose get_rect calls are counted while recording
+
+    Methods:
+        __init__: Instantiates the FrameProfiler object
+        addCounter: Adds a per-frame count read from a running total
+        trackRects: Picks the classes whose newly built rectangles are counted
+        beginFrame: Starts timing a frame
+        lap: Ends the current phase of the frame
+        endFrame: Stores the frame's timings and counts in the ring buffers
+        getFrames: Returns the recorded frames, oldest first
+        getSummary: Returns the mean, p50 and p99 of every phase and the mean of every counter
+        isEnabled: Returns the enabled attribute
+        setEnabled: Turns recording on or off
+        export: Saves the recorded frames as JSON or CSV
+    '''
+    # Constructor
+    def __init__(self, capacity=600, enabled=False):
+        '''
+        Instantiates the FrameProfiler object
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            capacity (int): The number of frames kept
+            enabled (boolean): Whether to start recording straight away
+
+        Return value: None
+
+        Sample call: profiler = FrameProfiler()
+        '''
+        self.__capacity = capacity
+        self.__enabled = False
+        self.__timings = {phase: array("q", [0]) * capacity for phase in PHASES}
+        self.__counters = {}
+        self.__totals = {}
+        self.__current = dict.fromkeys(PHASES, 0)
+        self.__last = 0
+        self.__frames = 0
+        self.__rectClasses = ()
+        self.__originals = []
+        self.__rectCount = 0
+        self.addCounter("rectsAllocated", lambda: self.__rectCount)
+        self.setEnabled(enabled)
+    def addCounter(self, name, total):
+        '''
+        Adds a count that is recorded every frame, as the change in a running total
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            name (string): The counter's name
+            total (function): Takes no arguments and returns the running total
+
+        Return value: None
+
+        Sample call: profiler.addCounter("pairsTested", world.getPairsTested)
+        '''
+        self.__counters[name] = (total, array("q", [0]) * self.__capacity)
+        self.__totals[name] = total()
+    def trackRects(self, classes):
+        '''
+        Picks the classes whose get_rect methods are counted while recording. A call counts as an
+        allocation when it hands back a different Rect than that method's previous call, so rectangles
+        that are cached and reused are not counted.
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            classes (tuple): Drawable classes that define get_rect
+
+        Return value: None
+
+        Sample call: profiler.trackRects((Ball, Paddle, Text, CounterText))
+        '''
+        enabled = self.__enabled
+        self.setEnabled(False)
+        self.__rectClasses = tuple(classes)
+        self.setEnabled(enabled)
+    def __wrapGetRect(self, original):
+        '''
+        Returns a get_rect method that counts the rectangles the original builds
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            original (function): The class's own get_rect
+
+        Return value: The counting function
+        '''
+        profiler = self
+        previous = [None]
+        def get_rect(drawable):
+            rect = original(drawable)
+            if rect is not previous[0]:
+                previous[0] = rect
+                profiler.__rectCount += 1
+            return rect
+        return get_rect
+    def beginFrame(self):
+        '''
+        Starts timing a frame. The first lap is measured from here.
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+
+        Return value: None
+
+        Sample call: profiler.beginFrame()
+        '''
+        if not self.__enabled:
+            return
+        self.__last = time.perf_counter_ns()
+    def lap(self, phase):
+        '''
+        Adds the time since the last lap (or the start of the frame) to a phase
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            phase (string): One of PHASES
+
+        Return value: None
+
+        Sample call: profiler.lap("physics")
+        '''
+        if not self.__enabled:
+            return
+        now = time.perf_counter_ns()
+        self.__current[phase] += now - self.__last
+        self.__last = now
+    def endFrame(self):
+        '''
+        Stores the frame's phase timings and counts in the ring buffers, overwriting the oldest frame
+        once they are full
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+
+        Return value: None
+
+        Sample call: profiler.endFrame()
+        '''
+        if not self.__enabled:
+            return
+        slot = self.__frames % self.__capacity
+        current = self.__current
+        for phase in PHASES:
+            self.__timings[phase][slot] = current[phase]
+            current[phase] = 0
+        for name, (total, buffer) in self.__counters.items():
+            value = total()
+            buffer[slot] = value - self.__totals[name]
+            self.__totals[name] = value
+        self.__frames += 1
+    # Getters
+    def getFrames(self):
+        '''
+        Returns the recorded frames that are still in the ring buffers, oldest first
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+
+        Return value: A list of dictionaries holding the frame number, each phase's time in
+        milliseconds and each counter
+
+        Sample call: frames = profiler.getFrames()
+        '''
+        count = min(self.__frames, self.__capacity)
+        frames = []
+        for frame in range(self.__frames - count, self.__frames):
+            slot = frame % self.__capacity
+            row = {"frame": frame}
+            for phase in PHASES:
+                row[phase] = self.__timings[phase][slot] / 1e6
+            for name, (total, buffer) in self.__counters.items():
+                row[name] = buffer[slot]
+            frames.append(row)
+        return frames
+    def getSummary(self):
+        '''
+        Summarizes the frames still in the ring buffers
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+
+        Return value: A dictionary with the number of frames, the mean, p50 and p99 of each phase in
+        milliseconds, and the mean per frame of each counter
+
+        Sample call: summary = profiler.getSummary()
+        '''
+        count = min(self.__frames, self.__capacity)
+        summary = {"frames": count, "phases": {}, "counters": {}}
+        if count == 0:
+            return summary
+        for phase in PHASES:
+            values = sorted(self.__timings[phase][:count])
+            summary["phases"][phase] = {"mean": sum(values) / count / 1e6, "p50": values[(count - 1) // 2] / 1e6, \
+                                        "p99": values[max(0, -(-99 * count // 100) - 1)] / 1e6}
+        for name, (total, buffer) in self.__counters.items():
+            summary["counters"][name] = sum(buffer[:count]) / count
+        return summary
+    def isEnabled(self):
+        '''
+        Returns whether frames are being recorded
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+
+        Return value: Boolean of whether recording is on
+
+        Sample call: if profiler.isEnabled(): ...
+        '''
+        return self.__enabled
+    # Setter
+    def setEnabled(self, enabled):
+        '''
+        Turns recording on or off. Turning it on wraps the tracked classes' get_rect methods so their
+        rectangles are counted, and turning it off puts the original methods back.
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            enabled (boolean): Whether to record frames
+
+        Return value: None
+
+        Sample call: profiler.setEnabled(not profiler.isEnabled())
+        '''
+        if enabled == self.__enabled:
+            return
+        if enabled:
+            for cls in self.__rectClasses:
+                original = cls.__dict__["get_rect"]
+                self.__originals.append((cls, original))
+                cls.get_rect = self.__wrapGetRect(original)
+            # Counts that built up while recording was off are not charged to the next frame
+            for name, (total, buffer) in self.__counters.items():
+                self.__totals[name] = total()
+            self.__current = dict.fromkeys(PHASES, 0)
+        else:
+            for cls, original in self.__originals:
+                cls.get_rect = original
+            self.__originals = []
+        self.__enabled = enabled
+    def export(self, path):
+        '''
+        Saves the recorded frames to a file: CSV with one row per frame if the path ends in .csv,
+        otherwise JSON with the summary and the frames
+
+        Parameters:
+            self (object): The FrameProfiler object itself
+            path (string): The file to write
+
+        Return value: None
+
+        Sample call: profiler.export("profile.json")
+        '''
+        frames = self.getFrames()
+        with open(path, "w", newline="") as file:
+            if path.lower().endswith(".csv"):
+                writer = csv.DictWriter(file, ["frame"] + list(PHASES) + list(self.__counters))
+                writer.writeheader()
+                writer.writerows(frames)
+            else:
+                json.dump({"summary": self.getSummary(), "frames": frames}, file, indent=2)
+
+class ProfilerOverlay(Drawable):
+    '''
+    Draws a FrameProfiler's summary in a dark box in the corner of the screen. The lines are only
+    rebuilt when refresh is called, so the overlay does not render new text every frame.
+
+    Parameters:
+        Drawable (base class): Instantiated in constructor
+
+    Attributes:
+        profiler (object): The FrameProfiler being shown
+        lines (list): The rendered text surfaces, one per line
+        size (int): The font size
+
+    Methods:
+        __init__: Instantiates the ProfilerOverlay object
+        refresh: Rebuilds the lines from the profiler's current summary
+        draw: Draws the box and the lines
+        get_rect: Returns the rectangle the box covers
+    '''
+    __slots__ = ("__profiler", "__size", "__lines", "__rect")
+    # Constructor
+    def __init__(self, profiler, x=0, y=0, size=14):
+        '''
+        Instantiates the base class Drawable as well as ProfilerOverlay
+
+        Parameters:
+            self (object): The ProfilerOverlay object itself
+            profiler (object): The FrameProfiler to show
+            x (int): Horizontal position of the box's top-left corner
+            y (int): Vertical position of the box's top-left corner
+            size (int): The font size
+
+        Return value: None
+
+        Sample call: overlay = ProfilerOverlay(profiler, 560, 10)
+        '''
+        super().__init__(x, y)
+        self.__profiler = profiler
+        self.__size = size
+        self.__lines = []
+        self.__rect = pygame.Rect(x, y, 0, 0)
+        self.refresh()
+    def refresh(self):
+        '''
+        Rebuilds the lines from the profiler's current summary
+
+        Parameters:
+            self (object): The ProfilerOverlay object itself
+
+        Return value: None
+
+        Sample call: overlay.refresh()
+        '''
+        summary = self.__profiler.getSummary()
+        messages = ["Last %d frames (mean / p99)" % summary["frames"]]
+        for phase, stats in summary["phases"].items():
+            messages.append("%s: %.2f / %.2f ms" % (phase, stats["mean"], stats["p99"]))
+        for name, mean in summary["counters"].items():
+            messages.append("%s: %.0f per frame" % (name, mean))
+        WHITE = (255, 255, 255)
+        self.__lines = [renderText(message, WHITE, "freesansbold.ttf", self.__size) for message in messages]
+        width = max(line.get_width() for line in self.__lines) + 8
+        height = sum(line.get_height() for line in self.__lines) + 8
+        x, y = self.getLoc()
+        self.__rect = pygame.Rect(x, y, width, height)
+        self.clearBounds()
+    def draw(self, surface):
+        '''
+        Draws the box and the lines of the summary
+
+        Parameters:
+            self (object): The ProfilerOverlay object itself
+            surface (object): The display that is to be drawn on
+
+        Return value: None
+
+        Sample call: overlay.draw(surface)
+        '''
+        surface.fill((32, 32, 32), self.__rect)
+        x, y = self.__rect.x + 4, self.__rect.y + 4
+        for line in self.__lines:
+            surface.blit(line, (x, y))
+            y += line.get_height()
+    # Getter
+    def get_rect(self):
+        '''
+        Returns the rectangle the overlay's box covers
+
+        Parameters:
+            self (object): The ProfilerOverlay object itself
+
+        Return value: A pygame.Rect object
+
+        Sample call: overlay.get_rect()
+        '''
+        return self.__rect
\ No newline at end of file
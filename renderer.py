@@ -0,0 +1,192 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Draws only the parts of the screen that changed since the last frame, so that
+# moving a few small balls does not cost a full-screen clear and a full-screen display update
+
+import pygame
+
+class DirtyRectRenderer:
+    '''
+    Remembers where each Drawable was drawn last frame. Each frame, the old and new rectangles of
+    anything that moved (or was marked as changed) are merged, cleared to the background color and
+    redrawn, and only those rectangles are handed to pygame.display.update. When too much of the
+    screen changed, everything is redrawn instead.
+
+    Attributes:
+        surface (object): The surface that is drawn on
+        background (tuple): RGB tuple the screen is cleared to
+        threshold (float): The share of the screen (0 to 1) above which a full redraw is done instead
+        padding (int): Pixels added around each rectangle to cover antialiasing and rounding
+        dirtyRatio (float): The share of the screen redrawn in the last frame
+        frames (int): The number of frames rendered so far
+
+    Methods:
+        __init__: Instantiates the DirtyRectRenderer object
+        render: Redraws what changed and returns the rectangles to pass to pygame.display.update
+        markDirty: Makes a Drawable be redrawn next frame even if it did not move
+        invalidate: Makes the next frame a full redraw
+        getDirtyRatio: Returns the dirtyRatio attribute
+        getAverageDirtyRatio: Returns the average share of the screen redrawn per frame
+        mergeRects: Combines overlapping rectangles (static helper)
+    '''
+    # Constructor
+    def __init__(self, surface, background=(255, 255, 255), threshold=0.5, padding=2):
+        '''
+        Instantiates the DirtyRectRenderer object
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+            surface (object): The surface to draw on, usually the display surface
+            background (tuple): RGB tuple the screen is cleared to
+            threshold (float): The share of the screen above which a full redraw is done instead
+            padding (int): Pixels added around each rectangle
+
+        Return value: None
+
+        Sample call: renderer = DirtyRectRenderer(surface, WHITE)
+        '''
+        self.__surface = surface
+        self.__background = background
+        self.__threshold = threshold
+        self.__padding = padding
+        self.__previous = {}
+        self.__changed = set()
+        self.__fullRedraw = True
+        self.__dirtyRatio = 1.0
+        self.__frames = 0
+        self.__totalDirtyRatio = 0.0
+    def render(self, drawables):
+        '''
+        Clears and redraws the areas that changed since the last call
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+            drawables (list): Every Drawable on screen, in the order they should be drawn
+
+        Return value: A list of pygame.Rect objects to pass to pygame.display.update
+
+        Sample call: pygame.display.update(renderer.render([paddle] + balls))
+        '''
+        surface = self.__surface
+        screen = surface.get_rect()
+        padding = 2 * self.__padding
+        current = {}
+        for drawable in drawables:
+            if drawable.isVisible():
+                current[drawable] = drawable.get_rect().inflate(padding, padding)
+
+        dirty = []
+        if not self.__fullRedraw:
+            # Areas left behind by drawables that moved or went away
+            for drawable, rect in self.__previous.items():
+                if current.get(drawable) != rect or drawable in self.__changed:
+                    dirty.append(rect)
+            # Areas covered by drawables that moved or appeared
+            for drawable, rect in current.items():
+                if self.__previous.get(drawable) != rect or drawable in self.__changed:
+                    dirty.append(rect)
+            dirty = [rect.clip(screen) for rect in self.mergeRects(dirty)]
+            dirtyArea = sum(rect.width * rect.height for rect in dirty)
+            self.__dirtyRatio = dirtyArea / (screen.width * screen.height)
+            if self.__dirtyRatio > self.__threshold:
+                self.__fullRedraw = True
+
+        if self.__fullRedraw:
+            surface.fill(self.__background)
+            for drawable in current:
+                drawable.draw(surface)
+            dirty = [screen]
+            self.__dirtyRatio = 1.0
+        else:
+            items = list(current.items())
+            for rect in dirty:
+                # Clipping keeps drawables that only partly overlap the rectangle from being drawn
+                # twice over the pixels outside of it
+                surface.set_clip(rect)
+                surface.fill(self.__background, rect)
+                for drawable, drawnRect in items:
+                    if drawnRect.colliderect(rect):
+                        drawable.draw(surface)
+            surface.set_clip(None)
+
+        self.__frames += 1
+        self.__totalDirtyRatio += self.__dirtyRatio
+        self.__previous = current
+        self.__changed = set()
+        self.__fullRedraw = False
+        return dirty
+    def markDirty(self, drawable):
+        '''
+        Makes a Drawable be redrawn next frame even if its rectangle did not change, for example
+        after a Text's message or a Ball's color changed
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+            drawable (object): The Drawable that changed
+
+        Return value: None
+
+        Sample call: renderer.markDirty(scoreBoard)
+        '''
+        self.__changed.add(drawable)
+    def invalidate(self):
+        '''
+        Makes the next frame a full redraw, for example after something else drew over the screen
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+
+        Return value: None
+
+        Sample call: renderer.invalidate()
+        '''
+        self.__fullRedraw = True
+    # Getter
+    def getDirtyRatio(self):
+        '''
+        Returns the share of the screen that was redrawn in the last frame
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+
+        Return value: A float from 0 to 1
+
+        Sample call: ratio = renderer.getDirtyRatio()
+        '''
+        return self.__dirtyRatio
+    def getAverageDirtyRatio(self):
+        '''
+        Returns the average share of the screen redrawn per frame since the renderer was created
+
+        Parameters:
+            self (object): The DirtyRectRenderer object itself
+
+        Return value: A float from 0 to 1
+
+        Sample call: print(renderer.getAverageDirtyRatio())
+        '''
+        if self.__frames == 0:
+            return 0.0
+        return self.__totalDirtyRatio / self.__frames
+    @staticmethod
+    def mergeRects(rects):
+        '''
+        Combines overlapping rectangles into their union until no two rectangles overlap
+
+        Parameters:
+            rects (list): pygame.Rect objects
+
+        Return value: A list of pygame.Rect objects that do not overlap each other
+
+        Sample call: merged = DirtyRectRenderer.mergeRects(rects)
+        '''
+        merged = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            index = rect.collidelist(merged)
+            # A union can grow into rectangles it did not touch before, so keep merging until it stops
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
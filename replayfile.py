@@ -0,0 +1,632 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Records every tick of a game to a compact binary file made of keyframes and small
+# fixed-width deltas, and reads it back through a memory map that can jump to any tick without decoding
+# the ticks before it
+
+import argparse, bisect, mmap, os, struct
+from ball import Ball
+from paddle import Paddle
+from world import DREXEL_BLUE
+
+# File layout, all little-endian:
+#   header    magic, version, play area width and height, keyframe interval
+#   frames    one per tick; a keyframe holds every ball in full and a delta holds the same balls, in the
+#             same order, as small fixed-point changes from the keyframe
+#   footer    the color palette and the (tick, offset) of every keyframe
+#   trailer   the footer's offset and a closing magic, so a reader can find the footer from the end
+MAGIC = b"CMRP"
+END_MAGIC = b"CMRI"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHH")
+KEYFRAME = struct.Struct("<cIfhBH")
+KEY_BALL = struct.Struct("<IfffffBB")
+DELTA = struct.Struct("<cIfhB")
+DELTA_BALL = struct.Struct("<hhhhBB")
+TRAILER = struct.Struct("<Q4s")
+FLOAT_PAIR = struct.Struct("<ff")
+# Fixed-point scales for deltas: positions to 1/16 of a pixel and speeds to 1/256 of a pixel per tick
+POSITION_SCALE = 16
+SPEED_SCALE = 256
+INT16_MAX = 32767
+# Flags stored with each frame
+WON = 1
+LOST = 2
+
+class ReplayRecorder:
+    '''
+    Writes one frame per tick of a World to a binary replay file. A keyframe is written every
+    keyframeInterval ticks, and also whenever a delta cannot describe the tick: a ball was spawned, a
+    ball moved too far from its keyframe position, a tick was skipped or a radius changed.
+
+    Attributes:
+        file (object): The open file being written
+        keyframeInterval (int): The most ticks between two keyframes
+        palette (list): The colors seen so far; frames store an index into it
+        index (list): The (tick, offset) of every keyframe written
+        keyBalls (list): The (entityId, x, y, radius) of each ball in the last keyframe
+        lastTick (int): The tick of the last frame written, or None before the first
+
+    Methods:
+        __init__: Opens the file and writes the header
+        record: Writes the frame for the World's current tick
+        close: Writes the footer and closes the file
+        getFrameCount: Returns the number of frames written
+    '''
+    # Constructor
+    def __init__(self, path, width=800, height=600, keyframeInterval=120):
+        '''
+        Opens a replay file for writing and writes its header
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+            path (string): The file to write
+            width (int): The width of the play area
+            height (int): The height of the play area
+            keyframeInterval (int): The most ticks between two keyframes
+
+        Return value: None
+
+        Sample call: recorder = ReplayRecorder("game.cmr", 800, 600)
+        '''
+        self.__file = open(path, "wb")
+        self.__keyframeInterval = keyframeInterval
+        self.__palette = []
+        self.__colorIndex = {}
+        self.__index = []
+        self.__keyBalls = []
+        self.__keyPositions = {}
+        self.__keyTick = None
+        self.__lastTick = None
+        self.__last = []
+        self.__frames = 0
+        self.__file.write(HEADER.pack(MAGIC, VERSION, width, height, keyframeInterval))
+    def __paletteIndex(self, color):
+        '''
+        Returns the palette index of a color, adding the color to the palette the first time
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+            color (tuple): An RGB tuple
+
+        Return value: An integer index
+        '''
+        color = tuple(int(channel) for channel in color)
+        index = self.__colorIndex.get(color)
+        if index is None:
+            if len(self.__palette) > 255:
+                raise ValueError("a replay file can hold at most 256 colors")
+            index = len(self.__palette)
+            self.__palette.append(color)
+            self.__colorIndex[color] = index
+        return index
+    def record(self, world):
+        '''
+        Writes the frame for the World's current tick, as a delta when it can and as a keyframe
+        when it must
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+            world (object): The World to record, right after it was stepped
+
+        Return value: None
+
+        Sample call: world.step(paddleX); recorder.record(world)
+        '''
+        tick = world.getTick()
+        balls = []
+        for entityId, ball in zip(world.getBallIds(), world.getBalls()):
+            x, y = ball.getLoc()
+            balls.append((entityId, x, y, ball.getXSpeed(), ball.getYSpeed(), ball.getRadius(), \
+                          self.__paletteIndex(ball.getColor())))
+        flags = (WON if world.isWon() else 0) | (LOST if world.isLost() else 0)
+        paddleX = world.getPaddle().getLoc()[0]
+        delta = None
+        if self.__lastTick is not None and tick == self.__lastTick + 1 and \
+           tick - self.__keyTick < self.__keyframeInterval:
+            delta = self.__encodeDelta(balls)
+        if delta is None:
+            self.__writeKeyframe(tick, paddleX, world.getScore(), flags, balls)
+        else:
+            self.__file.write(DELTA.pack(b"D", tick, paddleX, world.getScore(), flags))
+            self.__file.write(delta)
+        self.__lastTick = tick
+        self.__frames += 1
+    def __encodeDelta(self, balls):
+        '''
+        Encodes the balls as changes from the last keyframe, keeping the keyframe's order. Balls from
+        the keyframe that have left play are written with their last state and the alive flag off.
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+            balls (list): (entityId, x, y, xSpeed, ySpeed, radius, colorIndex) tuples for the live balls
+
+        Return value: The encoded bytes, or None if the tick needs a keyframe instead
+        '''
+        keyPositions = self.__keyPositions
+        current = {}
+        for ball in balls:
+            if ball[0] not in keyPositions:
+                return None
+            current[ball[0]] = ball
+        records = []
+        last = self.__last
+        for position, (entityId, keyX, keyY, radius) in enumerate(self.__keyBalls):
+            ball = current.get(entityId)
+            alive = 1
+            if ball is None:
+                ball = last[position]
+                alive = 0
+            elif ball[5] != radius:
+                return None
+            dx = round((ball[1] - keyX) * POSITION_SCALE)
+            dy = round((ball[2] - keyY) * POSITION_SCALE)
+            vx = round(ball[3] * SPEED_SCALE)
+            vy = round(ball[4] * SPEED_SCALE)
+            if max(abs(dx), abs(dy), abs(vx), abs(vy)) > INT16_MAX:
+                return None
+            records.append(DELTA_BALL.pack(dx, dy, vx, vy, ball[6], alive))
+            last[position] = ball
+        return b"".join(records)
+    def __writeKeyframe(self, tick, paddleX, score, flags, balls):
+        '''
+        Writes every live ball in full and makes this frame the one later deltas are measured from
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+            tick (int): The World's tick
+            paddleX (float): The paddle's horizontal center
+            score (int): The World's score
+            flags (int): WON and LOST bits
+            balls (list): (entityId, x, y, xSpeed, ySpeed, radius, colorIndex) tuples for the live balls
+
+        Return value: None
+        '''
+        self.__index.append((tick, self.__file.tell()))
+        self.__file.write(KEYFRAME.pack(b"K", tick, paddleX, score, flags, len(balls)))
+        for entityId, x, y, xSpeed, ySpeed, radius, colorIndex in balls:
+            self.__file.write(KEY_BALL.pack(entityId, x, y, xSpeed, ySpeed, radius, colorIndex, 1))
+        # Deltas are measured from the positions as stored, after rounding to 32-bit floats
+        self.__keyBalls = [(entityId,) + FLOAT_PAIR.unpack(FLOAT_PAIR.pack(x, y)) + (radius,) \
+                           for entityId, x, y, xSpeed, ySpeed, radius, colorIndex in balls]
+        self.__keyPositions = {ball[0]: position for position, ball in enumerate(balls)}
+        self.__last = list(balls)
+        self.__keyTick = tick
+    def close(self):
+        '''
+        Writes the palette and keyframe index after the frames and closes the file
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+
+        Return value: None
+
+        Sample call: recorder.close()
+        '''
+        file = self.__file
+        footerOffset = file.tell()
+        file.write(struct.pack("<H", len(self.__palette)))
+        for color in self.__palette:
+            file.write(struct.pack("<BBB", *color))
+        file.write(struct.pack("<I", len(self.__index)))
+        for tick, offset in self.__index:
+            file.write(struct.pack("<IQ", tick, offset))
+        file.write(TRAILER.pack(footerOffset, END_MAGIC))
+        file.close()
+    # Getter
+    def getFrameCount(self):
+        '''
+        Returns the number of frames written so far
+
+        Parameters:
+            self (object): The ReplayRecorder object itself
+
+        Return value: An integer count
+
+        Sample call: frames = recorder.getFrameCount()
+        '''
+        return self.__frames
+
+class ReplayFrame:
+    '''
+    The decoded state of one tick of a replay file
+
+    Attributes:
+        tick (int): The tick
+        paddleX (float): The paddle's horizontal center
+        score (int): The score
+        flags (int): WON and LOST bits
+        balls (list): One (entityId, x, y, xSpeed, ySpeed, radius, color, alive) tuple per ball
+
+    Methods:
+        __init__: Instantiates the ReplayFrame object
+        getTick: Returns the tick attribute
+        getPaddleX: Returns the paddleX attribute
+        getScore: Returns the score attribute
+        getBalls: Returns the balls attribute
+        isWon: Returns whether the game had been won
+        isLost: Returns whether the game had been lost
+    '''
+    __slots__ = ("__tick", "__paddleX", "__score", "__flags", "__balls")
+    # Constructor
+    def __init__(self, tick, paddleX, score, flags, balls):
+        '''
+        Instantiates the ReplayFrame object
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+            tick (int): The tick
+            paddleX (float): The paddle's horizontal center
+            score (int): The score
+            flags (int): WON and LOST bits
+            balls (list): One (entityId, x, y, xSpeed, ySpeed, radius, color, alive) tuple per ball
+
+        Return value: None
+
+        Sample call: frame = ReplayFrame(0, 400, 0, 0, [])
+        '''
+        self.__tick = tick
+        self.__paddleX = paddleX
+        self.__score = score
+        self.__flags = flags
+        self.__balls = balls
+    # Getters
+    def getTick(self):
+        '''
+        Returns the frame's tick
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: An integer tick
+
+        Sample call: tick = frame.getTick()
+        '''
+        return self.__tick
+    def getPaddleX(self):
+        '''
+        Returns the paddle's horizontal center
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: A float
+
+        Sample call: paddle.setX(frame.getPaddleX())
+        '''
+        return self.__paddleX
+    def getScore(self):
+        '''
+        Returns the score
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: An integer score
+
+        Sample call: score = frame.getScore()
+        '''
+        return self.__score
+    def getBalls(self):
+        '''
+        Returns every ball in the frame, including balls from the keyframe that have left play
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: A list of (entityId, x, y, xSpeed, ySpeed, radius, color, alive) tuples
+
+        Sample call: for entityId, x, y, vx, vy, radius, color, alive in frame.getBalls(): ...
+        '''
+        return self.__balls
+    def isWon(self):
+        '''
+        Returns whether the game had been won by this tick
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: Boolean indicating a win
+
+        Sample call: if frame.isWon(): ...
+        '''
+        return bool(self.__flags & WON)
+    def isLost(self):
+        '''
+        Returns whether the game had been lost by this tick
+
+        Parameters:
+            self (object): The ReplayFrame object itself
+
+        Return value: Boolean indicating a loss
+
+        Sample call: if frame.isLost(): ...
+        '''
+        return bool(self.__flags & LOST)
+
+class ReplayReader:
+    '''
+    Reads a replay file through a memory map. Only the footer is read up front; any tick is found by
+    a binary search of the keyframe index followed by one offset calculation, so seeking does not
+    depend on how long the recording is.
+
+    Attributes:
+        width (int): The width of the recorded play area
+        height (int): The height of the recorded play area
+        palette (list): The recorded colors
+        keyTicks (list): The tick of every keyframe, in order
+        keyOffsets (list): The file offset of every keyframe
+        lastTick (int): The last recorded tick
+
+    Methods:
+        __init__: Opens and maps the file and reads its footer
+        readFrame: Decodes the frame for a tick
+        getSize: Returns the recorded play area's width and height
+        getFirstTick: Returns the first recorded tick
+        getLastTick: Returns the last recorded tick
+        getKeyframeCount: Returns the number of keyframes
+        close: Unmaps and closes the file
+    '''
+    # Constructor
+    def __init__(self, path):
+        '''
+        Opens a replay file, maps it into memory and reads its header and footer
+
+        Parameters:
+            self (object): The ReplayReader object itself
+            path (string): The file to read
+
+        Return value: None
+
+        Sample call: reader = ReplayReader("game.cmr")
+        '''
+        self.__file = open(path, "rb")
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.__data
+        magic, version, self.__width, self.__height, interval = HEADER.unpack_from(data, 0)
+        footerOffset, endMagic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if magic != MAGIC or endMagic != END_MAGIC or version != VERSION:
+            raise ValueError("%s is not a complete version %d replay file" % (path, VERSION))
+        offset = footerOffset
+        colors = struct.unpack_from("<H", data, offset)[0]
+        offset += 2
+        self.__palette = [struct.unpack_from("<BBB", data, offset + 3 * i) for i in range(colors)]
+        offset += 3 * colors
+        keyframes = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        entries = [struct.unpack_from("<IQ", data, offset + 12 * i) for i in range(keyframes)]
+        self.__keyTicks = [tick for tick, keyOffset in entries]
+        self.__keyOffsets = [keyOffset for tick, keyOffset in entries]
+        self.__footerOffset = footerOffset
+        self.__lastTick = None
+        if entries:
+            # The last tick is whatever frame ends right where the footer begins
+            lastKey = self.__readKeyframe(len(entries) - 1)
+            tickSize = DELTA.size + lastKey[2] * DELTA_BALL.size
+            self.__lastTick = lastKey[0] + (footerOffset - lastKey[1]) // tickSize
+    def __readKeyframe(self, position):
+        '''
+        Reads the header of a keyframe from the index
+
+        Parameters:
+            self (object): The ReplayReader object itself
+            position (int): The keyframe's position in the index
+
+        Return value: A tuple of (tick, offset just past the keyframe, ball count)
+        '''
+        offset = self.__keyOffsets[position]
+        kind, tick, paddleX, score, flags, count = KEYFRAME.unpack_from(self.__data, offset)
+        return (tick, offset + KEYFRAME.size + count * KEY_BALL.size, count)
+    def readFrame(self, tick):
+        '''
+        Decodes the frame for a tick by finding the keyframe at or before it and, if the tick is not
+        the keyframe itself, applying the one delta stored for it
+
+        Parameters:
+            self (object): The ReplayReader object itself
+            tick (int): The tick to read
+
+        Return value: A ReplayFrame object
+
+        Sample call: frame = reader.readFrame(5000)
+        '''
+        if self.__lastTick is None or tick < self.__keyTicks[0] or tick > self.__lastTick:
+            raise IndexError("tick %d is not in the recording" % tick)
+        data = self.__data
+        palette = self.__palette
+        position = bisect.bisect_right(self.__keyTicks, tick) - 1
+        offset = self.__keyOffsets[position]
+        kind, keyTick, paddleX, score, flags, count = KEYFRAME.unpack_from(data, offset)
+        offset += KEYFRAME.size
+        keyBalls = [KEY_BALL.unpack_from(data, offset + i * KEY_BALL.size) for i in range(count)]
+        if tick == keyTick:
+            balls = [(entityId, x, y, xSpeed, ySpeed, radius, palette[colorIndex], bool(alive)) \
+                     for entityId, x, y, xSpeed, ySpeed, radius, colorIndex, alive in keyBalls]
+            return ReplayFrame(tick, paddleX, score, flags, balls)
+        # Every delta after a keyframe has the keyframe's ball count, so they all have the same size
+        offset += count * KEY_BALL.size + (tick - keyTick - 1) * (DELTA.size + count * DELTA_BALL.size)
+        kind, deltaTick, paddleX, score, flags = DELTA.unpack_from(data, offset)
+        if kind != b"D" or deltaTick != tick:
+            raise ValueError("the replay file is damaged near tick %d" % tick)
+        offset += DELTA.size
+        balls = []
+        for i in range(count):
+            dx, dy, vx, vy, colorIndex, alive = DELTA_BALL.unpack_from(data, offset + i * DELTA_BALL.size)
+            entityId, keyX, keyY, keyXSpeed, keyYSpeed, radius, keyColor, keyAlive = keyBalls[i]
+            balls.append((entityId, keyX + dx / POSITION_SCALE, keyY + dy / POSITION_SCALE, vx / SPEED_SCALE, \
+                          vy / SPEED_SCALE, radius, palette[colorIndex], bool(alive)))
+        return ReplayFrame(tick, paddleX, score, flags, balls)
+    # Getters
+    def getSize(self):
+        '''
+        Returns the size of the recorded play area
+
+        Parameters:
+            self (object): The ReplayReader object itself
+
+        Return value: A tuple of (width, height)
+
+        Sample call: width, height = reader.getSize()
+        '''
+        return (self.__width, self.__height)
+    def getFirstTick(self):
+        '''
+        Returns the first recorded tick
+
+        Parameters:
+            self (object): The ReplayReader object itself
+
+        Return value: An integer tick, or None if nothing was recorded
+
+        Sample call: tick = reader.getFirstTick()
+        '''
+        return self.__keyTicks[0] if self.__keyTicks else None
+    def getLastTick(self):
+        '''
+        Returns the last recorded tick
+
+        Parameters:
+            self (object): The ReplayReader object itself
+
+        Return value: An integer tick, or None if nothing was recorded
+
+        Sample call: tick = reader.getLastTick()
+        '''
+        return self.__lastTick
+    def getKeyframeCount(self):
+        '''
+        Returns the number of keyframes in the file
+
+        Parameters:
+            self (object): The ReplayReader object itself
+
+        Return value: An integer count
+
+        Sample call: keyframes = reader.getKeyframeCount()
+        '''
+        return len(self.__keyTicks)
+    def close(self):
+        '''
+        Unmaps and closes the file
+
+        Parameters:
+            self (object): The ReplayReader object itself
+
+        Return value: None
+
+        Sample call: reader.close()
+        '''
+        self.__data.close()
+        self.__file.close()
+
+class ReplayPlayer:
+    '''
+    Turns decoded frames into Drawables, so playback uses the same Ball.draw and Paddle.draw as the
+    game. The Ball objects are reused from frame to frame.
+
+    Attributes:
+        reader (object): The ReplayReader frames come from
+        paddle (object): The Paddle that is placed at each frame's paddle position
+        balls (list): Ball objects reused for drawing
+
+    Methods:
+        __init__: Instantiates the ReplayPlayer object
+        show: Returns the Drawables for a tick
+    '''
+    # Constructor
+    def __init__(self, reader):
+        '''
+        Instantiates the ReplayPlayer object
+
+        Parameters:
+            self (object): The ReplayPlayer object itself
+            reader (object): The ReplayReader to play
+
+        Return value: None
+
+        Sample call: player = ReplayPlayer(ReplayReader("game.cmr"))
+        '''
+        width, height = reader.getSize()
+        self.__reader = reader
+        self.__paddle = Paddle(200, 20, DREXEL_BLUE, width, height, followMouse=False)
+        self.__balls = []
+    def show(self, tick):
+        '''
+        Places the paddle and the balls where they were at a tick
+
+        Parameters:
+            self (object): The ReplayPlayer object itself
+            tick (int): The tick to show
+
+        Return value: A tuple of (frame, drawables), where drawables is the paddle followed by a Ball
+        for each ball still in play
+
+        Sample call: frame, drawables = player.show(600)
+        '''
+        frame = self.__reader.readFrame(tick)
+        self.__paddle.setX(frame.getPaddleX())
+        drawables = [self.__paddle]
+        used = 0
+        for entityId, x, y, xSpeed, ySpeed, radius, color, alive in frame.getBalls():
+            if not alive:
+                continue
+            if used == len(self.__balls):
+                self.__balls.append(Ball())
+            ball = self.__balls[used]
+            used += 1
+            ball.setLoc(x, y)
+            ball.setRadius(radius)
+            ball.setColor(color)
+            ball.setXSpeed(xSpeed)
+            ball.setYSpeed(ySpeed)
+            drawables.append(ball)
+        return frame, drawables
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write, inspect or play back binary replay files.")
+    parser.add_argument("file", help="the replay file")
+    parser.add_argument("--from-log", metavar="LOG", help="write FILE by replaying a JSON input log headlessly")
+    parser.add_argument("--tick", type=int, help="print the state at one tick")
+    parser.add_argument("--play", action="store_true", help="play the file back in a window")
+    parser.add_argument("--start", type=int, default=0, help="tick to start playing from")
+    args = parser.parse_args()
+
+    if args.from_log:
+        from simulation import loadInputLog
+        log = loadInputLog(args.from_log)
+        world = log.makeWorld()
+        width, height = world.getSize()
+        recorder = ReplayRecorder(args.file, width, height)
+        for paddleX, dt in zip(log.getInputs(), log.getTimeSteps()):
+            world.step(paddleX, dt)
+            recorder.record(world)
+        recorder.close()
+
+    reader = ReplayReader(args.file)
+    print("%s: ticks %s to %s, %d keyframes, %d bytes" % (args.file, reader.getFirstTick(), \
+          reader.getLastTick(), reader.getKeyframeCount(), os.path.getsize(args.file)))
+    if args.tick is not None:
+        frame = reader.readFrame(args.tick)
+        print("tick %d: paddle %.1f, score %d" % (frame.getTick(), frame.getPaddleX(), frame.getScore()))
+        for ball in frame.getBalls():
+            print("  ball %d at (%.2f, %.2f) speed (%.2f, %.2f) radius %g color %s alive %s" % ball)
+    if args.play:
+        import pygame
+        pygame.init()
+        surface = pygame.display.set_mode(reader.getSize())
+        player = ReplayPlayer(reader)
+        fpsClock = pygame.time.Clock()
+        tick = max(args.start, reader.getFirstTick())
+        while tick <= reader.getLastTick():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    tick = reader.getLastTick()
+            frame, drawables = player.show(tick)
+            surface.fill((255, 255, 255))
+            for drawable in drawables:
+                drawable.draw(surface)
+            pygame.display.update()
+            fpsClock.tick(60)
+            tick += 1
+        pygame.quit()
+    reader.close()
\ No newline at end of file
@@ -0,0 +1,388 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Steps the World at a fixed rate on its own thread and publishes a snapshot after every
+# step, so the screen can be drawn at its own rate by blending the two most recent snapshots
+
+import threading, time
+import pygame
+
+class WorldSnapshot:
+    '''
+    A copy of what needs to be drawn from the World at one tick. It is never changed after it is
+    taken, so the drawing thread can read it while the World keeps moving.
+
+    Attributes:
+        tick (int): The World's tick when the snapshot was taken
+        time (float): The perf_counter time the snapshot's state belongs to
+        balls (tuple): One (entityId, x, y, radius, color) tuple per ball
+        paddle (tuple): The paddle's (left, top, right, bottom) edges
+        obstacles (list): The bricks still standing. Bricks never change, so they are shared rather than copied.
+        score (int): The World's score
+        won (boolean): Whether the game had been won
+        lost (boolean): Whether the game had been lost
+
+    Methods:
+        __init__: Instantiates the WorldSnapshot object
+        getTick: Returns the tick attribute
+        getTime: Returns the time attribute
+        getBalls: Returns the balls attribute
+        getPaddle: Returns the paddle attribute
+        getObstacles: Returns the obstacles attribute
+        getScore: Returns the score attribute
+        isWon: Returns the won attribute
+        isLost: Returns the lost attribute
+    '''
+    __slots__ = ("__tick", "__time", "__balls", "__paddle", "__obstacles", "__score", "__won", "__lost")
+    # Constructor
+    def __init__(self, world, time):
+        '''
+        Copies the drawable state out of a World
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+            world (object): The World to copy
+            time (float): The perf_counter time the World's current state belongs to
+
+        Return value: None
+
+        Sample call: snapshot = WorldSnapshot(world, time.perf_counter())
+        '''
+        self.__tick = world.getTick()
+        self.__time = time
+        balls = []
+        for entityId, ball in zip(world.getBallIds(), world.getBalls()):
+            x, y = ball.getLoc()
+            balls.append((entityId, x, y, ball.getRadius(), ball.getColor()))
+        self.__balls = tuple(balls)
+        self.__paddle = world.getPaddle().getBounds()
+        layer = world.getObstacles()
+        self.__obstacles = layer.getObstacles() if layer is not None else []
+        self.__score = world.getScore()
+        self.__won = world.isWon()
+        self.__lost = world.isLost()
+    # Getters
+    def getTick(self):
+        '''
+        Returns the World's tick when the snapshot was taken
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: An integer tick
+
+        Sample call: tick = snapshot.getTick()
+        '''
+        return self.__tick
+    def getTime(self):
+        '''
+        Returns the perf_counter time the snapshot's state belongs to
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: A time in seconds
+
+        Sample call: age = time.perf_counter() - snapshot.getTime()
+        '''
+        return self.__time
+    def getBalls(self):
+        '''
+        Returns the balls at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: A tuple of (entityId, x, y, radius, color) tuples
+
+        Sample call: for entityId, x, y, radius, color in snapshot.getBalls(): ...
+        '''
+        return self.__balls
+    def getPaddle(self):
+        '''
+        Returns the edges of the paddle at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: A tuple of four integers (left, top, right, bottom)
+
+        Sample call: left, top, right, bottom = snapshot.getPaddle()
+        '''
+        return self.__paddle
+    def getObstacles(self):
+        '''
+        Returns the bricks that were still standing at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: A list of Brick objects
+
+        Sample call: for brick in snapshot.getObstacles(): brick.draw(surface)
+        '''
+        return self.__obstacles
+    def getScore(self):
+        '''
+        Returns the score at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: An integer score
+
+        Sample call: score = snapshot.getScore()
+        '''
+        return self.__score
+    def isWon(self):
+        '''
+        Returns whether the game had been won at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: Boolean indicating a win
+
+        Sample call: if snapshot.isWon(): ...
+        '''
+        return self.__won
+    def isLost(self):
+        '''
+        Returns whether the game had been lost at the time of the snapshot
+
+        Parameters:
+            self (object): The WorldSnapshot object itself
+
+        Return value: Boolean indicating a loss
+
+        Sample call: if snapshot.isLost(): ...
+        '''
+        return self.__lost
+
+class SimulationThread:
+    '''
+    Steps a World at a fixed rate on a background thread. After each step a snapshot is published
+    into a pair of buffers holding the previous and the latest snapshot, which the drawing thread
+    reads and blends between.
+
+    Both sides are kept from waiting on each other. If the drawing thread falls behind, snapshots
+    it never got to see are replaced and counted as dropped. If the simulation falls more than
+    maxLag steps behind the clock, the missed steps are skipped and counted instead of being
+    run back to back.
+
+    Attributes:
+        world (object): The World being stepped. Only the simulation thread touches it while running.
+        input (object): The input source sampled once per tick, such as a SharedInput
+        rate (int): Steps per second
+        log (object): An InputLog that every tick's paddle position is recorded to, or None
+        maxLag (int): How many steps behind the simulation may get before steps are skipped
+        previous (object): The snapshot published before the latest one
+        latest (object): The most recently published snapshot
+        published (int): Snapshots published so far
+        dropped (int): Snapshots replaced before the drawing thread read them
+        lag (float): How many steps behind the clock the simulation was at its last step
+        worstLag (float): The largest lag seen
+        skipped (int): Steps skipped to catch up
+
+    Methods:
+        __init__: Instantiates the SimulationThread object
+        start: Starts stepping the World on the background thread
+        stop: Stops the thread and waits for it to finish
+        getFrame: Returns the two latest snapshots and how far to blend between them
+        getMetrics: Returns the lag and dropped-snapshot counts
+    '''
+    # Constructor
+    def __init__(self, world, inputSource, rate=60, log=None, maxLag=5):
+        '''
+        Instantiates the SimulationThread object
+
+        Parameters:
+            self (object): The SimulationThread object itself
+            world (object): The World to step
+            inputSource (object): The input source sampled once per tick
+            rate (int): Steps per second
+            log (object): An InputLog to record every tick's paddle position to, or None
+            maxLag (int): How many steps behind the simulation may get before steps are skipped
+
+        Return value: None
+
+        Sample call: simulation = SimulationThread(world, SharedInput(), 60, log)
+        '''
+        self.__world = world
+        self.__input = inputSource
+        self.__rate = rate
+        self.__log = log
+        self.__maxLag = maxLag
+        self.__lock = threading.Lock()
+        self.__stopping = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="simulation", daemon=True)
+        self.__previous = None
+        self.__latest = None
+        self.__read = True
+        self.__published = 0
+        self.__dropped = 0
+        self.__lag = 0.0
+        self.__worstLag = 0.0
+        self.__skipped = 0
+    def start(self):
+        '''
+        Publishes a snapshot of the World as it is now and starts stepping it on the background thread
+
+        Parameters:
+            self (object): The SimulationThread object itself
+
+        Return value: None
+
+        Sample call: simulation.start()
+        '''
+        self.__publish(WorldSnapshot(self.__world, time.perf_counter()))
+        self.__thread.start()
+    def stop(self):
+        '''
+        Stops the background thread and waits for it to finish its current step, after which the
+        World and the InputLog can be used again from the calling thread
+
+        Parameters:
+            self (object): The SimulationThread object itself
+
+        Return value: None
+
+        Sample call: simulation.stop()
+        '''
+        self.__stopping.set()
+        if self.__thread.is_alive():
+            self.__thread.join()
+    def __run(self):
+        '''
+        The background thread's loop: waits for each step's turn on the clock, steps the World and
+        publishes a snapshot
+
+        Parameters:
+            self (object): The SimulationThread object itself
+
+        Return value: None
+        '''
+        period = 1 / self.__rate
+        world = self.__world
+        nextTime = time.perf_counter() + period
+        while not self.__stopping.is_set():
+            now = time.perf_counter()
+            if now < nextTime:
+                # Sleeps until the next step is due, waking straight away if stop is called
+                self.__stopping.wait(nextTime - now)
+                continue
+            lag = (now - nextTime) / period
+            self.__lag = lag
+            self.__worstLag = max(self.__worstLag, lag)
+            if lag > self.__maxLag:
+                # Gives up on the steps that are too late to matter instead of rushing through them
+                behind = int(lag)
+                self.__skipped += behind
+                nextTime += behind * period
+            frame = self.__input.sample(world.getTick())
+            if self.__log is not None:
+                self.__log.record(frame.getMouseX())
+            world.stepFrame(frame)
+            self.__publish(WorldSnapshot(world, nextTime))
+            nextTime += period
+    def __publish(self, snapshot):
+        '''
+        Makes a snapshot the latest one, moving the old latest one into the previous buffer
+
+        Parameters:
+            self (object): The SimulationThread object itself
+            snapshot (object): The new WorldSnapshot
+
+        Return value: None
+        '''
+        with self.__lock:
+            if not self.__read:
+                self.__dropped += 1
+            self.__previous = self.__latest
+            self.__latest = snapshot
+            self.__read = False
+            self.__published += 1
+    # Getters
+    def getFrame(self, now=None):
+        '''
+        Returns what the drawing thread should show: the two most recent snapshots and how far to
+        blend from the first to the second. The screen is drawn one step behind the simulation, so
+        there is always a newer snapshot to blend towards.
+
+        Parameters:
+            self (object): The SimulationThread object itself
+            now (float): The current perf_counter time, or None to read the clock
+
+        Return value: A tuple of (previous, latest, alpha), where alpha runs from 0 (show previous)
+        to 1 (show latest)
+
+        Sample call: previous, latest, alpha = simulation.getFrame()
+        '''
+        with self.__lock:
+            previous = self.__previous
+            latest = self.__latest
+            self.__read = True
+        if previous is None:
+            return latest, latest, 1.0
+        if now is None:
+            now = time.perf_counter()
+        span = latest.getTime() - previous.getTime()
+        if span <= 0:
+            return previous, latest, 1.0
+        alpha = (now - 1 / self.__rate - previous.getTime()) / span
+        return previous, latest, min(1.0, max(0.0, alpha))
+    def getMetrics(self):
+        '''
+        Returns how well the simulation and the drawing thread are keeping up with each other
+
+        Parameters:
+            self (object): The SimulationThread object itself
+
+        Return value: A dictionary with the ticks simulated, the snapshots published and dropped,
+        the current and worst lag in steps, and the steps skipped
+
+        Sample call: print(simulation.getMetrics())
+        '''
+        with self.__lock:
+            latest = self.__latest
+            return {"ticks": latest.getTick() if latest is not None else 0, \
+                    "snapshotsPublished": self.__published, "snapshotsDropped": self.__dropped, \
+                    "lagSteps": self.__lag, "worstLagSteps": self.__worstLag, "skippedSteps": self.__skipped}
+
+def drawSnapshot(surface, previous, latest, alpha, paddleColor, spriteCache=None):
+    '''
+    Draws the paddle, the bricks and the balls part of the way from one snapshot to the next. Balls that only
+    appear in the latest snapshot are drawn where it has them.
+
+    Parameters:
+        surface (object): The surface to draw on
+        previous (object): The older WorldSnapshot
+        latest (object): The newer WorldSnapshot
+        alpha (float): How far to blend, from 0 (previous) to 1 (latest)
+        paddleColor (tuple): RGB tuple for the paddle
+        spriteCache (object): A SpriteCache to draw the balls from, or None to draw circles
+
+    Return value: None
+
+    Sample call: drawSnapshot(surface, *simulation.getFrame(), DREXEL_BLUE)
+    '''
+    oldLeft, top, oldRight, bottom = previous.getPaddle()
+    left, top, right, bottom = latest.getPaddle()
+    shift = (oldLeft - left) * (1 - alpha)
+    pygame.draw.rect(surface, paddleColor, (left + shift, top, right - left, bottom - top))
+    for obstacle in latest.getObstacles():
+        obstacle.draw(surface)
+
+    oldPositions = {entityId: (x, y) for entityId, x, y, radius, color in previous.getBalls()}
+    sequence = []
+    for entityId, x, y, radius, color in latest.getBalls():
+        old = oldPositions.get(entityId)
+        if old is not None:
+            x = old[0] + (x - old[0]) * alpha
+            y = old[1] + (y - old[1]) * alpha
+        if spriteCache is not None:
+            sprite, offset = spriteCache.get(radius, color)
+            sequence.append((sprite, (x - offset, y - offset)))
+        else:
+            pygame.draw.circle(surface, color, (x, y), radius)
+    if sequence:
+        surface.blits(sequence, False)
\ No newline at end of file
@@ -0,0 +1,566 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Tools for running the World deterministically: a fixed-timestep clock, a log of
+# the paddle position used on every tick that can be saved and replayed, and a digest of the World's
+# state that can be compared between runs
+
+import hashlib, json, math, sys, time
+from obstacles import ObstacleLayer, makeBrickWall
+from world import World
+
+class FixedTimestep:
+    '''
+    Converts real elapsed time into a whole number of fixed-length simulation steps. Time that does
+    not make up a full step is carried over to the next frame.
+
+    Attributes:
+        rate (int): The number of simulation steps per second
+        maxSteps (int): The most steps handed out for a single frame, so a long stall does not
+        make the game try to catch up all at once
+        accumulator (float): Real time, in seconds, that has not been simulated yet
+
+    Methods:
+        __init__: Instantiates the FixedTimestep object
+        advance: Adds elapsed time and returns how many steps should be run
+        getRate: Returns the rate attribute
+    '''
+    # Constructor
+    def __init__(self, rate=60, maxSteps=5):
+        '''
+        Instantiates the FixedTimestep object
+
+        Parameters:
+            self (object): The FixedTimestep object itself
+            rate (int): The number of simulation steps per second
+            maxSteps (int): The most steps handed out for a single frame
+
+        Return value: None
+
+        Sample call: timestep = FixedTimestep(60)
+        '''
+        self.__rate = rate
+        self.__maxSteps = maxSteps
+        self.__accumulator = 0.0
+    def advance(self, elapsed):
+        '''
+        Adds real elapsed time and returns how many fixed steps it covers
+
+        Parameters:
+            self (object): The FixedTimestep object itself
+            elapsed (float): Seconds since the last call
+
+        Return value: The number of steps to run this frame
+
+        Sample call: for _ in range(timestep.advance(fpsClock.tick(60) / 1000)): world.step(x)
+        '''
+        self.__accumulator += elapsed
+        steps = int(self.__accumulator * self.__rate)
+        self.__accumulator -= steps / self.__rate
+        if steps > self.__maxSteps:
+            # Drops the time that cannot be caught up on instead of letting it pile up
+            steps = self.__maxSteps
+            self.__accumulator = 0.0
+        return steps
+    # Getter
+    def getRate(self):
+        '''
+        Returns the number of simulation steps per second
+
+        Parameters:
+            self (object): The FixedTimestep object itself
+
+        Return value: An integer rate
+
+        Sample call: rate = timestep.getRate()
+        '''
+        return self.__rate
+
+class FramePacer:
+    '''
+    Turns the real time each frame took into steps of the World, so the game runs at the same speed
+    however fast the computer draws it. Step lengths are in frames of 1/rate seconds.
+
+    In "delta" mode every frame is followed by one step as long as the real time that passed, split
+    into equal steps of at most maxStep frames so a stall cannot carry a ball through the paddle. A
+    stall longer than maxSkip + 1 such steps is cut short.
+
+    In "adaptive" mode the game moves in steps of a fixed length, at most one per frame, and the time
+    not yet simulated is carried over. A frame that leaves the game a whole step behind is not drawn,
+    so the loop comes straight back for the next step instead, up to maxSkip frames in a row. If
+    frames keep running over budget for most of a window, the steps are made longer, trading detail
+    for fewer steps per second, and are brought back to one frame once the load has passed.
+
+    Attributes:
+        mode (string): "delta" or "adaptive"
+        rate (int): Frames per second the game is meant to run at
+        budget (float): The time one frame may take, in seconds
+        maxStep (float): The longest step, in frames, that delta mode makes
+        maxSkip (int): The most frames in a row adaptive mode leaves undrawn
+        tolerance (float): How far, as a share of the budget, a frame may run over before it counts
+        levels (tuple): The step lengths adaptive mode moves between, from the most detailed
+        window (int): The number of frames whose overruns decide whether to lower the detail
+        level (int): The index into levels of the step length in use
+        backlog (float): Frames of real time adaptive mode has not simulated yet
+        render (boolean): Whether the last frame handed out should be drawn
+        recent (list): Whether each frame of the current window ran over budget
+        calm (int): Frames in a row that have kept to the budget
+        frames (int): Frames paced so far
+        steps (int): Steps handed out so far
+        skipped (int): Frames left undrawn
+        skipStreak (int): Frames left undrawn since the last drawn one
+        overruns (int): Frames that took longer than the budget allows
+        worstFrame (float): The longest frame seen, in seconds
+        dropped (float): Frames of real time given up because the game could not catch up
+        detailChanges (int): How many times the step length has changed
+
+    Methods:
+        __init__: Instantiates the FramePacer object
+        advance: Takes the last frame's real time and returns the steps to run this frame
+        shouldRender: Returns the render attribute
+        getStepLength: Returns the step length adaptive mode is using
+        getMetrics: Returns the frame, skip, overrun and detail counts
+    '''
+    # Constructor
+    def __init__(self, mode="adaptive", rate=60, maxStep=3, maxSkip=5, tolerance=0.2, levels=(1, 2, 3), \
+                 window=60):
+        '''
+        Instantiates the FramePacer object
+
+        Parameters:
+            self (object): The FramePacer object itself
+            mode (string): "delta" to step by the real time of each frame, or "adaptive" to step in fixed
+            lengths and skip drawing when behind
+            rate (int): Frames per second the game is meant to run at
+            maxStep (float): The longest step, in frames, that delta mode makes
+            maxSkip (int): The most frames in a row adaptive mode leaves undrawn
+            tolerance (float): How far, as a share of the budget, a frame may run over before it counts
+            levels (tuple): The step lengths adaptive mode may use, from the most detailed
+            window (int): The number of frames looked at before deciding to change the step length
+
+        Return value: None
+
+        Sample call: pacer = FramePacer("adaptive")
+        '''
+        if mode not in ("delta", "adaptive"):
+            raise ValueError("mode must be 'delta' or 'adaptive'")
+        self.__mode = mode
+        self.__rate = rate
+        self.__budget = 1 / rate
+        self.__maxStep = maxStep
+        self.__maxSkip = maxSkip
+        self.__tolerance = tolerance
+        self.__levels = tuple(levels)
+        self.__window = window
+        self.__level = 0
+        self.__backlog = 0.0
+        self.__render = True
+        self.__recent = []
+        self.__calm = 0
+        self.__frames = 0
+        self.__steps = 0
+        self.__skipped = 0
+        self.__skipStreak = 0
+        self.__overruns = 0
+        self.__worstFrame = 0.0
+        self.__dropped = 0.0
+        self.__detailChanges = 0
+    def advance(self, elapsed):
+        '''
+        Takes the real time the last frame took and returns the steps to run before this frame is drawn
+
+        Parameters:
+            self (object): The FramePacer object itself
+            elapsed (float): Seconds since the last call
+
+        Return value: A list of step lengths in frames, each one to be passed to World.step
+
+        Sample call: for dt in pacer.advance(fpsClock.tick(60) / 1000): world.step(x, dt)
+        '''
+        self.__frames += 1
+        self.__worstFrame = max(self.__worstFrame, elapsed)
+        overran = elapsed > self.__budget * (1 + self.__tolerance)
+        if overran:
+            self.__overruns += 1
+        frames = elapsed * self.__rate
+        if self.__mode == "delta":
+            longest = self.__maxStep * (self.__maxSkip + 1)
+            if frames > longest:
+                self.__dropped += frames - longest
+                frames = longest
+            count = max(1, math.ceil(frames / self.__maxStep))
+            steps = [frames / count] * count
+            self.__steps += count
+            return steps
+
+        length = self.__levels[self.__level]
+        self.__backlog += frames
+        steps = []
+        # A step is run a little early rather than late, so clock jitter does not make frames with no step
+        if self.__backlog >= length * (1 - self.__tolerance):
+            steps.append(length)
+            self.__backlog -= length
+            self.__steps += 1
+        behind = self.__backlog >= length
+        if behind and self.__skipStreak < self.__maxSkip:
+            self.__render = False
+            self.__skipped += 1
+            self.__skipStreak += 1
+        else:
+            if behind:
+                # Too far behind to catch up without drawing, so the rest of the backlog is given up
+                self.__dropped += self.__backlog
+                self.__backlog = 0.0
+            self.__render = True
+            self.__skipStreak = 0
+        self.__adjustDetail(overran or behind)
+        return steps
+    def __adjustDetail(self, loaded):
+        '''
+        Makes the steps longer when most frames of a window were over budget, and shorter again once
+        frames have kept to the budget for several windows in a row
+
+        Parameters:
+            self (object): The FramePacer object itself
+            loaded (boolean): Whether the latest frame ran over budget or left the game behind
+
+        Return value: None
+        '''
+        self.__recent.append(loaded)
+        self.__calm = 0 if loaded else self.__calm + 1
+        if len(self.__recent) >= self.__window:
+            if sum(self.__recent) * 2 > len(self.__recent) and self.__level < len(self.__levels) - 1:
+                self.__level += 1
+                self.__detailChanges += 1
+            self.__recent = []
+        if self.__calm >= 4 * self.__window and self.__level > 0:
+            self.__level -= 1
+            self.__detailChanges += 1
+            self.__calm = 0
+    # Getters
+    def shouldRender(self):
+        '''
+        Returns whether the frame whose steps were last handed out should be drawn
+
+        Parameters:
+            self (object): The FramePacer object itself
+
+        Return value: A boolean
+
+        Sample call: if pacer.shouldRender(): pygame.display.update()
+        '''
+        return self.__render
+    def getStepLength(self):
+        '''
+        Returns the length of the steps adaptive mode is making
+
+        Parameters:
+            self (object): The FramePacer object itself
+
+        Return value: A step length in frames
+
+        Sample call: length = pacer.getStepLength()
+        '''
+        return self.__levels[self.__level]
+    def getMetrics(self):
+        '''
+        Returns how well the game has been keeping to its frame budget
+
+        Parameters:
+            self (object): The FramePacer object itself
+
+        Return value: A dictionary with the frames paced, the steps run, the frames left undrawn, the
+        frames over budget, the longest frame in milliseconds, the time given up in frames, the
+        current step length and how many times it changed
+
+        Sample call: print(pacer.getMetrics())
+        '''
+        return {"frames": self.__frames, "steps": self.__steps, "framesSkipped": self.__skipped, \
+                "overruns": self.__overruns, "worstFrameMs": self.__worstFrame * 1000, \
+                "droppedFrames": self.__dropped, "stepLength": self.getStepLength(), \
+                "detailChanges": self.__detailChanges}
+
+class InputLog:
+    '''
+    The paddle position used on every tick of a game, along with the settings needed to rebuild
+    the same World. Replaying the log reproduces the game exactly.
+
+    Attributes:
+        seed (int): The seed the World was created with
+        width (int): The width of the play area
+        height (int): The height of the play area
+        inputs (list): The paddle's horizontal center on each tick, in order
+        collisionMode (string): The collision mode the World was created with
+        brickRows (int): The number of rows in the level's brick wall, or 0 for no bricks
+        contactCache (boolean): Whether the World only counts a ball collision when the balls start touching
+        timeSteps (list): How long each tick's step was, in frames. Games paced by real time have
+        steps of different lengths, and the replay has to use the same ones.
+
+    Methods:
+        __init__: Instantiates the InputLog object
+        record: Adds the paddle position used on the next tick
+        getInputs: Returns the inputs attribute
+        getTimeSteps: Returns the timeSteps attribute
+        makeWorld: Builds a new World with the log's settings
+        makeEmpty: Builds a new InputLog with the log's settings and no recorded ticks
+        save: Writes the log to a JSON file
+    '''
+    # Constructor
+    def __init__(self, seed, width=800, height=600, inputs=None, collisionMode="discrete", brickRows=0, \
+                 timeSteps=None, contactCache=False):
+        '''
+        Instantiates the InputLog object
+
+        Parameters:
+            self (object): The InputLog object itself
+            seed (int): The seed the World was created with
+            width (int): The width of the play area
+            height (int): The height of the play area
+            inputs (list): Paddle positions that were already recorded, if any
+            collisionMode (string): The World's collision mode, "discrete" or "swept"
+            brickRows (int): The number of rows in the level's brick wall, or 0 for no bricks
+            timeSteps (list): The length of each recorded tick's step, or None if every step was one frame
+            contactCache (boolean): Whether the World keeps a ContactCache
+
+        Return value: None
+
+        Sample call: log = InputLog(1234)
+        '''
+        self.__seed = seed
+        self.__width = width
+        self.__height = height
+        self.__inputs = list(inputs) if inputs is not None else []
+        self.__collisionMode = collisionMode
+        self.__brickRows = brickRows
+        self.__timeSteps = list(timeSteps) if timeSteps is not None else [1] * len(self.__inputs)
+        self.__contactCache = contactCache
+    def record(self, paddleX, dt=1):
+        '''
+        Adds the paddle position and step length used on the next tick
+
+        Parameters:
+            self (object): The InputLog object itself
+            paddleX (int/float): The paddle's horizontal center
+            dt (float): How long the tick's step was, in frames
+
+        Return value: None
+
+        Sample call: log.record(paddleX)
+        '''
+        self.__inputs.append(paddleX)
+        self.__timeSteps.append(dt)
+    # Getters
+    def getInputs(self):
+        '''
+        Returns the recorded paddle positions
+
+        Parameters:
+            self (object): The InputLog object itself
+
+        Return value: A list with one paddle position per tick
+
+        Sample call: inputs = log.getInputs()
+        '''
+        return self.__inputs
+    def getTimeSteps(self):
+        '''
+        Returns the length of every recorded tick's step
+
+        Parameters:
+            self (object): The InputLog object itself
+
+        Return value: A list with one step length, in frames, per tick
+
+        Sample call: for paddleX, dt in zip(log.getInputs(), log.getTimeSteps()): world.step(paddleX, dt)
+        '''
+        return self.__timeSteps
+    def makeWorld(self, broadPhase="grid", useBallSystem=False):
+        '''
+        Builds a new World with the seed, play-area size and level the log was recorded with
+
+        Parameters:
+            self (object): The InputLog object itself
+            broadPhase (string): "grid" or "brute", passed to the World
+            useBallSystem (boolean): Whether the World stores its balls in a BallSystem
+
+        Return value: A World object
+
+        Sample call: world = log.makeWorld()
+        '''
+        obstacles = None
+        if self.__brickRows:
+            obstacles = ObstacleLayer(makeBrickWall(self.__width, self.__height, self.__brickRows))
+        return World(self.__width, self.__height, broadPhase, useBallSystem, self.__seed, \
+                     collisionMode=self.__collisionMode, obstacles=obstacles, contactCache=self.__contactCache)
+    def makeEmpty(self):
+        '''
+        Builds a new InputLog with the seed, play-area size and level the log was recorded with, but no
+        recorded ticks. A replayed game records into one of these so its ticks are not added after the
+        ones being replayed.
+
+        Parameters:
+            self (object): The InputLog object itself
+
+        Return value: An InputLog object
+
+        Sample call: recording = log.makeEmpty()
+        '''
+        return InputLog(self.__seed, self.__width, self.__height, collisionMode=self.__collisionMode, \
+                        brickRows=self.__brickRows, contactCache=self.__contactCache)
+    def save(self, path):
+        '''
+        Writes the log to a JSON file. Floats are written so that they read back unchanged. The
+        step lengths are only written when some step was not exactly one frame.
+
+        Parameters:
+            self (object): The InputLog object itself
+            path (string): The file to write
+
+        Return value: None
+
+        Sample call: log.save("game.json")
+        '''
+        data = {"seed": self.__seed, "width": self.__width, "height": self.__height, \
+                "collisionMode": self.__collisionMode, "brickRows": self.__brickRows, \
+                "contactCache": self.__contactCache, "inputs": self.__inputs}
+        if any(dt != 1 for dt in self.__timeSteps):
+            data["timeSteps"] = self.__timeSteps
+        with open(path, "w") as file:
+            json.dump(data, file)
+
+def loadInputLog(path):
+    '''
+    Reads an InputLog that was written with InputLog.save
+
+    Parameters:
+        path (string): The file to read
+
+    Return value: An InputLog object
+
+    Sample call: log = loadInputLog("game.json")
+    '''
+    with open(path) as file:
+        data = json.load(file)
+    return InputLog(data["seed"], data["width"], data["height"], data["inputs"], \
+                    data.get("collisionMode", "discrete"), data.get("brickRows", 0), data.get("timeSteps"), \
+                    data.get("contactCache", False))
+
+def stateDigest(world):
+    '''
+    Hashes everything that makes up the World's state. Floats are hashed by their exact bits, so
+    two digests only match if the states are bit-identical.
+
+    Parameters:
+        world (object): The World to hash
+
+    Return value: A hexadecimal SHA-256 string
+
+    Sample call: digest = stateDigest(world)
+    '''
+    parts = [str(world.getTick()), str(world.getScore()), str(world.isWon()), str(world.isLost()), \
+             repr(world.getRng().getstate())]
+    for ball in world.getBalls():
+        x, y = ball.getLoc()
+        parts.append(" ".join([float(x).hex(), float(y).hex(), float(ball.getXSpeed()).hex(), \
+                               float(ball.getYSpeed()).hex(), float(ball.getRadius()).hex(), \
+                               str(ball.getColor())]))
+    # Which bricks are left and which balls are already touching change how the next ticks play out
+    if world.getObstacles() is not None:
+        parts.append(" ".join(str(int(alive)) for alive in world.getObstacles().getState()[0]))
+    if world.getContacts() is not None:
+        parts.append(repr(sorted(world.getContacts().getContacts())))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def replay(log, broadPhase="grid"):
+    '''
+    Runs a World through every input in a log as fast as possible
+
+    Parameters:
+        log (object): The InputLog to replay
+        broadPhase (string): "grid" or "brute", passed to the World
+
+    Return value: The World after the last input
+
+    Sample call: world = replay(loadInputLog("game.json"))
+    '''
+    world = log.makeWorld(broadPhase)
+    for paddleX, dt in zip(log.getInputs(), log.getTimeSteps()):
+        world.step(paddleX, dt)
+    return world
+
+def branchFutures(world, futures, steps):
+    '''
+    Plays several different futures from the World's current state, one after another, and reports
+    how each of them ends. Every future starts from the same snapshot, and the World is put back into
+    that state once they have all been played.
+
+    Parameters:
+        world (object): The World to branch from
+        futures (list): The futures to play. Each is either a list with one paddle position, or one
+        (paddle position, step length) pair, per tick, or a function that is given the World before
+        each step and returns the paddle position.
+        steps (int): The most ticks to play in each future. A list of positions also ends when it runs out.
+
+    Return value: A list with one dictionary per future holding the ticks played, the final score,
+    whether the game was won or lost, the balls left in play and the final state digest
+
+    Sample call: outcomes = branchFutures(world, [recorded, lambda world: 400], 600)
+    '''
+    start = world.snapshot()
+    outcomes = []
+    for future in futures:
+        world.restore(start)
+        for tick in range(steps):
+            if world.isWon() or world.isLost():
+                break
+            if callable(future):
+                world.step(future(world))
+            elif tick < len(future):
+                move = future[tick]
+                if isinstance(move, tuple):
+                    world.step(*move)
+                else:
+                    world.step(move)
+            else:
+                break
+        outcomes.append({"ticks": world.getTick() - start.getTick(), "score": world.getScore(), \
+                         "won": world.isWon(), "lost": world.isLost(), "balls": len(world.getBalls()), \
+                         "digest": stateDigest(world)})
+    world.restore(start)
+    return outcomes
+
+if __name__ == "__main__":
+    # Replays a recorded game twice with no frame cap, checks both runs match and reports the step rate
+    if len(sys.argv) < 2:
+        print("Usage: python simulation.py <input log>")
+        sys.exit(1)
+    log = loadInputLog(sys.argv[1])
+    start = time.perf_counter()
+    first = replay(log)
+    elapsed = time.perf_counter() - start
+    second = replay(log)
+    print("Ticks:", len(log.getInputs()), "Steps per second:", round(len(log.getInputs()) / max(elapsed, 1e-9)))
+    print("Digest:", stateDigest(first))
+    print("Identical:", stateDigest(first) == stateDigest(second))
+
+    # Snapshots the game halfway through, then tries the recorded second half against two other futures
+    inputs = log.getInputs()
+    moves = list(zip(inputs, log.getTimeSteps()))
+    middle = len(inputs) // 2
+    world = log.makeWorld()
+    for paddleX, dt in moves[:middle]:
+        world.step(paddleX, dt)
+    start = time.perf_counter()
+    state = world.snapshot()
+    snapshotTime = time.perf_counter() - start
+    futures = [moves[middle:], lambda world: world.getBalls()[0].getLoc()[0], lambda world: world.getSize()[0] / 2]
+    outcomes = branchFutures(world, futures, len(inputs) - middle)
+    print("Snapshot at tick", middle, "took", round(snapshotTime * 1e6), "us")
+    # Branches stop when the game ends, so they are checked against a run that stops there too
+    reference = log.makeWorld()
+    for paddleX, dt in moves:
+        if reference.isWon() or reference.isLost():
+            break
+        reference.step(paddleX, dt)
+    print("Restored branch matches a straight run:", outcomes[0]["digest"] == stateDigest(reference))
+    for name, outcome in zip(["recorded", "follow the first ball", "stay in the middle"], outcomes):
+        print(" ", name + ":", {key: value for key, value in outcome.items() if key != "digest"})
@@ -0,0 +1,119 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Pre-renders each (radius, color) ball once as a sprite with see-through corners so
+# that drawing every ball in a frame is a single batched blit instead of one circle rasterization per ball
+
+import math
+from collections import OrderedDict
+import pygame
+
+class SpriteCache:
+    '''
+    A bounded cache of ball sprites keyed by (radius, color). Each sprite is a surface holding one
+    filled circle, and the least recently used sprite is dropped when the cache is full. By default
+    the corners around the circle are cut out with an RLE-accelerated color key, which keeps the
+    same hard edge as pygame.draw.circle. Sprites with per-pixel alpha can be asked for instead.
+
+    Attributes:
+        maxSize (int): The most sprites kept at once
+        perPixelAlpha (boolean): Whether sprites use per-pixel alpha instead of a color key
+
+    Methods:
+        __init__: Instantiates the SpriteCache object
+        get: Returns the sprite for a radius and color, rendering it the first time
+        getSize: Returns the number of sprites currently cached
+    '''
+    # Constructor
+    def __init__(self, maxSize=64, perPixelAlpha=False):
+        '''
+        Instantiates the SpriteCache object
+
+        Parameters:
+            self (object): The SpriteCache object itself
+            maxSize (int): The most sprites kept at once
+            perPixelAlpha (boolean): Whether sprites use per-pixel alpha instead of a color key
+
+        Return value: None
+
+        Sample call: cache = SpriteCache()
+        '''
+        self.__maxSize = maxSize
+        self.__perPixelAlpha = perPixelAlpha
+        self.__sprites = OrderedDict()
+    def get(self, radius, color):
+        '''
+        Returns the sprite for a radius and color, rendering it the first time it is asked for
+
+        Parameters:
+            self (object): The SpriteCache object itself
+            radius (int/float): The ball's radius
+            color (tuple): The ball's RGB color
+
+        Return value: A tuple of (surface, offset), where offset is the distance from the sprite's
+        top-left corner to the ball's center
+
+        Sample call: sprite, offset = cache.get(18, BLACK)
+        '''
+        key = (radius, color)
+        sprite = self.__sprites.get(key)
+        if sprite is not None:
+            self.__sprites.move_to_end(key)
+            return sprite
+        # One pixel of room on each side keeps the circle's edge inside the surface
+        size = int(math.ceil(2 * radius)) + 2
+        # Converting to the display's pixel format, when there is a display, makes every blit cheaper
+        converted = pygame.display.get_surface() is not None
+        if self.__perPixelAlpha:
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 0))
+            pygame.draw.circle(surface, color, (size / 2, size / 2), radius)
+            if converted:
+                surface = surface.convert_alpha()
+        else:
+            # The key only has to differ from the ball's own color
+            colorKey = (255, 0, 255) if tuple(color) != (255, 0, 255) else (0, 255, 255)
+            surface = pygame.Surface((size, size))
+            surface.fill(colorKey)
+            pygame.draw.circle(surface, color, (size / 2, size / 2), radius)
+            if converted:
+                surface = surface.convert()
+            surface.set_colorkey(colorKey, pygame.RLEACCEL)
+        sprite = (surface, size / 2)
+        self.__sprites[key] = sprite
+        if len(self.__sprites) > self.__maxSize:
+            self.__sprites.popitem(last=False)
+        return sprite
+    # Getter
+    def getSize(self):
+        '''
+        Returns the number of sprites currently cached
+
+        Parameters:
+            self (object): The SpriteCache object itself
+
+        Return value: An integer count
+
+        Sample call: count = cache.getSize()
+        '''
+        return len(self.__sprites)
+
+def drawBalls(surface, balls, cache):
+    '''
+    Draws every visible ball with one Surface.blits call, using cached sprites
+
+    Parameters:
+        surface (object): The surface to draw on
+        balls (list): The Ball objects to draw
+        cache (object): The SpriteCache the sprites come from
+
+    Return value: None
+
+    Sample call: drawBalls(surface, world.getBalls(), cache)
+    '''
+    sequence = []
+    for ball in balls:
+        if ball.isVisible():
+            sprite, offset = ball.getSprite(cache)
+            x, y = ball.getLoc()
+            sequence.append((sprite, (x - offset, y - offset)))
+    surface.blits(sequence, False)
@@ -0,0 +1,120 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Measures how long a fresh process takes to get going: the time spent importing the
+# game's modules and the time until the first tick has been simulated (and, for the front end, drawn). Every
+# run is a new Python process, since that is the cost batch and headless jobs pay over and over.
+
+import argparse, json, os, subprocess, sys, time
+
+# What each kind of process imports, and what it does before its first tick is finished
+CASES = {
+    "physics": ("import world",
+                "game = world.World(800, 600, seed=1)\n"
+                "game.step(400)"),
+    "simulation": ("import simulation",
+                   "game = simulation.InputLog(1).makeWorld()\n"
+                   "game.step(400)\n"
+                   "simulation.stateDigest(game)"),
+    "vector": ("import env",
+               "games = env.VecEnv(64)\n"
+               "games.reset()\n"
+               "games.step(env.np.full(64, 400.0))"),
+    "frontend": ("import pygame, world, text",
+                 "pygame.init()\n"
+                 "surface = pygame.display.set_mode((800, 600))\n"
+                 "game = world.World(800, 600, seed=1)\n"
+                 "game.step(400)\n"
+                 "for ball in game.getBalls(): ball.draw(surface)\n"
+                 "game.getPaddle().draw(surface)\n"
+                 "text.CounterText('Number of green balls: ', 0, 10, 10).draw(surface)\n"
+                 "pygame.display.flip()"),
+}
+
+# The program each measured process runs. It reports its own timings as JSON on the last line.
+CHILD = """
+import time
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+{firstTick}
+finished = time.perf_counter()
+import json, sys
+print(json.dumps({{"import": imported - start, "firstTick": finished - imported, "pygame": "pygame" in sys.modules}}))
+"""
+
+def runOnce(case):
+    '''
+    Starts a fresh Python process for one case and times it
+
+    Parameters:
+        case (string): A key of CASES
+
+    Return value: A dictionary with the import time, the time from the imports to the end of the first
+    tick, the whole process's wall time (all in seconds) and whether pygame ended up imported
+
+    Sample call: timings = runOnce("physics")
+    '''
+    imports, firstTick = CASES[case]
+    code = CHILD.format(imports=imports, firstTick=firstTick)
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), \
+                            env=environment, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+def median(values):
+    '''
+    Returns the middle value of a list of numbers
+
+    Parameters:
+        values (list): The numbers, in any order
+
+    Return value: The median
+
+    Sample call: middle = median([3, 1, 2])
+    '''
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+def measure(case, runs):
+    '''
+    Times a case over several fresh processes. One extra run is made first and thrown away, so every
+    measured run finds the compiled modules already cached on disk.
+
+    Parameters:
+        case (string): A key of CASES
+        runs (int): The number of measured processes
+
+    Return value: A dictionary of median and best times in milliseconds
+
+    Sample call: result = measure("physics", 20)
+    '''
+    runOnce(case)
+    samples = [runOnce(case) for _ in range(runs)]
+    result = {"case": case, "runs": runs, "importsPygame": samples[0]["pygame"]}
+    for key in ("import", "firstTick", "process"):
+        values = [sample[key] * 1000 for sample in samples]
+        result[key] = {"median": median(values), "best": min(values)}
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time imports and the first tick in fresh processes.")
+    parser.add_argument("--cases", choices=sorted(CASES), nargs="+", default=list(CASES), help="what to start")
+    parser.add_argument("--runs", type=int, default=20, help="processes started for each case")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to FILE")
+    args = parser.parse_args()
+
+    results = [measure(case, args.runs) for case in args.cases]
+    print("%-11s %9s %12s %10s  %s" % ("case", "import", "first tick", "process", "pygame"))
+    for result in results:
+        print("%-11s %7.1fms %10.1fms %8.1fms  %s" % (result["case"], result["import"]["median"], \
+              result["firstTick"]["median"], result["process"]["median"], \
+              "yes" if result["importsPygame"] else "no"))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
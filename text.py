@@ -3,9 +3,78 @@
 # Program Description: To provide a class that displays textual information that can be drawn onto
 # a pygame surface
 
+from collections import OrderedDict
 from drawable import Drawable
 import pygame
 
+# The most rendered messages that are kept around for reuse
+RENDER_CACHE_SIZE = 128
+# Fonts loaded so far, keyed by (file, size), so each font file is only read from disk once
+_fontCache = {}
+# Rendered text surfaces, keyed by (message, color, font), with the least recently used dropped first
+_renderCache = OrderedDict()
+# The number of times text has actually been rendered, rather than found in the cache
+_renderCount = 0
+
+def getFont(file="freesansbold.ttf", size=24):
+    '''
+    Returns a font, loading it from disk only the first time a (file, size) pair is asked for
+    
+    Parameters:
+        file (string): The font file to load
+        size (int): The font size
+        
+    Return value: A pygame.font.Font object
+    
+    Sample call: font = getFont("freesansbold.ttf", 40)
+    '''
+    key = (file, size)
+    font = _fontCache.get(key)
+    if font is None:
+        font = pygame.font.Font(file, size)
+        _fontCache[key] = font
+    return font
+
+def renderText(message, color, file="freesansbold.ttf", size=24):
+    '''
+    Returns a surface with the message rendered on it, reusing an earlier rendering of the same
+    message, color and font when there is one
+    
+    Parameters:
+        message (string): The text to render
+        color (tuple): A three-integer RGB tuple for the text
+        file (string): The font file
+        size (int): The font size
+        
+    Return value: A pygame.Surface object. It is shared, so it should not be drawn on.
+    
+    Sample call: surface.blit(renderText("Hi", WHITE), (0, 0))
+    '''
+    key = (message, color, file, size)
+    rendered = _renderCache.get(key)
+    if rendered is not None:
+        _renderCache.move_to_end(key)
+        return rendered
+    global _renderCount
+    _renderCount += 1
+    rendered = getFont(file, size).render(message, True, color)
+    _renderCache[key] = rendered
+    if len(_renderCache) > RENDER_CACHE_SIZE:
+        _renderCache.popitem(last=False)
+    return rendered
+
+def getRenderCount():
+    '''
+    Returns how many times text has been rendered so far, not counting reuses from the cache
+    
+    Parameters: None
+        
+    Return value: An integer count
+    
+    Sample call: renders = getRenderCount()
+    '''
+    return _renderCount
+
 class Text(Drawable):
     '''
     To display textual information on a pygame surface
@@ -26,6 +95,7 @@ class Text(Drawable):
         get_rect: Instantiates and returns a rectangle object covering the area of the Text object
         setMessage: Changes the text (message attribute) to be displayed
     '''
+    __slots__ = ("__message", "__color", "__size", "__surface")
     # Constructor
     def __init__(self, message="Pygame", x=0, y=0, color=(0,0,0), \
                  size=24):
@@ -46,7 +116,9 @@ class Text(Drawable):
         super().__init__(x, y)
         self.__message = message
         self.__color = color
-        self.__fontObj = pygame.font.Font("freesansbold.ttf", size)
+        self.__size = size
+        # The font is loaded by renderText the first time the text is drawn or measured, not here
+        self.__surface = None
     def draw(self, surface):
         '''
         Creates a new surface object that depicts text and then draws it
@@ -60,9 +132,10 @@ class Text(Drawable):
         
         Sample call: text1.draw(surface)
         '''
-        # Text's surface object
-        self.__surface = self.__fontObj.render(self.__message, \
-                                               True, self.__color)
+        # Text's surface object, which is only rendered again after the message changes
+        if self.__surface is None:
+            self.__surface = renderText(self.__message, self.__color, \
+                                        "freesansbold.ttf", self.__size)
         # Combines text's surface with the base surface object
         surface.blit(self.__surface, self.getLoc())
     # Getter
@@ -77,7 +150,10 @@ class Text(Drawable):
         
         Sample call: text1.get_rect()
         '''
-        return self.__surface.get_rect()
+        if self.__surface is None:
+            self.__surface = renderText(self.__message, self.__color, \
+                                        "freesansbold.ttf", self.__size)
+        return self.__surface.get_rect(topleft=self.getLoc())
     # Setter
     def setMessage(self, message):
         '''
@@ -91,4 +167,142 @@ class Text(Drawable):
         
         Sample call: text1.setMessage("Thank you for playing!")
         '''
-        self.__message = message
\ No newline at end of file
+        if message != self.__message:
+            self.__message = message
+            self.__surface = None
+            self.clearBounds()
+
+class CounterText(Drawable):
+    '''
+    Displays a fixed label followed by a number that changes often, such as a score. The label is
+    rendered once and the number is drawn from a digit atlas, one pre-rendered glyph per character,
+    so changing the number never renders any text.
+    
+    Parameters:
+        Drawable (base class): Instantiated in constructor to receive x and y coordinate information
+    
+    Attributes:
+        label (string): The text shown in front of the number
+        value (int): The number to display
+        color (tuple): A three-integer RBG tuple that sets the color of the text
+        size (int): The font size of the text
+    
+    Methods:
+        __init__: Instantiates the CounterText class
+        draw: Draws the label and then each digit of the value
+        get_rect: Returns a rectangle covering the label and the digits
+        getValue: Returns the value attribute
+        setValue: Changes the number to be displayed
+    '''
+    __slots__ = ("__label", "__value", "__color", "__size")
+    # Glyph surfaces keyed by (character, color, size), shared by every counter
+    __atlas = {}
+    # Constructor
+    def __init__(self, label="", value=0, x=0, y=0, color=(0,0,0), size=24):
+        '''
+        Instantiates the base class Drawable as well as CounterText based on given arguments
+        
+        Parameters:
+            label (string): The text shown in front of the number
+            value (int): The number to display
+            x (int): The horizontal position of the label
+            y (int): The vertical position of the label
+            color (tuple): A three-integer RBG tuple to set the color of the text
+            size (int): The font size of the text
+            
+        Return value: None
+        
+        Sample call: score = CounterText("Score: ", 0, 10, 10)
+        '''
+        super().__init__(x, y)
+        self.__label = label
+        self.__value = value
+        self.__color = color
+        self.__size = size
+    def __glyph(self, character):
+        '''
+        Returns the pre-rendered surface for one character of the number, rendering it the first time
+        
+        Parameters:
+            self (object): The CounterText object itself
+            character (string): A digit or minus sign
+            
+        Return value: A pygame.Surface object
+        '''
+        key = (character, self.__color, self.__size)
+        glyph = CounterText.__atlas.get(key)
+        if glyph is None:
+            global _renderCount
+            _renderCount += 1
+            glyph = getFont("freesansbold.ttf", self.__size).render(character, True, self.__color)
+            CounterText.__atlas[key] = glyph
+        return glyph
+    def draw(self, surface):
+        '''
+        Draws the label and then each character of the value next to each other
+        
+        Parameters:
+            self (object): The CounterText object itself
+            surface (object): The surface to draw on
+            
+        Return value: None
+        
+        Sample call: score.draw(surface)
+        '''
+        x, y = self.getLoc()
+        labelSurface = renderText(self.__label, self.__color, "freesansbold.ttf", self.__size)
+        surface.blit(labelSurface, (x, y))
+        x += labelSurface.get_width()
+        for character in str(self.__value):
+            glyph = self.__glyph(character)
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+    # Getters
+    def get_rect(self):
+        '''
+        Returns a rectangle covering the label and the digits
+        
+        Parameters:
+            self (object): The CounterText object itself
+        
+        Return value: A pygame.Rect object
+        
+        Sample call: score.get_rect()
+        '''
+        x, y = self.getLoc()
+        labelSurface = renderText(self.__label, self.__color, "freesansbold.ttf", self.__size)
+        width = labelSurface.get_width()
+        height = labelSurface.get_height()
+        for character in str(self.__value):
+            glyph = self.__glyph(character)
+            width += glyph.get_width()
+            height = max(height, glyph.get_height())
+        return pygame.Rect(x, y, width, height)
+    def getValue(self):
+        '''
+        Returns the number being displayed
+        
+        Parameters:
+            self (object): The CounterText object itself
+        
+        Return value: An integer
+        
+        Sample call: score.getValue()
+        '''
+        return self.__value
+    # Setter
+    def setValue(self, value):
+        '''
+        Changes the number to be displayed
+        
+        Parameters:
+            self (object): The CounterText object itself
+            value (int): The new number
+        
+        Return value: None
+        
+        Sample call: score.setValue(7)
+        '''
+        if value != self.__value:
+            self.__value = value
+            self.clearBounds()
\ No newline at end of file
@@ -0,0 +1,1043 @@
+# Nathan Wong
+# 05/14/2024
+# Program Description: Holds the state and rules of the ball game so that it can be stepped without a
+# display, a font or an event loop. The pygame front end in hw4.py only draws what the world contains.
+
+import random, time
+from broadphase import SpatialHash, bruteForcePairs
+from ccd import ballBox, sweptBallHit, sweptBoxHit, wallHitTime
+from contacts import ContactCache, pairKey
+from entities import BallPool, EntityStore
+from paddle import Paddle
+
+DREXEL_BLUE = (7, 41, 77)
+DREXEL_GOLD = (244, 219, 133)
+GREEN = (158, 214, 149)
+BLACK = (0, 0, 0)
+RED = (200, 16, 46)
+# The color of each player's paddle, in player order
+PADDLE_COLORS = (DREXEL_BLUE, RED)
+
+class WorldState:
+    '''
+    A copy of a World's whole state, taken by World.snapshot. Ball positions and speeds are held in
+    flat tuples, or in copies of the NumPy arrays when the World uses a BallSystem, so taking and
+    restoring a snapshot costs about the same as one pass over the balls.
+
+    Attributes:
+        tick (int): The World's tick
+        score (int): The World's score
+        won (boolean): Whether the game had been won
+        lost (boolean): Whether the game had been lost
+        ballCount (int): The number of balls in play
+        contents (tuple): Everything else World.restore needs, in the World's own layout
+
+    Methods:
+        __init__: Instantiates the WorldState object
+        getTick: Returns the tick attribute
+        getScore: Returns the score attribute
+        getBallCount: Returns the ballCount attribute
+        getContents: Returns the contents attribute
+        isWon: Returns the won attribute
+        isLost: Returns the lost attribute
+    '''
+    __slots__ = ("__tick", "__score", "__won", "__lost", "__ballCount", "__contents")
+    # Constructor
+    def __init__(self, tick, score, won, lost, ballCount, contents):
+        '''
+        Instantiates the WorldState object
+
+        Parameters:
+            self (object): The WorldState object itself
+            tick (int): The World's tick
+            score (int): The World's score
+            won (boolean): Whether the game had been won
+            lost (boolean): Whether the game had been lost
+            ballCount (int): The number of balls in play
+            contents (tuple): Everything else World.restore needs
+
+        Return value: None
+
+        Sample call: state = world.snapshot()
+        '''
+        self.__tick = tick
+        self.__score = score
+        self.__won = won
+        self.__lost = lost
+        self.__ballCount = ballCount
+        self.__contents = contents
+    # Getters
+    def getTick(self):
+        '''
+        Returns the tick the snapshot was taken at
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: An integer tick
+
+        Sample call: tick = state.getTick()
+        '''
+        return self.__tick
+    def getScore(self):
+        '''
+        Returns the score when the snapshot was taken
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: An integer score
+
+        Sample call: score = state.getScore()
+        '''
+        return self.__score
+    def getBallCount(self):
+        '''
+        Returns how many balls were in play when the snapshot was taken
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: An integer count
+
+        Sample call: count = state.getBallCount()
+        '''
+        return self.__ballCount
+    def getContents(self):
+        '''
+        Returns the rest of the copied state, laid out the way World.restore reads it
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: A tuple
+
+        Sample call: contents = state.getContents()
+        '''
+        return self.__contents
+    def isWon(self):
+        '''
+        Returns whether the game had been won when the snapshot was taken
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: Boolean indicating a win
+
+        Sample call: if state.isWon(): ...
+        '''
+        return self.__won
+    def isLost(self):
+        '''
+        Returns whether the game had been lost when the snapshot was taken
+
+        Parameters:
+            self (object): The WorldState object itself
+
+        Return value: Boolean indicating a loss
+
+        Sample call: if state.isLost(): ...
+        '''
+        return self.__lost
+
+class World:
+    '''
+    The balls, paddle and score of one game, along with the rules that move them forward one frame
+    at a time. The paddle's position is passed in to each step instead of being read from the mouse.
+
+    Attributes:
+        width (int): The width of the play area
+        height (int): The height of the play area
+        balls (object): An EntityStore holding the balls in play. The gold ball is always the first
+        ball while it is in play.
+        goldId (int): The gold ball's entity ID
+        pool (object): The BallPool that removed balls go back to, or None when a BallSystem holds the balls
+        system (object): The BallSystem holding the balls, or None when they are Ball objects
+        slotIds (array): The entity ID of the ball in each BallSystem slot, or None without a BallSystem
+        paddles (list): One Paddle object per player, each placed with its position passed to step
+        paddle (object): The first player's Paddle object
+        numGreen (int): The score, which counts the balls that have turned green
+        win (boolean): Whether the game has been won
+        lose (boolean): Whether the game has been lost
+        tick (int): The number of steps taken so far
+        rng (object): The random.Random object every new ball's direction is drawn from
+        rules (dictionary): The tunable rule settings passed to the constructor
+        broadPhase (string): "grid" to find candidate ball pairs with a spatial hash, "brute" to list
+        every pair
+        collisionMode (string): "discrete" or "swept", picking how contacts during a frame are found
+        obstacles (object): The ObstacleLayer holding the level's bricks and walls, or None
+        contacts (object): The ContactCache of touching ball pairs, or None when every overlap counts as
+        a new collision
+        pairsTested (int): The running total of ball pairs checked for contact. With a BallSystem in the
+        discrete mode, the pairs are compared inside NumPy and only the touching ones are counted.
+
+    Methods:
+        __init__: Instantiates the World with a gold ball and a paddle
+        step: Advances the game by one frame
+        stepFrame: Advances the game by one frame using a FrameInput snapshot
+        addBall: Puts an extra ball into play
+        snapshot: Copies the World's whole state into a WorldState
+        restore: Puts the World back into a WorldState
+        getBalls: Returns the list of balls in play
+        getBallIds: Returns the entity ID of each ball in play
+        getGoldId: Returns the goldId attribute
+        getPaddle: Returns the first player's Paddle object
+        getPaddles: Returns the paddles attribute
+        getScore: Returns the numGreen attribute
+        getTick: Returns the tick attribute
+        getSize: Returns the width and height of the play area
+        getRng: Returns the World's random number generator
+        getRules: Returns the tunable rule settings
+        getPairsTested: Returns the pairsTested attribute
+        getObstacles: Returns the obstacles attribute
+        getContacts: Returns the contacts attribute
+        isWon: Returns the win attribute
+        isLost: Returns the lose attribute
+    '''
+    # Constructor
+    def __init__(self, width=800, height=600, broadPhase="grid", useBallSystem=False, seed=None, \
+                 maxBalls=10, bounceMultiplier=1.5, speedCap=5, goldRadius=30, smallRadius=18, winScore=10, \
+                 collisionMode="discrete", obstacles=None, paddleCount=1, contactCache=False):
+        '''
+        Instantiates the World with a gold ball in the middle of the play area and a paddle at the bottom
+
+        Parameters:
+            self (object): The World object itself
+            width (int): The width of the play area
+            height (int): The height of the play area
+            broadPhase (string): "grid" or "brute", picking how candidate ball pairs are found
+            useBallSystem (boolean): Whether balls are stored in a BallSystem's NumPy arrays. In the discrete
+            mode the whole step is then done with NumPy, which is much faster for thousands of balls but
+            slower for the handful of a normal game.
+            seed (int): Seed for the World's own random number generator. Two Worlds with the same seed
+            that are given the same paddle positions end up in exactly the same state. If None, the
+            generator is seeded from the operating system.
+            maxBalls (int): The most balls that can be in play, counting the gold ball
+            bounceMultiplier (float): How much a paddle hit speeds a ball up
+            speedCap (float): Balls at or above this vertical speed bounce off the paddle without speeding up
+            goldRadius (int/float): The radius of the gold ball
+            smallRadius (int/float): The radius of the black balls spawned by the gold ball
+            winScore (int): The score that wins the game
+            collisionMode (string): "discrete" moves each ball by its whole speed and then checks for
+            overlaps, as the original game did. "swept" finds the exact moment of each contact during
+            the frame, so fast balls cannot tunnel through the paddle or each other.
+            obstacles (object): An ObstacleLayer of bricks and walls for the balls to bounce off, or None.
+            Breakable bricks are removed from the layer when hit.
+            paddleCount (int): The number of players, each with a paddle along the bottom. Paddles may
+            overlap, and a ball that touches two at once only bounces off the first.
+            contactCache (boolean): If True, two balls only collide (turning green, scoring and reversing)
+            on the tick they start touching, and not again while they stay overlapped. If False, every
+            tick they overlap counts as a collision, as in the original game.
+
+        Return value: None
+
+        Sample call: world = World(800, 600)
+        '''
+        self.__width = width
+        self.__height = height
+        self.__broadPhase = broadPhase
+        self.__collisionMode = collisionMode
+        self.__obstacles = obstacles
+        self.__contacts = ContactCache() if contactCache else None
+        self.__grid = SpatialHash()
+        self.__rng = random.Random(seed)
+        self.__rules = {"maxBalls": maxBalls, "bounceMultiplier": bounceMultiplier, "speedCap": speedCap, \
+                        "goldRadius": goldRadius, "smallRadius": smallRadius, "winScore": winScore}
+        # Balls that leave play go back to where they came from, so spawning reuses them
+        if useBallSystem:
+            # Only Worlds that use a BallSystem pay for importing NumPy
+            import numpy as np
+            from ballsystem import BallSystem, BallView
+            self.__system = BallSystem()
+            # The entity ID of the ball in each of the system's slots, so the batched step can go from
+            # slot numbers back to entities without asking every view for its slot
+            self.__slotIds = np.zeros(16, dtype=np.int64)
+            self.__pool = None
+            self.__makeBall = self.__system.spawn
+            self.__balls = EntityStore(BallView.kill)
+        else:
+            self.__system = None
+            self.__slotIds = None
+            self.__pool = BallPool()
+            self.__makeBall = self.__pool.acquire
+            self.__balls = EntityStore(self.__pool.release)
+        gold = self.__makeBall(width/2, height/2, goldRadius, DREXEL_GOLD, self.__rng)
+        self.__goldId = self.__addBall(gold)
+        self.__paddles = [Paddle(200, 20, PADDLE_COLORS[player % len(PADDLE_COLORS)], width, height, \
+                                 followMouse=False) for player in range(paddleCount)]
+        self.__paddle = self.__paddles[0]
+        self.__numGreen = 0
+        self.__win = False
+        self.__lose = False
+        self.__tick = 0
+        self.__pairsTested = 0
+    def step(self, paddleX, dt=1):
+        '''
+        Advances the game by one frame: places the paddle, bounces balls off the paddle and each other,
+        moves every ball and removes balls that reached the bottom of the play area
+
+        Parameters:
+            self (object): The World object itself
+            paddleX (int/float): The horizontal center of the paddle for this frame, or a tuple with
+            each paddle's center in player order when the World has more than one paddle
+            dt (float): How long the step is, in frames of 1/60 of a second. Ball speeds are per frame, so
+            a step of 2 moves every ball twice as far. Each step is still one tick.
+
+        Return value: None
+
+        Sample call: world.step(pygame.mouse.get_pos()[0])
+        '''
+        if isinstance(paddleX, (tuple, list)):
+            for paddle, x in zip(self.__paddles, paddleX):
+                paddle.setX(x)
+        else:
+            self.__paddle.setX(paddleX)
+        if self.__collisionMode == "swept":
+            self.__stepSwept(dt)
+        elif self.__system is not None:
+            self.__stepBatched(dt)
+        else:
+            self.__stepDiscrete(dt)
+
+        # Number of green balls cannot be below 0
+        if self.__numGreen <= -1:
+            self.__lose = True
+        # Spawning all balls possible and getting them all to collide with each other results in a victory
+        elif self.__numGreen >= self.__rules["winScore"]:
+            self.__win = True
+        self.__tick += 1
+    def stepFrame(self, frame, dt=1):
+        '''
+        Advances the game by one frame, placing the paddle under the mouse position in an input snapshot
+
+        Parameters:
+            self (object): The World object itself
+            frame (object): A FrameInput object sampled for this tick
+            dt (float): How long the step is, in frames
+
+        Return value: None
+
+        Sample call: world.stepFrame(source.sample(world.getTick()))
+        '''
+        self.step(frame.getMouseX(), dt)
+    def addBall(self, x, y, radius, color=BLACK):
+        '''
+        Puts an extra ball into play, such as to build a crowded scene for a benchmark. Like a ball the
+        gold ball spawns, it starts moving down with a direction drawn from the World's generator. It
+        counts towards maxBalls, so the gold ball stops spawning once that many balls are in play.
+
+        Parameters:
+            self (object): The World object itself
+            x (int/float): Horizontal position of the ball's center
+            y (int/float): Vertical position of the ball's center
+            radius (int/float): The radius of the ball
+            color (tuple): RGB tuple for the ball's color
+
+        Return value: The new Ball, or BallView when a BallSystem holds the balls
+
+        Sample call: ball = world.addBall(400, 300, 18)
+        '''
+        ball = self.__makeBall(x, y, radius, color, self.__rng)
+        self.__addBall(ball)
+        return ball
+    def snapshot(self):
+        '''
+        Copies everything that decides how the game goes on: the balls and their IDs, the score, the
+        win and lose flags, the tick, the paddle, the random number generator and which bricks are broken. Stepping a restored
+        World with the same paddle positions gives exactly the same game as stepping this one.
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A WorldState object, which is never changed and can be restored any number of times
+
+        Sample call: state = world.snapshot()
+        '''
+        entities = self.__balls.getEntities()
+        if self.__system is not None:
+            balls = (self.__system.getState(), tuple([view.getIndex() for view in entities]))
+        else:
+            balls = tuple([ball.getState() for ball in entities])
+        obstacles = self.__obstacles.getState() if self.__obstacles is not None else None
+        contacts = self.__contacts.getState() if self.__contacts is not None else None
+        contents = (self.__system is not None, balls, self.__balls.getState(), self.__goldId, \
+                    tuple([paddle.getLoc()[0] for paddle in self.__paddles]), self.__pairsTested, \
+                    self.__rng.getstate(), obstacles, contacts)
+        return WorldState(self.__tick, self.__numGreen, self.__win, self.__lose, len(entities), contents)
+    def restore(self, state):
+        '''
+        Puts the World back into the state a snapshot was taken in. Balls already in play are handed
+        back to the pool and reused for the restored ones.
+
+        Parameters:
+            self (object): The World object itself
+            state (object): A WorldState returned by snapshot on this World or one built with the same
+            settings
+
+        Return value: None
+
+        Sample call: world.restore(state)
+        '''
+        usesSystem, balls, storeState, goldId, paddleX, pairsTested, rngState, obstacles, contacts = \
+            state.getContents()
+        if usesSystem != (self.__system is not None):
+            raise ValueError("the snapshot was taken from a World with a different ball storage")
+        if self.__system is not None:
+            from ballsystem import BallView
+            systemState, indices = balls
+            self.__system.setState(systemState)
+            # A view only refers to a slot, so views of the slots still in play are kept
+            views = {view.getIndex(): view for view in self.__balls.getEntities()}
+            entities = [views.get(index) or BallView(self.__system, index) for index in indices]
+        else:
+            pool = self.__pool
+            for ball in self.__balls.getEntities():
+                pool.release(ball)
+            entities = [pool.reuse(ballState) for ballState in balls]
+        self.__balls.setState(storeState, entities)
+        if self.__system is not None:
+            self.__slotIds = self.__slotIds[:0]
+            for entityId, view in zip(self.__balls.getIds(), entities):
+                self.__trackSlot(entityId, view)
+        self.__goldId = goldId
+        for paddle, x in zip(self.__paddles, paddleX):
+            paddle.setX(x)
+        self.__pairsTested = pairsTested
+        self.__rng.setstate(rngState)
+        if obstacles is not None:
+            self.__obstacles.setState(obstacles)
+        if contacts is not None:
+            self.__contacts.setState(contacts)
+        self.__tick = state.getTick()
+        self.__numGreen = state.getScore()
+        self.__win = state.isWon()
+        self.__lose = state.isLost()
+    def __stepDiscrete(self, dt):
+        '''
+        Moves every ball by its whole speed and then checks what it overlaps, as the original game loop did
+
+        Parameters:
+            self (object): The World object itself
+            dt (float): How many frames of motion to apply
+
+        Return value: None
+        '''
+        balls = self.__balls.getEntities()
+        ids = self.__balls.getIds()
+        paddles = self.__paddles
+        if self.__broadPhase == "grid":
+            pairs = self.__grid.candidatePairs(balls)
+        else:
+            pairs = bruteForcePairs(balls)
+        # Files each candidate pair under its lower index so every pair is only handled once
+        partners = [[] for ball in balls]
+        self.__pairsTested += len(pairs)
+        for i, j in pairs:
+            partners[i].append(j)
+        contacts = self.__contacts
+
+        # Balls spawned during the loop are added to the end and start moving on the next frame
+        for i in range(len(partners)):
+            ball = balls[i]
+            bounced = False
+            for paddle in paddles:
+                # Results in a game over if the ball hits the sides of a paddle
+                if ball.intersectSide(paddle):
+                    self.__lose = True
+                if not bounced and ball.intersects(paddle):
+                    self.__hitPaddle(ids[i], ball)
+                    bounced = True
+            for j in partners[i]:
+                other = balls[j]
+                if ball.isTouchingBall(other):
+                    # With a contact cache, balls that were already touching last tick are left alone
+                    if contacts is None or contacts.touch(pairKey(ids[i], ids[j]), self.__tick):
+                        self.__collide(ball, other)
+            if self.__obstacles is not None:
+                self.__hitObstacles(ball, dt)
+            ball.move(self.__width, dt)
+            # Removes the ball if it hits the bottom of the play area
+            if (ball.getLoc()[1] + ball.getRadius()) >= self.__height:
+                self.__dropBall(ids[i], ball)
+        self.__balls.flush()
+        if contacts is not None:
+            contacts.endTick()
+    def __stepBatched(self, dt):
+        '''
+        Follows the same rules as the discrete mode for balls held in a BallSystem, but handles every ball
+        at once with NumPy instead of looping over the balls. Every rule that can meet the same ball in one
+        frame (a paddle bounce and any number of ball collisions) only multiplies its speeds, so applying
+        them together gives exactly the result of applying them one ball at a time.
+
+        Parameters:
+            self (object): The World object itself
+            dt (float): How many frames of motion to apply
+
+        Return value: None
+        '''
+        import numpy as np
+        system = self.__system
+        rules = self.__rules
+        count = system.getCount()
+        alive = system.alive[:count]
+        x = system.x[:count]
+        y = system.y[:count]
+        vx = system.vx[:count]
+        vy = system.vy[:count]
+        radius = system.radius[:count]
+        # The same truncated rectangles as BallView.getBounds
+        left = np.trunc(x - radius)
+        top = np.trunc(y - radius)
+        size = np.trunc(2 * radius)
+        right = left + size
+        bottom = top + size
+
+        bounced = np.zeros(count, dtype=bool)
+        for paddle in self.__paddles:
+            paddleLeft, paddleTop, paddleRight, paddleBottom = paddle.getBounds()
+            # Results in a game over if a ball hits the sides of a paddle, the same test as intersectSide
+            if np.any(alive & ((right == paddleLeft) | (left == paddleRight)) & (bottom >= paddleTop)):
+                self.__lose = True
+            # A ball that touches two paddles at once only bounces off the first
+            bounced |= alive & (left < paddleRight) & (right > paddleLeft) & (top < paddleBottom) & \
+                       (bottom > paddleTop)
+
+        first, second = system.overlappingPairs()
+        self.__pairsTested += len(first)
+        contacts = self.__contacts
+        if contacts is not None:
+            # With a contact cache, balls that were already touching last tick are left alone
+            slotIds = self.__slotIds
+            begun = [contacts.touch(pairKey(int(slotIds[a]), int(slotIds[b])), self.__tick) \
+                     for a, b in zip(first.tolist(), second.tolist())]
+            first = first[begun]
+            second = second[begun]
+        self.__numGreen += system.resolveCollisions(first, second, system.colorToIndex(GREEN))
+
+        # The same speed changes as __hitPaddle, for every bounced ball at once
+        speedCap = rules["speedCap"]
+        bounce = rules["bounceMultiplier"]
+        slow = bounced & (vy < speedCap) & (vy > -speedCap)
+        vy[slow] *= -bounce
+        vx[slow] *= bounce
+        vy[bounced & ~slow] *= -1
+        gold = self.__balls.get(self.__goldId)
+        spawn = gold is not None and bool(bounced[gold.getIndex()]) and len(self.__balls) < rules["maxBalls"]
+
+        if self.__obstacles is not None:
+            for ball in self.__balls.getEntities():
+                self.__hitObstacles(ball, dt)
+        system.step(self.__width, self.__height, dt)
+
+        # Removes the balls that hit the bottom of the play area, in the order the discrete mode finds them
+        balls = self.__balls
+        dropped = np.flatnonzero(alive & (y + radius >= self.__height))
+        for entityId in sorted(self.__slotIds[dropped].tolist(), key=balls.getPosition):
+            self.__dropBall(entityId, balls.get(entityId))
+        # The gold ball's spawn joins after the move, since balls spawned during a step start moving on the next
+        if spawn:
+            self.__addBall(self.__makeBall(self.__width/2, self.__height/2, rules["smallRadius"], BLACK, \
+                                           self.__rng))
+        balls.flush()
+        if contacts is not None:
+            contacts.endTick()
+    def __hitObstacles(self, ball, dt):
+        '''
+        Bounces a ball off every obstacle its box would cross while moving for the step, and breaks
+        the breakable ones
+
+        Parameters:
+            self (object): The World object itself
+            ball (object): The ball about to move
+            dt (float): How many frames of motion the ball is about to make
+
+        Return value: None
+        '''
+        box = ball.getBounds()
+        xSpeed = ball.getXSpeed()
+        ySpeed = ball.getYSpeed()
+        hits = self.__obstacles.querySwept(box, xSpeed * dt, ySpeed * dt)
+        if not hits:
+            return
+        left, top, right, bottom = box
+        flipX = False
+        flipY = False
+        for obstacle in hits:
+            obstacleLeft, obstacleTop, obstacleRight, obstacleBottom = obstacle.getBounds()
+            # A ball already level with an obstacle on one axis can only reach it along the other
+            if left < obstacleRight and right > obstacleLeft:
+                flipY = True
+            elif top < obstacleBottom and bottom > obstacleTop:
+                flipX = True
+            else:
+                flipX = True
+                flipY = True
+            if obstacle.isBreakable():
+                self.__obstacles.remove(obstacle)
+        if flipX:
+            ball.setXSpeed(xSpeed*-1)
+        if flipY:
+            ball.setYSpeed(ySpeed*-1)
+    def __stepSwept(self, dt):
+        '''
+        Moves the balls through the frame one contact at a time. The earliest moment any ball reaches a wall,
+        the paddle or another ball is found, every ball is moved to that moment, the contact is handled and
+        the search repeats until the frame is over, so no ball can pass through anything however fast it is.
+        A paddle that has moved onto a ball since the last frame bounces it, and the side-of-paddle game over
+        uses intersectSide at the start of the frame, both as in the discrete mode. A ball that reaches the
+        side of a paddle during the frame only bounces off it sideways.
+
+        Parameters:
+            self (object): The World object itself
+            dt (float): How many frames long the step is
+
+        Return value: None
+        '''
+        ids = self.__balls.getIds()
+        width = self.__width
+        # Balls spawned during this frame start moving on the next one, as in the discrete mode
+        moving = list(self.__balls.getEntities())
+        paddles = self.__paddles
+        paddleBoxes = [paddle.getBounds() for paddle in paddles]
+        # Paddles jump to their new position between frames, so the sweep below never sees one arrive on
+        # top of a ball. Overlaps at the start of the frame follow the discrete mode's rules instead, except
+        # that a ball already heading up is left to leave, so it is not turned back down into the paddle.
+        for index in range(len(moving)):
+            ball = moving[index]
+            bounced = False
+            for paddle in paddles:
+                if ball.intersectSide(paddle):
+                    self.__lose = True
+                if not bounced and ball.getYSpeed() > 0 and ball.intersects(paddle):
+                    self.__hitPaddle(ids[index], ball)
+                    bounced = True
+        pairs = self.__sweptPairs(moving, dt)
+        self.__pairsTested += len(pairs)
+        contacts = self.__contacts
+        resolved = set()
+        # Pairs that already overlap at the start of the frame follow the same rule as the discrete mode
+        for a, b in pairs:
+            if moving[a].isTouchingBall(moving[b]):
+                if contacts is None or contacts.touch(pairKey(ids[a], ids[b]), self.__tick):
+                    self.__collide(moving[a], moving[b])
+                else:
+                    # A contact carried over from the last tick was handled when it began, so the
+                    # search below starts out treating the pair as resolved and never tests it
+                    resolved.add((a, b))
+
+        now = 0.0
+        # Stops a ball that is stuck between two things from looping forever
+        for _ in range(8 * len(moving) + 16):
+            remaining = dt - now
+            earliest = None
+            for index in range(len(moving)):
+                ball = moving[index]
+                x, y = ball.getLoc()
+                radius = ball.getRadius()
+                xSpeed = ball.getXSpeed()
+                ySpeed = ball.getYSpeed()
+                t = wallHitTime(x, xSpeed, radius, 0, width, remaining)
+                if t is not None and (earliest is None or t < earliest[0]):
+                    earliest = (t, "side", index)
+                # The bottom is open, since balls leave the play area through it
+                t = wallHitTime(y, ySpeed, radius, 0, None, remaining)
+                if t is not None and (earliest is None or t < earliest[0]):
+                    earliest = (t, "top", index)
+                box = ballBox(ball)
+                for paddleBox in paddleBoxes:
+                    hit = sweptBoxHit(box, xSpeed * remaining, ySpeed * remaining, paddleBox)
+                    if hit is not None and (earliest is None or hit[0] * remaining < earliest[0]):
+                        earliest = (hit[0] * remaining, "paddle", index, hit[1])
+                if self.__obstacles is not None:
+                    for obstacle in self.__obstacles.querySwept(box, xSpeed * remaining, ySpeed * remaining):
+                        hit = sweptBoxHit(box, xSpeed * remaining, ySpeed * remaining, obstacle.getBounds())
+                        if hit is not None and (earliest is None or hit[0] * remaining < earliest[0]):
+                            earliest = (hit[0] * remaining, "obstacle", index, hit[1], obstacle)
+            self.__pairsTested += len(pairs)
+            for pair in pairs:
+                if pair in resolved:
+                    continue
+                t = sweptBallHit(moving[pair[0]], moving[pair[1]], remaining)
+                if t is not None and (earliest is None or t < earliest[0]):
+                    earliest = (t, "ball", pair)
+            if earliest is None:
+                break
+
+            self.__advance(moving, earliest[0])
+            now += earliest[0]
+            kind = earliest[1]
+            if kind == "side":
+                ball = moving[earliest[2]]
+                ball.setXSpeed(ball.getXSpeed()*-1)
+            elif kind == "top":
+                ball = moving[earliest[2]]
+                ball.setYSpeed(ball.getYSpeed()*-1)
+            elif kind == "obstacle":
+                ball = moving[earliest[2]]
+                if earliest[3] != 0:
+                    ball.setXSpeed(ball.getXSpeed()*-1)
+                else:
+                    ball.setYSpeed(ball.getYSpeed()*-1)
+                if earliest[4].isBreakable():
+                    self.__obstacles.remove(earliest[4])
+            elif kind == "paddle":
+                ball = moving[earliest[2]]
+                if earliest[3] != 0:
+                    # The ball bounces off the side. Whether that loses the game is decided by the same
+                    # intersectSide check as the discrete mode, at the start of the next frame.
+                    ball.setXSpeed(ball.getXSpeed()*-1)
+                else:
+                    self.__hitPaddle(ids[earliest[2]], ball)
+                    # The ball may now be fast enough to reach balls outside of the old candidate pairs
+                    pairs = [pair for pair in self.__sweptPairs(moving, dt - now) if pair not in resolved]
+            else:
+                a, b = earliest[2]
+                if contacts is None or contacts.touch(pairKey(ids[a], ids[b]), self.__tick):
+                    self.__collide(moving[a], moving[b])
+                resolved.add(earliest[2])
+        self.__advance(moving, dt - now)
+
+        for i in range(len(moving)):
+            ball = moving[i]
+            if (ball.getLoc()[1] + ball.getRadius()) >= self.__height:
+                self.__dropBall(ids[i], ball)
+        self.__balls.flush()
+        if contacts is not None:
+            contacts.endTick()
+    def __sweptPairs(self, balls, duration):
+        '''
+        Returns the pairs of balls that could touch at some point in the next stretch of time
+
+        Parameters:
+            self (object): The World object itself
+            balls (list): The balls to pair up
+            duration (float): How many frames of motion to allow for
+
+        Return value: A sorted list of (i, j) index tuples with i < j
+        '''
+        if self.__broadPhase != "grid":
+            return bruteForcePairs(balls)
+        fastest = 0
+        for ball in balls:
+            fastest = max(fastest, abs(ball.getXSpeed()), abs(ball.getYSpeed()))
+        # Two balls heading at each other can close the gap by twice the fastest speed
+        return self.__grid.candidatePairs(balls, 2 * fastest * duration)
+    def __advance(self, balls, duration):
+        '''
+        Moves balls in a straight line for part of a frame, without any bouncing
+
+        Parameters:
+            self (object): The World object itself
+            balls (list): The balls to move
+            duration (float): How many frames of motion to apply
+
+        Return value: None
+        '''
+        if duration <= 0:
+            return
+        for ball in balls:
+            x, y = ball.getLoc()
+            ball.setLoc(x + ball.getXSpeed() * duration, y + ball.getYSpeed() * duration)
+    def __addBall(self, ball):
+        '''
+        Puts a ball into play at the end of the list of balls
+
+        Parameters:
+            self (object): The World object itself
+            ball (object): The Ball, or BallView when a BallSystem holds the balls
+
+        Return value: The ball's entity ID
+        '''
+        entityId = self.__balls.add(ball)
+        if self.__system is not None:
+            self.__trackSlot(entityId, ball)
+        return entityId
+    def __trackSlot(self, entityId, view):
+        '''
+        Records which entity a BallSystem slot holds, making room for the slot if needed
+
+        Parameters:
+            self (object): The World object itself
+            entityId (int): The ball's entity ID
+            view (object): The BallView of the ball
+
+        Return value: None
+        '''
+        index = view.getIndex()
+        if index >= len(self.__slotIds):
+            import numpy as np
+            grown = np.zeros(max(2 * len(self.__slotIds), index + 1, 16), dtype=np.int64)
+            grown[:len(self.__slotIds)] = self.__slotIds
+            self.__slotIds = grown
+        self.__slotIds[index] = entityId
+    def __hitPaddle(self, entityId, ball):
+        '''
+        Bounces a ball off the paddle, speeding it up, and spawns a new ball if it was the gold ball
+
+        Parameters:
+            self (object): The World object itself
+            entityId (int): The ball's entity ID
+            ball (object): The ball that hit the paddle
+
+        Return value: None
+        '''
+        rules = self.__rules
+        speedCap = rules["speedCap"]
+        bounce = rules["bounceMultiplier"]
+        # Increases movement speed each time the ball hits the paddle, but prevents the ball from moving too fast
+        if (ball.getYSpeed() < speedCap) and (ball.getYSpeed() > -speedCap):
+            ball.setYSpeed(ball.getYSpeed()*-bounce)
+            ball.setXSpeed(ball.getXSpeed()*bounce)
+        else:
+            ball.setYSpeed(ball.getYSpeed()*-1)
+            ball.setXSpeed(ball.getXSpeed()*1)
+        # Spawns a ball if it was the gold ball that hit the paddle
+        if entityId == self.__goldId and len(self.__balls) < rules["maxBalls"]:
+            self.__addBall(self.__makeBall(self.__width/2, self.__height/2, rules["smallRadius"], BLACK, \
+                                           self.__rng))
+    def __collide(self, ball, other):
+        '''
+        Applies the ball-vs-ball rule: both balls turn green and reverse their horizontal direction,
+        and the score rises by the number of them that were not green yet
+
+        Parameters:
+            self (object): The World object itself
+            ball (object): One of the balls that touched
+            other (object): The other ball
+
+        Return value: None
+        '''
+        # Increases the score by 2 if both balls were not initially green
+        if (ball.getColor() != GREEN) and (other.getColor() != GREEN):
+            self.__numGreen += 2
+        # Increases the score by 1 if only one of the balls wasn't initially green
+        elif (ball.getColor() != GREEN) or (other.getColor() != GREEN):
+            self.__numGreen += 1
+        ball.setXSpeed(ball.getXSpeed()*-1)
+        other.setXSpeed(other.getXSpeed()*-1)
+        ball.setColor(GREEN)
+        other.setColor(GREEN)
+    def __dropBall(self, entityId, ball):
+        '''
+        Marks a ball that reached the bottom of the play area to be removed at the end of the step,
+        taking its point away if it was green
+
+        Parameters:
+            self (object): The World object itself
+            entityId (int): The ball's entity ID
+            ball (object): The ball that reached the bottom
+
+        Return value: None
+        '''
+        self.__balls.remove(entityId)
+        # If the initial ball (gold) disappears, then it is a game over
+        if entityId == self.__goldId:
+            self.__lose = True
+        if ball.getColor() == GREEN:
+            self.__numGreen -= 1
+    # Getters
+    def getBalls(self):
+        '''
+        Returns the list of balls in play, with the gold ball first while it is in play
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A list of Ball objects. It is the World's own list, so it should not be changed.
+
+        Sample call: for ball in world.getBalls(): ball.draw(surface)
+        '''
+        return self.__balls.getEntities()
+    def getBallIds(self):
+        '''
+        Returns the entity ID of each ball in play, in the same order as getBalls. An ID keeps
+        referring to the same ball from step to step until that ball leaves play.
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A list of integer IDs. It is the World's own list, so it should not be changed.
+
+        Sample call: for entityId, ball in zip(world.getBallIds(), world.getBalls()): ...
+        '''
+        return self.__balls.getIds()
+    def getGoldId(self):
+        '''
+        Returns the gold ball's entity ID, which stays the same even after the gold ball leaves play
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: An integer ID
+
+        Sample call: gold = world.getGoldId() in world.getBallIds()
+        '''
+        return self.__goldId
+    def getPaddle(self):
+        '''
+        Returns the Paddle object, positioned where the last step placed it
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A Paddle object
+
+        Sample call: world.getPaddle().draw(surface)
+        '''
+        return self.__paddle
+    def getPaddles(self):
+        '''
+        Returns every player's paddle
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A list of Paddle objects in player order
+
+        Sample call: for paddle in world.getPaddles(): paddle.draw(surface)
+        '''
+        return self.__paddles
+    def getScore(self):
+        '''
+        Returns the number of green balls, which is the player's score
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: An integer score
+
+        Sample call: score = world.getScore()
+        '''
+        return self.__numGreen
+    def getTick(self):
+        '''
+        Returns the number of steps taken so far
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: An integer step count
+
+        Sample call: tick = world.getTick()
+        '''
+        return self.__tick
+    def getSize(self):
+        '''
+        Returns the size of the play area
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A tuple of the width and height
+
+        Sample call: width, height = world.getSize()
+        '''
+        return (self.__width, self.__height)
+    def getRng(self):
+        '''
+        Returns the random number generator that new balls draw their direction from
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A random.Random object
+
+        Sample call: state = world.getRng().getstate()
+        '''
+        return self.__rng
+    def getRules(self):
+        '''
+        Returns the tunable rule settings, such as the ball cap and the bounce multiplier
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A dictionary of rule names and values
+
+        Sample call: cap = world.getRules()["maxBalls"]
+        '''
+        return dict(self.__rules)
+    def getPairsTested(self):
+        '''
+        Returns how many ball pairs have been checked for contact since the game began
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: An integer running total
+
+        Sample call: profiler.addCounter("pairsTested", world.getPairsTested)
+        '''
+        return self.__pairsTested
+    def getObstacles(self):
+        '''
+        Returns the level's bricks and walls
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: An ObstacleLayer object, or None if the World has no obstacles
+
+        Sample call: world.getObstacles().draw(surface)
+        '''
+        return self.__obstacles
+    def getContacts(self):
+        '''
+        Returns the cache of ball pairs that are touching
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: A ContactCache object, or None if the World was made without one
+
+        Sample call: begun, persisted, ended = world.getContacts().getCounts()
+        '''
+        return self.__contacts
+    def isWon(self):
+        '''
+        Returns whether the game has been won
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: Boolean indicating a win
+
+        Sample call: if world.isWon(): ...
+        '''
+        return self.__win
+    def isLost(self):
+        '''
+        Returns whether the game has been lost
+
+        Parameters:
+            self (object): The World object itself
+
+        Return value: Boolean indicating a loss
+
+        Sample call: if world.isLost(): ...
+        '''
+        return self.__lose
+
+if __name__ == "__main__":
+    # Moves the paddle onto a falling gold ball between two frames, which has to bounce it in both modes
+    for mode in ("discrete", "swept"):
+        world = World(seed=1, collisionMode=mode)
+        gold = world.getBalls()[0]
+        gold.setLoc(400, 545)
+        gold.setYSpeed(2)
+        world.step(100)
+        world.step(400)
+        print("Paddle moved onto a ball bounces it (" + mode + "):", gold.getYSpeed() < 0 and not world.isLost())
+
+    # Plays games without a window, keeping the paddle under the gold ball, and reports the step rate
+    steps = 0
+    games = 0
+    start = time.perf_counter()
+    while steps < 100000:
+        world = World()
+        while not (world.isWon() or world.isLost()) and world.getTick() < 10000:
+            world.step(world.getBalls()[0].getLoc()[0])
+        steps += world.getTick()
+        games += 1
+    elapsed = time.perf_counter() - start
+    print("Games:", games, "Steps:", steps, "Steps per second:", round(steps / elapsed))